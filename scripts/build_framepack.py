@@ -0,0 +1,61 @@
+"""Convert a directory of frame_*.png files into a single frame pack.
+
+Usage:
+    python scripts/build_framepack.py expressions/animations/bad_apple --delta
+    python scripts/build_framepack.py <frames_dir> [-o out.pack] [--raw | --delta]
+
+Point the animation's manifest entry at the result with "pack"; the
+frames_dir stays as a fallback. --raw packs can be memory-mapped, --delta
+packs suit black-and-white clips (1-bit keyframes plus toggled runs).
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+from PIL import Image
+
+from protogen.delta import DEFAULT_KEYFRAME_INTERVAL, write_delta_pack
+from protogen.framepack import write_framepack
+
+
+def iter_frames(frame_files: list[Path]):
+    for path in frame_files:
+        with Image.open(path) as img:
+            yield img.convert("RGB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("frames_dir", type=Path, help="directory containing frame_*.png")
+    parser.add_argument("-o", "--output", type=Path, help="output path (default: <frames_dir>.pack)")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--raw", action="store_true", help="store uncompressed RGB888 frames")
+    mode.add_argument("--delta", action="store_true", help="store 1-bit delta-encoded frames")
+    parser.add_argument(
+        "--keyframe-interval", type=int, default=DEFAULT_KEYFRAME_INTERVAL,
+        help="frames between full keyframes in --delta mode",
+    )
+    args = parser.parse_args()
+
+    frame_files = sorted(args.frames_dir.glob("frame_*.png"))
+    if not frame_files:
+        sys.exit(f"No frame_*.png found in {args.frames_dir}")
+    output = args.output or args.frames_dir.with_suffix(".pack")
+
+    with Image.open(frame_files[0]) as first:
+        width, height = first.size
+
+    encoding = "raw" if args.raw else "delta" if args.delta else "zlib"
+    print(f"==> Packing {len(frame_files)} frames ({width}x{height}, {encoding})...")
+    frames = iter_frames(frame_files)
+    if args.delta:
+        count = write_delta_pack(output, frames, width, height, args.keyframe_interval)
+    else:
+        count = write_framepack(output, frames, width, height, encoding)
+    size_kb = output.stat().st_size / 1024
+    print(f"==> Wrote {count} frames to {output} ({size_kb:.0f} KiB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,34 +2,81 @@ from __future__ import annotations
 
 import asyncio
 import logging
+from collections.abc import Sequence
 
+import numpy as np
 from PIL import Image
 
 from protogen.display.base import DisplayBase
+from protogen.frame_clock import DropPolicy, FrameClock, FrameStats
+from protogen.frames import Frame, Rect, diff_rect, show_frame
 
 logger = logging.getLogger(__name__)
 
 
 class AnimationEngine:
-    def __init__(self, display: DisplayBase) -> None:
+    def __init__(
+        self,
+        display: DisplayBase,
+        drop_policy: DropPolicy = DropPolicy.DROP,
+    ) -> None:
         self._display = display
         self._running = False
+        self._drop_policy = drop_policy
+        self.stats = FrameStats()
 
     def stop(self) -> None:
         self._running = False
 
-    async def play(self, frames: list[Image.Image], fps: int = 12, loop: bool = False) -> None:
+    async def play(self, frames: Sequence[Frame], fps: int = 12, loop: bool = False) -> None:
         if not frames:
             return
         logger.debug("playing animation: %d frames, fps=%d, loop=%s", len(frames), fps, loop)
         self._running = True
-        interval = 1.0 / fps
+        total = len(frames)
+        clock = FrameClock(fps, self._drop_policy)
+        clock.start()
+        self.stats = clock.stats
+        # Change from frame i - 1 to frame i, measured once per play
+        rects: dict[int, Rect | None] = {}
+        prev_index, prev_frame = None, None
 
         while self._running:
-            for frame in frames:
-                if not self._running:
-                    return
-                self._display.show_image(frame)
-                await asyncio.sleep(interval)
-            if not loop:
+            index = clock.frame
+            if not loop and index >= total:
                 break
+            i = index % total
+            frame = frames[i]
+            dirty = None
+            # Only a direct successor's change is known; dropped frames
+            # push whole
+            if prev_index == index - 1:
+                if i not in rects:
+                    rects[i] = _step_rect(frames, i, prev_frame, frame)
+                dirty = rects[i]
+            show_frame(self._display, frame, dirty, source=self)
+            prev_index, prev_frame = index, frame
+            await asyncio.sleep(clock.advance())
+
+        if self.stats.late:
+            logger.debug(
+                "animation finished: %d presented, %d late, %d dropped",
+                self.stats.presented, self.stats.late, self.stats.dropped,
+            )
+
+
+def _step_rect(frames: Sequence[Frame], i: int, prev: Frame, frame: Frame) -> Rect | None:
+    """Dirty rect of ``frame`` (frame ``i``) over its predecessor ``prev``."""
+    dirty_rect = getattr(frames, "dirty_rect", None)
+    if dirty_rect is not None:
+        return dirty_rect(i)
+    if isinstance(frame, Image.Image):
+        # Images are pushed whole anyway
+        return None
+    if (
+        isinstance(frame, np.ndarray) and isinstance(prev, np.ndarray)
+        and np.may_share_memory(prev, frame)
+    ):
+        # Views of one buffer rewritten in place; nothing left to compare
+        return None
+    return diff_rect(prev, frame)
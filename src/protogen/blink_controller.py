@@ -8,6 +8,7 @@ from typing import Callable
 from protogen.animation import AnimationEngine
 from protogen.expression import ExpressionType
 from protogen.expression_store import ExpressionStore
+from protogen.frames import show_frame
 
 logger = logging.getLogger(__name__)
 
@@ -74,7 +75,7 @@ class BlinkController:
                 )
 
                 if self._enabled and expr.image:
-                    self._display.show_image(expr.image)
+                    show_frame(self._display, expr.image)
         except asyncio.CancelledError:
             pass
         except Exception:
@@ -12,6 +12,8 @@ class InputEvent(Enum):
     CLEAR_EFFECT = "clear_effect"
     SET_EFFECT_PARAMS = "set_effect_params"
     SET_EFFECT_WITH_PARAMS = "set_effect_with_params"
+    ADD_EFFECT = "add_effect"
+    REMOVE_EFFECT = "remove_effect"
 
 
 @dataclass(frozen=True)
@@ -28,15 +28,28 @@ class InputConfig:
     web_port: int = 8080
 
 
+@dataclass
+class GovernorConfig:
+    enabled: bool = True
+    max_load: float = 0.5
+    temp_high: float = 70.0
+    temp_critical: float = 80.0
+    min_fps: int = 5
+
+
 @dataclass
 class Config:
     display: DisplayConfig = field(default_factory=DisplayConfig)
     input: InputConfig = field(default_factory=InputConfig)
+    governor: GovernorConfig = field(default_factory=GovernorConfig)
     expressions_dir: str = "expressions"
     default_expression: str = "happy"
     blink_interval_min: float = 3.0
     blink_interval_max: float = 8.0
     transition_duration_ms: int = 150
+    frame_drop_policy: str = "drop"
+    render_fps: int = 30
+    render_thread: bool = False
 
     @classmethod
     def load(cls, path: str | Path = "config.yaml") -> "Config":
@@ -50,9 +63,12 @@ class Config:
             config.display = DisplayConfig(**data["display"])
         if "input" in data:
             config.input = InputConfig(**data["input"])
+        if "governor" in data:
+            config.governor = GovernorConfig(**data["governor"])
         for key in ("expressions_dir", "default_expression",
                      "blink_interval_min", "blink_interval_max",
-                     "transition_duration_ms"):
+                     "transition_duration_ms", "frame_drop_policy",
+                     "render_fps", "render_thread"):
             if key in data:
                 setattr(config, key, data[key])
         logger.info("loaded config from %s", path)
@@ -0,0 +1,216 @@
+"""Delta encoding for monochrome animations such as Bad Apple!!.
+
+Each frame is reduced to a 1-bit mask. Every ``keyframe_interval``-th
+frame is stored whole as packed bits; the frames in between store only
+the runs of pixels that toggled since the previous frame, as
+(start, length) pairs over the flattened mask. Decoding a delta frame
+touches just the toggled pixels of a persistent framebuffer.
+"""
+from __future__ import annotations
+
+import logging
+from collections.abc import Iterable, Iterator, Sequence
+from pathlib import Path
+
+import numpy as np
+
+from protogen.framepack import ENCODING_DELTA, FramePack, write_payloads
+from protogen.frames import EMPTY_RECT, Frame, Rect, frame_to_array
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_KEYFRAME_INTERVAL = 30
+DEFAULT_THRESHOLD = 128
+
+
+def _run_dtype(width: int, height: int) -> np.dtype:
+    return np.dtype("<u2") if width * height <= 0xFFFF else np.dtype("<u4")
+
+
+def _toggle_runs(changed: np.ndarray) -> np.ndarray:
+    """Return (start, length) pairs for runs of True in a flat bool mask."""
+    edges = np.flatnonzero(np.diff(changed.astype(np.int8), prepend=0, append=0))
+    starts = edges[0::2]
+    return np.stack([starts, edges[1::2] - starts], axis=1)
+
+
+def encode_delta(
+    frames: Iterable[Frame],
+    width: int,
+    height: int,
+    keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL,
+    threshold: int = DEFAULT_THRESHOLD,
+) -> list[bytes]:
+    """Encode frames into per-frame delta payloads.
+
+    A pixel is "on" when its brightest channel reaches ``threshold``.
+    """
+    dtype = _run_dtype(width, height)
+    payloads: list[bytes] = []
+    prev: np.ndarray | None = None
+    for i, frame in enumerate(frames):
+        arr = frame_to_array(frame)
+        if arr.shape != (height, width, 3):
+            raise ValueError(f"frame {i} has shape {arr.shape}, expected {(height, width, 3)}")
+        mask = (arr.max(axis=2) >= threshold).ravel()
+        if prev is None or i % keyframe_interval == 0:
+            payloads.append(np.packbits(mask).tobytes())
+        else:
+            payloads.append(_toggle_runs(mask ^ prev).astype(dtype).tobytes())
+        prev = mask
+    return payloads
+
+
+def write_delta_pack(
+    path: str | Path,
+    frames: Iterable[Frame],
+    width: int,
+    height: int,
+    keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL,
+) -> int:
+    """Write a delta-encoded frame pack. Returns the number of frames."""
+    if not 1 <= keyframe_interval <= 255:
+        raise ValueError("keyframe_interval must be between 1 and 255")
+    payloads = encode_delta(frames, width, height, keyframe_interval)
+    write_payloads(path, ENCODING_DELTA, keyframe_interval, width, height, payloads)
+    return len(payloads)
+
+
+class DeltaFrameSequence(Sequence):
+    """Delta-encoded animation decoded into one persistent framebuffer.
+
+    Sequential access applies only the toggled runs of the next frame;
+    random access seeks to the nearest preceding keyframe. Items are
+    views of the shared framebuffer and are only valid until the next
+    access, which matches how AnimationEngine hands them straight to the
+    display. Frame 0 is kept as a separate copy so thumbnails and
+    transitions don't disturb playback.
+    """
+
+    def __init__(
+        self,
+        payloads: Sequence[bytes],
+        width: int,
+        height: int,
+        keyframe_interval: int,
+        color: tuple[int, int, int] = (255, 255, 255),
+    ) -> None:
+        if not payloads:
+            raise ValueError("delta animation has no frames")
+        self.width = width
+        self.height = height
+        self._count = len(payloads)
+        self._interval = keyframe_interval
+        key_bytes = (width * height + 7) // 8
+        dtype = _run_dtype(width, height)
+
+        key_idx = list(range(0, self._count, keyframe_interval))
+        self._keyframes = np.frombuffer(
+            b"".join(payloads[i] for i in key_idx), dtype=np.uint8,
+        ).reshape(len(key_idx), key_bytes)
+        run_counts = np.zeros(self._count, dtype=np.int64)
+        chunks = []
+        for i, data in enumerate(payloads):
+            if i % keyframe_interval:
+                chunks.append(data)
+                run_counts[i] = len(data) // (2 * dtype.itemsize)
+        self._runs = np.frombuffer(b"".join(chunks), dtype=dtype).reshape(-1, 2)
+        self._run_offsets = np.concatenate(([0], np.cumsum(run_counts)))
+
+        self._palette = np.array([(0, 0, 0), color], dtype=np.uint8)
+        self._mask = np.zeros(width * height, dtype=bool)
+        self._rgb = np.zeros((height, width, 3), dtype=np.uint8)
+        self._pixels = self._rgb.reshape(-1, 3)
+        self._pos = -1
+        self._seek(0)
+        self._first = self._rgb.copy()
+
+    @classmethod
+    def from_pack(
+        cls, pack: FramePack, color: tuple[int, int, int] = (255, 255, 255),
+    ) -> DeltaFrameSequence:
+        if pack.encoding != ENCODING_DELTA:
+            raise ValueError(f"not a delta frame pack: {pack.path}")
+        payloads = [pack.read_payload(i) for i in range(len(pack))]
+        return cls(payloads, pack.width, pack.height, pack.param, color)
+
+    @classmethod
+    def from_frames(
+        cls,
+        frames: Sequence[Frame],
+        width: int,
+        height: int,
+        keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL,
+        color: tuple[int, int, int] = (255, 255, 255),
+    ) -> DeltaFrameSequence:
+        payloads = encode_delta(frames, width, height, keyframe_interval)
+        return cls(payloads, width, height, keyframe_interval, color)
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the encoded stream held in memory."""
+        return self._keyframes.nbytes + self._runs.nbytes + self._run_offsets.nbytes
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        for i in range(self._count):
+            yield self[i]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i].copy() for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("frame index out of range")
+        if index == 0:
+            return self._first
+        if index == self._pos + 1 and index % self._interval:
+            self._apply_runs(index)
+        elif index != self._pos:
+            self._seek(index)
+        return self._rgb.view()
+
+    def dirty_rect(self, index: int) -> Rect | None:
+        """Rect of the pixels frame ``index`` toggles from frame ``index - 1``.
+
+        Read off the stored runs without decoding; None for keyframes.
+        """
+        if index % self._interval == 0:
+            return None
+        runs = self._runs[self._run_offsets[index]:self._run_offsets[index + 1]]
+        if not len(runs):
+            return EMPTY_RECT
+        starts = runs[:, 0].astype(np.intp)
+        ends = starts + runs[:, 1] - 1
+        top, bottom = starts // self.width, ends // self.width
+        if (top != bottom).any():
+            # A run wrapping onto the next row spans the full width
+            x0, x1 = 0, self.width
+        else:
+            x0, x1 = int((starts % self.width).min()), int((ends % self.width).max()) + 1
+        return x0, int(top.min()), x1, int(bottom.max()) + 1
+
+    def _seek(self, index: int) -> None:
+        key = index // self._interval
+        bits = np.unpackbits(self._keyframes[key], count=self._mask.size)
+        self._mask[:] = bits.view(bool)
+        np.take(self._palette, self._mask.view(np.uint8), axis=0, out=self._pixels)
+        for i in range(key * self._interval + 1, index + 1):
+            self._apply_runs(i)
+        self._pos = index
+
+    def _apply_runs(self, index: int) -> None:
+        runs = self._runs[self._run_offsets[index]:self._run_offsets[index + 1]]
+        if len(runs):
+            starts = runs[:, 0].astype(np.intp)
+            lengths = runs[:, 1].astype(np.intp)
+            # Expand (start, length) runs into flat pixel indices
+            idx = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+            idx += np.arange(len(idx))
+            toggled = ~self._mask[idx]
+            self._mask[idx] = toggled
+            self._pixels[idx] = self._palette[toggled.view(np.uint8)]
+        self._pos = index
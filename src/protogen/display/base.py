@@ -1,17 +1,63 @@
+import functools
 from abc import ABC, abstractmethod
 
+import numpy as np
 from PIL import Image
 
+from protogen.frames import IndexedFrame, Rect
+
+# Fixed-point unity gain: a gain is an integer number of 1/256 steps
+GAIN_ONE = 256
+
+
+def gain_steps(gain: float) -> int:
+    """Quantise a 0-1 gain to 1/256 steps."""
+    return max(0, min(GAIN_ONE, int(gain * GAIN_ONE)))
+
+
+@functools.lru_cache(maxsize=512)
+def intensity_lut(brightness: int, gain: int = GAIN_ONE) -> np.ndarray:
+    """(256,) uint8 LUT applying ``gain`` (1/256 steps), then brightness (0-100)."""
+    scaled = (np.arange(256) * gain) >> 8
+    lut = np.minimum(255, scaled * brightness // 100).astype(np.uint8)
+    lut.setflags(write=False)
+    return lut
+
 
 class DisplayBase(ABC):
     def __init__(self, width: int, height: int):
         self.width = width
         self.height = height
+        # Output gain in 1/256 steps, see set_gain
+        self.gain = GAIN_ONE
 
     @abstractmethod
     def show_image(self, image: Image.Image) -> None:
         """Push an image to the display."""
 
+    def show_array(
+        self, frame: np.ndarray, dirty: Rect | None = None, source: object = None
+    ) -> None:
+        """Push an (H, W, 3) uint8 array to the display.
+
+        Drivers that own a numpy framebuffer override this to copy the
+        array in directly instead of going through PIL. ``dirty`` bounds
+        the pixels that differ from the previous push of the same
+        ``source`` (None: any may); such drivers only need to rewrite
+        that rect, unless another source pushed in between.
+        """
+        self.show_image(Image.fromarray(frame, "RGB"))
+
+    def show_indexed(
+        self, frame: IndexedFrame, dirty: Rect | None = None, source: object = None
+    ) -> None:
+        """Push a palette-indexed frame to the display.
+
+        The default expands it to RGB; drivers with a colour LUT override
+        this to expand at framebuffer-write time.
+        """
+        self.show_array(frame.to_array(), dirty, source=source)
+
     @abstractmethod
     def clear(self) -> None:
         """Clear the display."""
@@ -19,3 +65,11 @@ class DisplayBase(ABC):
     @abstractmethod
     def set_brightness(self, value: int) -> None:
         """Set brightness (0-100)."""
+
+    def set_gain(self, gain: float) -> None:
+        """Scale frames pushed from now on by ``gain`` (0-1), on top of brightness.
+
+        Lets intensity-only effects (breathe) modulate output without
+        rewriting pixels. Drivers fold it into their brightness LUT.
+        """
+        self.gain = gain_steps(gain)
@@ -1,7 +1,8 @@
 import numpy as np
 from PIL import Image
 
-from protogen.display.base import DisplayBase
+from protogen.display.base import GAIN_ONE, DisplayBase, gain_steps, intensity_lut
+from protogen.frames import IndexedFrame, Rect, rect_is_empty, rect_slices
 
 
 class HUB75Display(DisplayBase):
@@ -24,33 +25,98 @@ class HUB75Display(DisplayBase):
             ),
         )
         self.brightness = 100
-        self._brightness_lut = np.arange(256, dtype=np.uint8)
-        self.last_image: Image.Image | None = None
+        self._brightness_lut = intensity_lut(100)
+        self._last_frame: np.ndarray | IndexedFrame | None = None
+        # True while the framebuffer holds the last frame at the current
+        # LUT, so a push only has to rewrite its dirty rect
+        self._synced = False
+        # Who pushed _last_frame; a dirty rect from anyone else is void
+        self._last_source: object = None
+        # Palette pre-multiplied by the brightness LUT, rebuilt when either changes
+        self._palette_lut: np.ndarray | None = None
+        self._palette_lut_src: np.ndarray | None = None
 
-    def _refresh(self) -> None:
-        """Re-render the current image to the framebuffer."""
-        if self.last_image is None:
+    def _lut_for_palette(self, palette: np.ndarray) -> np.ndarray:
+        if palette is not self._palette_lut_src or self._palette_lut is None:
+            self._palette_lut = np.take(self._brightness_lut, palette)
+            self._palette_lut_src = palette
+        return self._palette_lut
+
+    def _refresh(self, dirty: Rect | None = None) -> None:
+        """Re-render the current frame, or just its ``dirty`` rect, to the framebuffer."""
+        frame = self._last_frame
+        if frame is None:
+            return
+        if dirty is None or not self._synced:
+            region = (slice(None), slice(None))
+        elif rect_is_empty(dirty):
             return
-        arr = np.asarray(self.last_image, dtype=np.uint8)
-        if self.brightness < 100:
-            arr = self._brightness_lut[arr]
-        self._framebuffer[:] = arr
+        else:
+            region = rect_slices(dirty)
+        out = self._framebuffer[region]
+        if isinstance(frame, IndexedFrame):
+            # Palette and brightness expand together in a single gather
+            lut = self._lut_for_palette(frame.palette)
+            np.take(lut, frame.indices[region], axis=0, out=out)
+        elif self.brightness < 100 or self.gain < GAIN_ONE:
+            # Brightness and gain are one LUT, so this is a single gather
+            np.take(self._brightness_lut, frame[region], out=out)
+        else:
+            np.copyto(out, frame[region])
+        self._synced = True
         self._matrix.show()
 
     def show_image(self, image: Image.Image) -> None:
         if image.mode != "RGB" or image.size != (self.width, self.height):
             image = image.convert("RGB").resize((self.width, self.height))
-        self.last_image = image
-        self._refresh()
+        self.show_array(np.asarray(image, dtype=np.uint8))
+
+    def show_array(
+        self, frame: np.ndarray, dirty: Rect | None = None, source: object = None
+    ) -> None:
+        # Arrays (e.g. memmap views) go straight into the PioMatter
+        # framebuffer; only mismatched sizes take the PIL resize path.
+        if frame.shape != self._framebuffer.shape:
+            self.show_image(Image.fromarray(frame, "RGB"))
+            return
+        self._set_frame(frame, dirty, source)
+
+    def show_indexed(
+        self, frame: IndexedFrame, dirty: Rect | None = None, source: object = None
+    ) -> None:
+        if frame.indices.shape != self._framebuffer.shape[:2]:
+            self.show_array(frame.to_array())
+            return
+        self._set_frame(frame, dirty, source)
+
+    def _set_frame(
+        self, frame: np.ndarray | IndexedFrame, dirty: Rect | None, source: object
+    ) -> None:
+        if source is not self._last_source:
+            dirty = None
+        self._last_source = source
+        self._last_frame = frame
+        self._refresh(dirty)
 
     def clear(self) -> None:
+        # Forget the frame too: it may be a pool buffer the caller reuses
+        self._last_frame = None
         self._framebuffer[:] = 0
+        self._synced = False
         self._matrix.show()
 
     def set_brightness(self, value: int) -> None:
         self.brightness = max(0, min(100, value))
-        self._brightness_lut = np.array(
-            [min(255, i * self.brightness // 100) for i in range(256)],
-            dtype=np.uint8,
-        )
+        self._brightness_lut = intensity_lut(self.brightness, self.gain)
+        self._palette_lut = None
         self._refresh()
+
+    def set_gain(self, gain: float) -> None:
+        # Applies from the next push; no refresh of the current frame
+        steps = gain_steps(gain)
+        if steps != self.gain:
+            self.gain = steps
+            self._brightness_lut = intensity_lut(self.brightness, steps)
+            self._palette_lut = None
+            # Pixels outside the next dirty rect still carry the old gain
+            self._synced = False
@@ -3,7 +3,7 @@ import logging
 import numpy as np
 from PIL import Image
 
-from protogen.display.base import DisplayBase
+from protogen.display.base import GAIN_ONE, DisplayBase, gain_steps, intensity_lut
 
 logger = logging.getLogger(__name__)
 
@@ -17,7 +17,7 @@ class MockDisplay(DisplayBase):
         self.scale = scale
         logger.info("MockDisplay initialised (%dx%d, scale=%d)", width, height, scale)
         self.brightness = 100
-        self._brightness_lut = np.arange(256, dtype=np.uint8)
+        self._brightness_lut = intensity_lut(100)
         self.last_image: Image.Image | None = None
         self.use_pygame = use_pygame
         self._screen = None
@@ -34,7 +34,7 @@ class MockDisplay(DisplayBase):
             return
         import pygame
         arr = np.asarray(self.last_image, dtype=np.uint8)
-        if self.brightness < 100:
+        if self.brightness < 100 or self.gain < GAIN_ONE:
             arr = self._brightness_lut[arr]
         surface = pygame.surfarray.make_surface(np.transpose(arr, (1, 0, 2)))
         scaled = pygame.transform.scale(surface, (self.width * self.scale, self.height * self.scale))
@@ -53,13 +53,14 @@ class MockDisplay(DisplayBase):
     def set_brightness(self, value: int) -> None:
         self.brightness = max(0, min(100, value))
         logger.debug("brightness set to %d", self.brightness)
-        self._brightness_lut = np.array(
-            [min(255, i * self.brightness // 100) for i in range(256)],
-            dtype=np.uint8,
-        )
+        self._brightness_lut = intensity_lut(self.brightness, self.gain)
         if self.last_image is not None:
             self._render()
 
+    def set_gain(self, gain: float) -> None:
+        self.gain = gain_steps(gain)
+        self._brightness_lut = intensity_lut(self.brightness, self.gain)
+
     def pump_events(self) -> bool:
         """Process pygame events. Returns False if window was closed."""
         if not self.use_pygame or self._screen is None:
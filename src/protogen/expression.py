@@ -2,12 +2,21 @@ from __future__ import annotations
 
 import json
 import logging
+from collections.abc import Sequence
 from dataclasses import dataclass, field
 from enum import Enum
 from pathlib import Path
 
 from PIL import Image
 
+from protogen.delta import DeltaFrameSequence
+from protogen.framepack import ENCODING_DELTA, ENCODING_RAW, FramePack
+from protogen.frames import (
+    ArrayFrameSequence, Frame, IndexedFrame, LazyFrameSequence, frame_to_array,
+    load_indexed, png_loader,
+)
+from protogen.layers import BlendMode
+
 logger = logging.getLogger(__name__)
 
 
@@ -20,8 +29,8 @@ class ExpressionType(Enum):
 class Expression:
     name: str
     type: ExpressionType
-    image: Image.Image | None = None
-    frames: list[Image.Image] = field(default_factory=list)
+    image: Image.Image | IndexedFrame | None = None
+    frames: Sequence[Frame] = field(default_factory=list)
     fps: int = 12
     loop: bool = True
     idle_animation: str | None = None
@@ -52,7 +61,7 @@ def load_expressions(expressions_dir: str | Path) -> dict[str, Expression]:
             if not img_path.exists():
                 logger.warning("skipping invalid expression: %s", name)
                 continue
-            image = Image.open(img_path).convert("RGB")
+            image = load_indexed(img_path)
             result[name] = Expression(
                 name=name,
                 type=expr_type,
@@ -61,16 +70,10 @@ def load_expressions(expressions_dir: str | Path) -> dict[str, Expression]:
                 hidden=data.get("hidden", False),
             )
         elif expr_type == ExpressionType.ANIMATION:
-            frames_dir_name = data.get("frames_dir")
-            if frames_dir_name is None:
-                logger.warning("skipping invalid expression: %s", name)
-                continue
-            frames_dir = expressions_dir / frames_dir_name
-            if not frames_dir.exists():
+            frames = _load_animation_frames(expressions_dir, name, data)
+            if frames is None:
                 logger.warning("skipping invalid expression: %s", name)
                 continue
-            frame_files = sorted(frames_dir.glob("frame_*.png"))
-            frames = [Image.open(f).convert("RGB") for f in frame_files]
             result[name] = Expression(
                 name=name,
                 type=expr_type,
@@ -85,12 +88,70 @@ def load_expressions(expressions_dir: str | Path) -> dict[str, Expression]:
     return result
 
 
+def _load_animation_frames(
+    expressions_dir: Path, name: str, data: dict,
+) -> Sequence[Frame] | None:
+    """Open an animation's frames, preferring its frame pack over PNGs.
+
+    Raw packs are memory-mapped, delta packs are decoded incrementally,
+    and everything else is decoded on demand so boot time doesn't scale
+    with clip length. ``"encoding": "delta"`` in the manifest keeps a
+    monochrome animation delta-encoded in memory even when its source
+    is RGB. Returns None if no source is usable.
+    """
+    encoding = data.get("encoding", "rgb")
+    if encoding not in ("rgb", "delta"):
+        return None
+    color = tuple(data.get("color", (255, 255, 255)))
+
+    frames = None
+    pack_name = data.get("pack")
+    if pack_name is not None:
+        try:
+            pack = FramePack(expressions_dir / pack_name)
+            if pack.encoding == ENCODING_DELTA:
+                return DeltaFrameSequence.from_pack(pack, color)
+            if pack.encoding == ENCODING_RAW:
+                frames = ArrayFrameSequence(pack.as_array())
+            else:
+                frames = LazyFrameSequence(len(pack), pack.read_array)
+        except (OSError, ValueError) as exc:
+            logger.warning("cannot open frame pack for %s, using frames_dir: %s", name, exc)
+
+    if frames is None:
+        frames_dir_name = data.get("frames_dir")
+        if frames_dir_name is None:
+            return None
+        frames_dir = expressions_dir / frames_dir_name
+        if not frames_dir.exists():
+            return None
+        frame_files = sorted(frames_dir.glob("frame_*.png"))
+        frames = LazyFrameSequence(len(frame_files), png_loader(frame_files))
+
+    if encoding == "delta" and frames:
+        # Slow path: every frame is decoded once at boot. A delta pack
+        # from scripts/build_framepack.py --delta avoids this.
+        logger.info("delta-encoding %s at load time (%d frames)", name, len(frames))
+        height, width = frame_to_array(frames[0]).shape[:2]
+        try:
+            return DeltaFrameSequence.from_frames(frames, width, height, color=color)
+        except ValueError as exc:
+            logger.warning("cannot delta-encode %s: %s", name, exc)
+            return None
+    return frames
+
+
 @dataclass
 class Effect:
     name: str
     generator_name: str
     generator_params: dict = field(default_factory=dict)
     fps: int = 20
+    offload: bool = False
+    bake: bool = False
+    # Blend over the layers below when stacked; None for the default
+    blend: BlendMode | None = None
+    opacity: float = 1.0
 
 
 def load_effects(expressions_dir: str | Path) -> dict[str, Effect]:
@@ -106,5 +167,9 @@ def load_effects(expressions_dir: str | Path) -> dict[str, Effect]:
             generator_name=data["generator"],
             generator_params=data.get("params", {}),
             fps=data.get("fps", 20),
+            offload=data.get("offload", False),
+            bake=data.get("bake", False),
+            blend=BlendMode(data["blend"]) if "blend" in data else None,
+            opacity=data.get("opacity", 1.0),
         )
     return result
@@ -4,13 +4,14 @@ import asyncio
 import logging
 
 import numpy as np
-from PIL import Image
 
 from protogen.animation import AnimationEngine
 from protogen.blink_controller import BlinkController
 from protogen.display.base import DisplayBase
 from protogen.expression import Expression, ExpressionType
 from protogen.expression_store import ExpressionStore
+from protogen.frame_clock import DropPolicy
+from protogen.frames import Frame, frame_to_array, mask_rect, show_frame
 
 logger = logging.getLogger(__name__)
 
@@ -23,11 +24,12 @@ class ExpressionManager:
         blink_interval_min: float = 3.0,
         blink_interval_max: float = 6.0,
         transition_duration_ms: int = 0,
+        drop_policy: DropPolicy = DropPolicy.DROP,
     ) -> None:
         self._display = display
         self._store = store
         self.current_name: str | None = None
-        self._animation = AnimationEngine(display)
+        self._animation = AnimationEngine(display, drop_policy)
         self._animation_task: asyncio.Task | None = None
         self._transition_duration_ms = transition_duration_ms
         self._blink = BlinkController(
@@ -70,8 +72,8 @@ class ExpressionManager:
 
     async def _play_transition(
         self,
-        old_frame: Image.Image,
-        new_frame: Image.Image,
+        old_frame: Frame,
+        new_frame: Frame,
         target_expr: Expression,
     ) -> None:
         fps = 20
@@ -79,25 +81,35 @@ class ExpressionManager:
         total_frames = max(1, int(duration_s * fps))
         interval = 1.0 / fps
 
-        old_arr = np.array(old_frame.convert("RGB"), dtype=np.float32)
-        new_arr = np.array(new_frame.convert("RGB"), dtype=np.float32)
+        old_arr = frame_to_array(old_frame).astype(np.float32)
+        new_arr = frame_to_array(new_frame).astype(np.float32)
         diff = new_arr - old_arr
+        # Every blend differs from the one before only where the two faces do
+        dirty = mask_rect(diff.any(axis=2))
         blend_buf = np.empty_like(old_arr)
+        # A pipeline lends out frame buffers and releases each blend
+        # once the next one replaces it
+        pool = getattr(self._display, "frame_pool", None)
+        if pool is not None and pool.shape != blend_buf.shape:
+            pool = None
 
         for i in range(1, total_frames + 1):
             alpha = i / total_frames
             np.multiply(diff, alpha, out=blend_buf)
             np.add(old_arr, blend_buf, out=blend_buf)
-            self._display.show_image(
-                Image.fromarray(blend_buf.astype(np.uint8), "RGB")
-            )
+            if pool is not None:
+                frame = pool.acquire()
+            else:
+                frame = np.empty(blend_buf.shape, dtype=np.uint8)
+            np.copyto(frame, blend_buf, casting="unsafe")
+            self._display.show_array(frame, dirty, source=self)
             await asyncio.sleep(interval)
 
         self._show_expression(target_expr)
 
     def _show_expression(self, expr: Expression) -> None:
         if expr.type == ExpressionType.STATIC and expr.image:
-            self._display.show_image(expr.image)
+            show_frame(self._display, expr.image, source=self)
         elif expr.type == ExpressionType.ANIMATION and expr.frames:
             self._animation_task = asyncio.create_task(
                 self._animation.play(expr.frames, fps=expr.fps, loop=expr.loop)
@@ -3,9 +3,8 @@ from __future__ import annotations
 import io
 import logging
 
-from PIL import Image
-
 from protogen.expression import Expression, ExpressionType
+from protogen.frames import frame_to_image
 
 logger = logging.getLogger(__name__)
 
@@ -47,5 +46,5 @@ class ExpressionStore:
             return None
 
         buf = io.BytesIO()
-        img.save(buf, format="PNG")
+        frame_to_image(img).save(buf, format="PNG")
         return buf.getvalue()
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import math
+import time
+from dataclasses import dataclass
+from enum import Enum
+from typing import Callable
+
+
+class DropPolicy(Enum):
+    """What a FrameClock does when it falls behind its deadlines."""
+
+    # Skip ahead to the frame that is due now, keeping playback in sync
+    # with wall-clock time.
+    DROP = "drop"
+    # Present every frame without sleeping until the schedule is met
+    # again; playback stretches while overloaded, then recovers.
+    CATCH_UP = "catch_up"
+
+
+@dataclass
+class FrameStats:
+    presented: int = 0
+    late: int = 0
+    dropped: int = 0
+
+
+class FrameClock:
+    """Deadline-based frame scheduler on the monotonic clock.
+
+    Frame ``n`` is due at ``start + n / fps``. Deadlines are absolute,
+    so time spent rendering and event-loop jitter don't accumulate the
+    way a fixed ``sleep(1 / fps)`` after every frame does.
+    """
+
+    def __init__(
+        self,
+        fps: float,
+        policy: DropPolicy = DropPolicy.DROP,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.interval = 1.0 / fps
+        self.policy = policy
+        self._clock = clock
+        self._start = 0.0
+        self.frame = 0
+        self.stats = FrameStats()
+
+    def start(self, now: float | None = None) -> None:
+        """Reset to frame 0, due at ``now``."""
+        self._start = self._clock() if now is None else now
+        self.frame = 0
+        self.stats = FrameStats()
+
+    def deadline(self, frame: int) -> float:
+        return self._start + frame * self.interval
+
+    def advance(self, now: float | None = None) -> float:
+        """Mark the current frame presented and move to the next one.
+
+        Returns the seconds to wait before presenting the next frame;
+        zero when it is already due. Under ``DropPolicy.DROP`` frames
+        whose slot has fully passed are skipped and counted as dropped.
+        """
+        if now is None:
+            now = self._clock()
+        self.stats.presented += 1
+        self.frame += 1
+        delay = self.deadline(self.frame) - now
+        if delay >= 0:
+            return delay
+        self.stats.late += 1
+        if self.policy is DropPolicy.DROP:
+            due = math.floor((now - self._start) / self.interval)
+            if due > self.frame:
+                self.stats.dropped += due - self.frame
+                self.frame = due
+        return 0.0
@@ -0,0 +1,76 @@
+"""Pool of preallocated (H, W, 3) uint8 frame buffers.
+
+Rendering a frame into a fresh array every tick makes the garbage
+collector run in bursts, which shows up on the panel as stutter. A
+:class:`FramePool` hands out buffers that are written in place through
+``out=`` parameters and returned when no longer referenced, so steady
+state rendering allocates nothing.
+"""
+from __future__ import annotations
+
+import logging
+from collections import deque
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class FramePool:
+    """Free list of same-shaped uint8 frame buffers.
+
+    :meth:`acquire` takes the buffer that has been free longest and
+    allocates a new one only when the pool is empty; :meth:`release`
+    returns a buffer for reuse. Buffers released last are reused last,
+    so a frame that was just replaced stays intact for a few more
+    acquires. Acquire and release may be called from different threads.
+
+    Each buffer counts its acquires (:meth:`leases`): a user that finds
+    the count one past what it saw on its own last acquire knows nobody
+    else wrote the buffer in between, and can reuse its contents.
+    """
+
+    def __init__(self, shape: tuple[int, ...], count: int = 4) -> None:
+        self.shape = tuple(shape)
+        self._free: deque[np.ndarray] = deque()
+        # id -> times acquired; also the set of buffers this pool made
+        self._leases: dict[int, int] = {}
+        for _ in range(count):
+            self._free.append(self._allocate())
+
+    def _allocate(self) -> np.ndarray:
+        buf = np.zeros(self.shape, dtype=np.uint8)
+        self._leases[id(buf)] = 0
+        return buf
+
+    @property
+    def allocated(self) -> int:
+        """Buffers created over the pool's lifetime."""
+        return len(self._leases)
+
+    @property
+    def available(self) -> int:
+        return len(self._free)
+
+    def owns(self, frame: object) -> bool:
+        return isinstance(frame, np.ndarray) and id(frame) in self._leases
+
+    def leases(self, frame: np.ndarray) -> int:
+        """How many times ``frame`` has been acquired."""
+        return self._leases[id(frame)]
+
+    def acquire(self) -> np.ndarray:
+        """Return a free buffer; its contents are whatever was last written."""
+        try:
+            buf = self._free.popleft()
+        except IndexError:
+            buf = self._allocate()
+            logger.debug("frame pool grew to %d buffers", self.allocated)
+        self._leases[id(buf)] += 1
+        return buf
+
+    def release(self, frame: np.ndarray) -> None:
+        """Return ``frame`` to the pool; the caller must not touch it again."""
+        if not self.owns(frame):
+            raise ValueError("frame was not acquired from this pool")
+        self._free.append(frame)
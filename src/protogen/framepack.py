@@ -0,0 +1,165 @@
+"""Single-file frame packs for animations.
+
+Layout (little-endian)::
+
+    header   16 bytes   magic "PGFP", version, encoding, param, width, height, count
+    index    count * 12 bytes   (offset u64, length u32) per frame
+    frames   frame payloads: RGB888 rows, raw or zlib-compressed, or
+             1-bit delta records (see :mod:`protogen.delta`)
+
+One file replaces a directory of ``frame_*.png``, so playback costs a
+slice of an mmap (plus an optional zlib inflate) instead of a file open
+and a PNG decode per frame. Raw packs store frames back to back and can
+be mapped whole with :meth:`FramePack.as_array`.
+"""
+from __future__ import annotations
+
+import mmap
+import struct
+import zlib
+from collections.abc import Iterable
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+MAGIC = b"PGFP"
+VERSION = 1
+
+ENCODING_RAW = 0
+ENCODING_ZLIB = 1
+ENCODING_DELTA = 2
+ENCODINGS = {"raw": ENCODING_RAW, "zlib": ENCODING_ZLIB, "delta": ENCODING_DELTA}
+
+_HEADER = struct.Struct("<4sHBBHHI")
+_INDEX_DTYPE = np.dtype([("offset", "<u8"), ("length", "<u4")])
+
+
+def write_framepack(
+    path: str | Path,
+    frames: Iterable[Image.Image | np.ndarray],
+    width: int,
+    height: int,
+    encoding: str = "zlib",
+) -> int:
+    """Write RGB frames to a pack file. Returns the number of frames written.
+
+    ``encoding`` is "raw" or "zlib"; delta packs are written by
+    :func:`protogen.delta.write_delta_pack`.
+    """
+    code = ENCODINGS[encoding]
+    if code == ENCODING_DELTA:
+        raise ValueError("use protogen.delta.write_delta_pack for delta packs")
+    payloads: list[bytes] = []
+    for frame in frames:
+        arr = np.asarray(frame, dtype=np.uint8)
+        if arr.shape != (height, width, 3):
+            raise ValueError(
+                f"frame {len(payloads)} has shape {arr.shape}, "
+                f"expected {(height, width, 3)}"
+            )
+        data = arr.tobytes()
+        if code == ENCODING_ZLIB:
+            data = zlib.compress(data, 9)
+        payloads.append(data)
+    write_payloads(path, code, 0, width, height, payloads)
+    return len(payloads)
+
+
+def write_payloads(
+    path: str | Path,
+    encoding: int,
+    param: int,
+    width: int,
+    height: int,
+    payloads: list[bytes],
+) -> None:
+    """Write already-encoded frame payloads with header and index."""
+    count = len(payloads)
+    index = np.zeros(count, dtype=_INDEX_DTYPE)
+    offset = _HEADER.size + _INDEX_DTYPE.itemsize * count
+    for i, data in enumerate(payloads):
+        index[i] = (offset, len(data))
+        offset += len(data)
+
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, encoding, param, width, height, count))
+        f.write(index.tobytes())
+        for data in payloads:
+            f.write(data)
+
+
+class FramePack:
+    """Read-only view of a frame pack file.
+
+    The file is memory-mapped, so random access to any frame is a slice
+    and reads are safe from the prefetch thread.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                raise ValueError(f"truncated frame pack: {self.path}")
+            magic, version, encoding, param, width, height, count = _HEADER.unpack(header)
+            if magic != MAGIC:
+                raise ValueError(f"not a frame pack: {self.path}")
+            if version != VERSION:
+                raise ValueError(f"unsupported frame pack version {version}: {self.path}")
+            if encoding not in ENCODINGS.values():
+                raise ValueError(f"unknown frame pack encoding {encoding}: {self.path}")
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.width = width
+        self.height = height
+        self.encoding = encoding
+        self.param = param
+        self._count = count
+        self._index = np.frombuffer(
+            self._mmap, dtype=_INDEX_DTYPE, count=count, offset=_HEADER.size,
+        )
+        end = self._index["offset"].astype(np.int64) + self._index["length"]
+        if count and int(end.max()) > len(self._mmap):
+            raise ValueError(f"truncated frame pack: {self.path}")
+
+    def __len__(self) -> int:
+        return self._count
+
+    def read_payload(self, index: int) -> bytes:
+        """Return the stored bytes of frame ``index`` without decoding."""
+        offset = int(self._index["offset"][index])
+        length = int(self._index["length"][index])
+        return self._mmap[offset:offset + length]
+
+    def read_array(self, index: int) -> np.ndarray:
+        """Return frame ``index`` as an (H, W, 3) uint8 array."""
+        if self.encoding == ENCODING_DELTA:
+            raise ValueError(f"delta frame pack needs DeltaFrameSequence: {self.path}")
+        data = self.read_payload(index)
+        if self.encoding == ENCODING_ZLIB:
+            data = zlib.decompress(data)
+        return np.frombuffer(data, dtype=np.uint8).reshape(self.height, self.width, 3)
+
+    def as_array(self) -> np.ndarray:
+        """Map a raw pack's frames as one (N, H, W, 3) uint8 array.
+
+        Indexing the result yields zero-copy views backed by the page
+        cache, so long clips cost no resident memory beyond what is
+        currently being played.
+        """
+        if self.encoding != ENCODING_RAW:
+            raise ValueError(f"frame pack is compressed, cannot memory-map: {self.path}")
+        frame_size = self.width * self.height * 3
+        shape = (self._count, self.height, self.width, 3)
+        if self._count == 0:
+            return np.zeros(shape, dtype=np.uint8)
+        offsets = self._index["offset"].astype(np.int64)
+        start = int(offsets[0])
+        contiguous = np.array_equal(offsets - start, np.arange(self._count) * frame_size)
+        if not contiguous or not np.all(self._index["length"] == frame_size):
+            raise ValueError(f"raw frame pack is not contiguous: {self.path}")
+        return np.memmap(self.path, dtype=np.uint8, mode="r", offset=start, shape=shape)
+
+    def read_frame(self, index: int) -> Image.Image:
+        """Return frame ``index`` as an RGB image."""
+        return Image.fromarray(self.read_array(index), "RGB")
@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import logging
+from collections.abc import Callable, Iterator, Sequence
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PREFETCH = 16
+
+
+@dataclass(eq=False)
+class IndexedFrame:
+    """Palette-indexed frame: (H, W) uint8 indices into a (K, 3) palette.
+
+    A third of the size of RGB, and recolouring only swaps the palette.
+    Displays expand it through a LUT at push time.
+    """
+
+    indices: np.ndarray
+    palette: np.ndarray
+
+    @classmethod
+    def from_array(cls, arr: np.ndarray, max_colors: int = 256) -> IndexedFrame | None:
+        """Index an (H, W, 3) uint8 array, or None if it has too many colours."""
+        flat = arr.reshape(-1, 3).astype(np.uint32)
+        keys = (flat[:, 0] << 16) | (flat[:, 1] << 8) | flat[:, 2]
+        colors, inverse = np.unique(keys, return_inverse=True)
+        if len(colors) > max_colors:
+            return None
+        palette = np.stack(
+            [colors >> 16, (colors >> 8) & 0xFF, colors & 0xFF], axis=1,
+        ).astype(np.uint8)
+        return cls(inverse.astype(np.uint8).reshape(arr.shape[:2]), palette)
+
+    @property
+    def size(self) -> tuple[int, int]:
+        """(width, height), matching ``PIL.Image.size``."""
+        return self.indices.shape[1], self.indices.shape[0]
+
+    def with_palette(self, palette: np.ndarray) -> IndexedFrame:
+        """Return a recoloured frame sharing these indices."""
+        return IndexedFrame(self.indices, np.asarray(palette, dtype=np.uint8))
+
+    def to_array(self) -> np.ndarray:
+        return np.take(self.palette, self.indices, axis=0)
+
+
+# A displayable frame: a PIL image, an (H, W, 3) uint8 array, or an
+# indexed frame.
+Frame = Image.Image | np.ndarray | IndexedFrame
+
+# Pixel rectangle (x0, y0, x1, y1), end-exclusive. Where a rect says what
+# changed since the previous frame ("dirty"), None means anything may
+# have changed.
+Rect = tuple[int, int, int, int]
+EMPTY_RECT: Rect = (0, 0, 0, 0)
+
+
+def rect_is_empty(rect: Rect | None) -> bool:
+    return rect is not None and (rect[0] >= rect[2] or rect[1] >= rect[3])
+
+
+def union_rect(a: Rect | None, b: Rect | None) -> Rect | None:
+    """Smallest rect covering both; None (everything) absorbs."""
+    if a is None or b is None:
+        return None
+    if rect_is_empty(a):
+        return b
+    if rect_is_empty(b):
+        return a
+    return min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])
+
+
+def rect_slices(rect: Rect) -> tuple[slice, slice]:
+    """(rows, cols) slices selecting ``rect`` from an (H, W, ...) array."""
+    return slice(rect[1], rect[3]), slice(rect[0], rect[2])
+
+
+def mask_rect(mask: np.ndarray) -> Rect:
+    """Bounding rect of the True pixels of an (H, W) mask."""
+    rows = np.flatnonzero(mask.any(axis=1))
+    if not len(rows):
+        return EMPTY_RECT
+    cols = np.flatnonzero(mask.any(axis=0))
+    return int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[-1]) + 1
+
+
+def diff_rect(a: Frame, b: Frame) -> Rect | None:
+    """Bounding rect of the pixels that differ, or None if the sizes do."""
+    if (
+        isinstance(a, IndexedFrame) and isinstance(b, IndexedFrame)
+        and np.array_equal(a.palette, b.palette)
+    ):
+        # Same palette: comparing indices is a third of the work
+        if a.indices.shape != b.indices.shape:
+            return None
+        return mask_rect(a.indices != b.indices)
+    a, b = frame_to_array(a), frame_to_array(b)
+    if a.shape != b.shape:
+        return None
+    return mask_rect((a != b).any(axis=2))
+
+
+_prefetch_executor: ThreadPoolExecutor | None = None
+
+
+def _get_prefetch_executor() -> ThreadPoolExecutor:
+    """Return the shared background decoder, creating it on first use."""
+    global _prefetch_executor
+    if _prefetch_executor is None:
+        _prefetch_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="frame-prefetch",
+        )
+    return _prefetch_executor
+
+
+def frame_to_array(frame: Frame) -> np.ndarray:
+    """Return ``frame`` as (H, W, 3) uint8; arrays are returned as-is."""
+    if isinstance(frame, np.ndarray):
+        return frame
+    if isinstance(frame, IndexedFrame):
+        return frame.to_array()
+    if frame.mode != "RGB":
+        frame = frame.convert("RGB")
+    return np.asarray(frame, dtype=np.uint8)
+
+
+def frame_to_image(frame: Frame) -> Image.Image:
+    """Return ``frame`` as an RGB PIL image."""
+    if isinstance(frame, Image.Image):
+        return frame
+    return Image.fromarray(frame_to_array(frame), "RGB")
+
+
+def show_frame(
+    display, frame: Frame, dirty: Rect | None = None, source: object = None
+) -> None:
+    """Push ``frame`` to a display or pipeline through its native path.
+
+    ``dirty`` bounds what changed since the frame ``source`` pushed
+    before it; PIL images are always pushed whole.
+    """
+    if isinstance(frame, IndexedFrame):
+        display.show_indexed(frame, dirty, source=source)
+    elif isinstance(frame, np.ndarray):
+        display.show_array(frame, dirty, source=source)
+    else:
+        display.show_image(frame)
+
+
+def load_indexed(path: Path) -> Frame:
+    """Decode a PNG, indexed when it uses at most 256 colours."""
+    with Image.open(path) as img:
+        rgb = img.convert("RGB")
+    return IndexedFrame.from_array(np.asarray(rgb)) or rgb
+
+
+def png_loader(paths: Sequence[Path]) -> Callable[[int], Frame]:
+    """Build a loader that decodes ``paths[index]`` via :func:`load_indexed`."""
+    def load(index: int) -> Frame:
+        return load_indexed(paths[index])
+    return load
+
+
+class LazyFrameSequence(Sequence):
+    """Animation frames decoded on demand.
+
+    Accessing frame ``i`` decodes it if needed, queues the next
+    ``prefetch`` frames (wrapping around for looping animations) on a
+    background thread, and evicts everything outside that window.
+    Frame 0 is kept resident since it doubles as the thumbnail and
+    transition target. Short animations that fit inside the window
+    therefore end up fully cached after their first play.
+
+    Cache bookkeeping only happens on the calling thread; the worker
+    thread just runs ``load``.
+    """
+
+    def __init__(
+        self,
+        count: int,
+        load: Callable[[int], Frame],
+        prefetch: int = DEFAULT_PREFETCH,
+    ) -> None:
+        self._count = count
+        self._load = load
+        self._prefetch = max(0, prefetch)
+        self._cache: dict[int, Frame | Future] = {}
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[Frame]:
+        for i in range(self._count):
+            yield self[i]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("frame index out of range")
+
+        entry = self._cache.get(index)
+        if isinstance(entry, Future):
+            entry = entry.result()
+        elif entry is None:
+            entry = self._load(index)
+        self._cache[index] = entry
+        self._advance(index)
+        return entry
+
+    def _window(self, index: int) -> set[int]:
+        ahead = min(self._prefetch, self._count - 1)
+        return {0} | {(index + k) % self._count for k in range(ahead + 1)}
+
+    def _advance(self, index: int) -> None:
+        """Evict frames behind the playhead and prefetch the ones ahead."""
+        window = self._window(index)
+        for i in [i for i in self._cache if i not in window]:
+            entry = self._cache.pop(i)
+            if isinstance(entry, Future):
+                entry.cancel()
+        if len(window) == len(self._cache):
+            return
+        executor = _get_prefetch_executor()
+        for i in sorted(window, key=lambda i: (i - index) % self._count):
+            if i not in self._cache:
+                self._cache[i] = executor.submit(self._load, i)
+
+    @property
+    def cached_count(self) -> int:
+        """Number of frames currently decoded or being decoded."""
+        return len(self._cache)
+
+
+class ArrayFrameSequence(Sequence):
+    """Animation frames backed by one (N, H, W, 3) array, e.g. a memmap.
+
+    Items are zero-copy (H, W, 3) views into the array.
+    """
+
+    def __init__(self, frames: np.ndarray) -> None:
+        self._frames = frames
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        return iter(self._frames)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self._frames[index])
+        return self._frames[index]
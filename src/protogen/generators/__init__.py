@@ -1,9 +1,14 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
+from collections.abc import Hashable
+from functools import cached_property
 
+import numpy as np
 from PIL import Image
 
+from protogen.frames import Rect
+
 
 class ProceduralGenerator(ABC):
     """Base class for procedural expression generators."""
@@ -14,6 +19,25 @@ class ProceduralGenerator(ABC):
         self.width = width
         self.height = height
         self.params = params
+        # Bumped whenever render(t) may change for the same t
+        self.generation = 0
+
+    @property
+    def period(self) -> float | None:
+        """Seconds after which render(t) repeats, or None if it doesn't.
+
+        Periodic generators can be baked into a LoopCache.
+        """
+        return None
+
+    @property
+    def ink_bounds(self) -> Rect | None:
+        """Rect (x0, y0, x1, y1) outside which every frame is black, or None.
+
+        Bounds what can change between two frames, so the pipeline
+        recomposites and repushes only that part.
+        """
+        return None
 
     def update_params(self, params: dict) -> None:
         """Update generator parameters in-place.
@@ -23,6 +47,7 @@ class ProceduralGenerator(ABC):
         via the _param_attrs class variable.
         """
         self.params.update(params)
+        self.generation += 1
         for param_name, attr_name in self._param_attrs.items():
             if param_name in params:
                 setattr(self, attr_name, params[param_name])
@@ -35,17 +60,115 @@ class ProceduralGenerator(ABC):
             RGB image of size (width, height).
         """
 
+    def render_into(self, t: float, out: np.ndarray) -> None:
+        """Render the frame at ``t`` into ``out``, a C-contiguous (H, W, 3) uint8 array.
+
+        Generators that keep a numpy framebuffer override this to write
+        straight into ``out`` instead of building an image.
+        """
+        np.copyto(out, np.asarray(self.render(t)))
+
+    def frame_key(self, t: float) -> Hashable | None:
+        """Cheap fingerprint of the frame at ``t``, or None if unknown.
+
+        Equal keys promise identical frames, which lets the pipeline skip
+        rendering and compositing. Generators whose frame is a pure
+        function of ``t`` return what they quantise ``t`` to, together
+        with ``generation``; stateful generators keep the default.
+        """
+        return None
+
+    def close(self) -> None:
+        """Release resources (worker processes, shared memory) when replaced."""
+
+
+class FrameAnalysis:
+    """Arrays derived from one base frame, each computed on first use.
+
+    Subclass-specific arrays built by :meth:`FrameEffect.prepare` go in
+    ``derived``.
+    """
+
+    def __init__(self, frame: Image.Image) -> None:
+        self.frame = frame
+        self.derived: dict[str, np.ndarray] = {}
+
+    @cached_property
+    def array(self) -> np.ndarray:
+        """(H, W, 3) uint8 RGB, read-only."""
+        if self.frame.mode != "RGB":
+            return np.asarray(self.frame.convert("RGB"))
+        return np.asarray(self.frame)
+
+    @cached_property
+    def channel_max(self) -> np.ndarray:
+        """(H, W) uint8 brightest channel per pixel."""
+        arr = self.array
+        return np.maximum(np.maximum(arr[:, :, 0], arr[:, :, 1]), arr[:, :, 2])
+
+    @cached_property
+    def mask(self) -> np.ndarray:
+        """(H, W) bool, True for non-black pixels."""
+        return self.channel_max > 0
+
+    @cached_property
+    def lit(self) -> bool:
+        """Whether any pixel is non-black."""
+        return bool(self.channel_max.any())
+
+    @cached_property
+    def hsv(self) -> np.ndarray:
+        """(H, W, 3) uint8 in Pillow's HSV mode."""
+        return np.asarray(self.frame.convert("HSV"))
+
 
 class FrameEffect(ProceduralGenerator):
-    """Effect that transforms the base expression frame."""
+    """Effect that transforms the base expression frame.
+
+    Base frames change far less often than effects tick, so anything an
+    effect derives from the frame alone is computed once per frame:
+    subclasses list the :class:`FrameAnalysis` properties they use in
+    ``_analysis_fields`` and may override :meth:`prepare` for their own
+    arrays. ``set_base_frame`` runs both; :meth:`analysis` returns the
+    cached result inside ``apply``.
+    """
+
+    _analysis_fields: tuple[str, ...] = ()
 
     def __init__(self, width: int, height: int, params: dict) -> None:
         super().__init__(width, height, params)
         self._base_frame: Image.Image = Image.new("RGB", (width, height))
+        self._analysis: FrameAnalysis | None = None
 
     def set_base_frame(self, frame: Image.Image) -> None:
         """Update the base frame used by this effect."""
         self._base_frame = frame
+        self._analyse(frame)
+        self.generation += 1
+
+    def prepare(self, analysis: FrameAnalysis) -> None:
+        """Hook: store per-frame arrays in ``analysis.derived``."""
+
+    def gain(self, t: float) -> float | None:
+        """Hook: the brightness gain at ``t`` if the effect only scales the frame.
+
+        When this returns a number the pipeline skips ``apply`` and has
+        the display fold the gain into its output LUT instead.
+        """
+        return None
+
+    def analysis(self, frame: Image.Image) -> FrameAnalysis:
+        """Return the cached analysis of ``frame``, computing it if new."""
+        if self._analysis is None or self._analysis.frame is not frame:
+            self._analyse(frame)
+        return self._analysis
+
+    def _analyse(self, frame: Image.Image) -> None:
+        analysis = FrameAnalysis(frame)
+        for name in self._analysis_fields:
+            getattr(analysis, name)
+        self.prepare(analysis)
+        self._analysis = analysis
 
     @abstractmethod
     def apply(self, frame: Image.Image, t: float) -> Image.Image:
@@ -5,24 +5,46 @@ import math
 import numpy as np
 from PIL import Image
 
-from protogen.generators import FrameEffect
+from protogen.generators import FrameAnalysis, FrameEffect
 
 
 class BreatheEffect(FrameEffect):
-    """Pulsing brightness effect — makes the expression breathe."""
+    """Pulsing brightness effect — makes the expression breathe.
+
+    In the render pipeline breathe is only a :meth:`gain`, applied by the
+    display's brightness LUT as the frame is pushed. Standalone,
+    :meth:`apply` widens the base frame to uint16 once per base frame,
+    so a tick is one in-place fixed-point multiply and shift.
+    """
 
     _param_attrs = {"period": "_period", "amplitude": "_amplitude"}
+    _analysis_fields = ("lit",)
 
     def __init__(self, width: int, height: int, params: dict) -> None:
         super().__init__(width, height, params)
         self._period = params.get("period", 3.0)
         self._amplitude = params.get("amplitude", 0.5)
+        self._wide = np.empty((height, width, 3), dtype=np.uint16)
+        self._rgb = np.empty((height, width, 3), dtype=np.uint8)
+
+    @property
+    def period(self) -> float | None:
+        return self._period
+
+    def prepare(self, analysis: FrameAnalysis) -> None:
+        analysis.derived["wide"] = analysis.array.astype(np.uint16)
+
+    def gain(self, t: float) -> float:
+        # Oscillates between (1 - amplitude) and 1.0
+        return 1.0 - self._amplitude * (1.0 - math.sin(2 * math.pi * t / self._period)) / 2.0
 
     def apply(self, frame: Image.Image, t: float) -> Image.Image:
-        # factor oscillates between (1 - amplitude) and 1.0
-        factor = 1.0 - self._amplitude * (1.0 - math.sin(2 * math.pi * t / self._period)) / 2.0
         # Fixed-point: scale factor to 0-256 range for uint16 multiply + shift
-        factor_int = int(factor * 256)
-        arr = np.asarray(frame, dtype=np.uint8)
-        result = (arr.astype(np.uint16) * factor_int >> 8).astype(np.uint8)
-        return Image.fromarray(result, "RGB")
+        factor_int = int(self.gain(t) * 256)
+        analysis = self.analysis(frame)
+        if not analysis.lit:
+            return frame
+        np.multiply(analysis.derived["wide"], factor_int, out=self._wide)
+        self._wide >>= 8
+        np.copyto(self._rgb, self._wide, casting="unsafe")
+        return Image.fromarray(self._rgb, "RGB")
@@ -3,32 +3,60 @@ from __future__ import annotations
 import numpy as np
 from PIL import Image
 
-from protogen.generators import FrameEffect
+from protogen.generators import FrameAnalysis, FrameEffect
+from protogen.generators.palette import PALETTE_SIZE, hue_shade_table
 
 _SPEED_FACTOR = 60 * 255 / 360
 
+# Pillow's HSV hue runs 0-255 per turn. Row (b, h) of the table is
+# round(b * wheel(h)); it is repeated along h so a rotated hue is
+# just a larger offset into it.
+_HUE_STEPS = 2 * PALETTE_SIZE
+
+
+def _rotation_table() -> np.ndarray:
+    shades = hue_shade_table(255).reshape(256, PALETTE_SIZE, 3)
+    return np.concatenate([shades, shades], axis=1).reshape(-1, 3)
+
 
 class ColorShiftEffect(FrameEffect):
-    """Rotates the hue of non-black pixels over time."""
+    """Rotates the hue of non-black pixels over time.
+
+    A pixel with hue h, saturation s and value v is
+    ``v * (1 - s) + v * s * wheel(h)`` per channel. The base frame is
+    decomposed into the constant part and a table index once per base
+    frame (:meth:`prepare`); each frame
+    then adds the hue offset to the index, gathers, and adds the
+    constant part back.
+    """
 
     _param_attrs = {"speed": "_speed"}
+    _analysis_fields = ("hsv", "lit")
 
     def __init__(self, width: int, height: int, params: dict) -> None:
         super().__init__(width, height, params)
         self._speed = params.get("speed", 1.0)
+        self._table = _rotation_table()
+        self._shifted = np.empty((height, width), dtype=np.intp)
+        self._rgb = np.empty((height, width, 3), dtype=np.uint8)
+
+    def prepare(self, analysis: FrameAnalysis) -> None:
+        hsv = analysis.hsv
+        h = hsv[:, :, 0]
+        s = hsv[:, :, 1].astype(np.uint16)
+        v = hsv[:, :, 2].astype(np.uint16)
+        chroma = (v * s + 127) // 255
+        analysis.derived["floor"] = (v - chroma).astype(np.uint8)[:, :, None]
+        analysis.derived["hue_index"] = chroma.astype(np.intp) * _HUE_STEPS + h
 
     def apply(self, frame: Image.Image, t: float) -> Image.Image:
-        # Zero-copy view to check for non-black pixels
-        rgb_view = np.asarray(frame)
-        mask = rgb_view.max(axis=2) > 0
-        if not mask.any():
+        analysis = self.analysis(frame)
+        if not analysis.lit:
             return frame
 
-        hsv = frame.convert("HSV")
-        arr = np.array(hsv)
-
         # Pillow HSV: H is 0-255 (mapped from 0-360)
         offset = int((t * self._speed * _SPEED_FACTOR) % 256) & 0xFF
-        arr[:, :, 0][mask] = (arr[:, :, 0][mask].astype(np.uint16) + offset).astype(np.uint8)
-
-        return Image.fromarray(arr, "HSV").convert("RGB")
+        np.add(analysis.derived["hue_index"], offset, out=self._shifted)
+        np.take(self._table, self._shifted, axis=0, out=self._rgb)
+        self._rgb += analysis.derived["floor"]
+        return Image.fromarray(self._rgb, "RGB")
@@ -1,15 +1,46 @@
 from __future__ import annotations
 
-import random
+from dataclasses import dataclass
 
 import numpy as np
 from PIL import Image
 
-from protogen.generators import FrameEffect
+from protogen.generators import FrameAnalysis, FrameEffect
+
+# Distortion steps drawn at a time; burst frames consume them in order
+# and a new batch is drawn when they run out
+SCHEDULE_STEPS = 256
+# Most colour blocks in one step
+MAX_BLOCKS = 3
+
+
+@dataclass(frozen=True)
+class _Schedule:
+    """A batch of burst-frame distortions, one row per step."""
+
+    starts: np.ndarray  # (steps, H) row's start column in the doubled frame
+    channel: np.ndarray  # (steps,) channel to roll
+    roll: np.ndarray  # (steps,) roll of that channel, 0 for none
+    block_count: np.ndarray  # (steps,)
+    blocks: np.ndarray  # (steps, MAX_BLOCKS, 4) x, y, w, h
+    colors: np.ndarray  # (steps, MAX_BLOCKS, 3)
+
+
+def _ints(u: np.ndarray, low, high) -> np.ndarray:
+    """Map uniform ``u`` in [0, 1) to integers in [low, high], each equally likely."""
+    # Floor, not truncation toward zero, for ranges below zero
+    return np.floor(low + u * (np.asarray(high) - low + 1)).astype(np.intp)
 
 
 class GlitchEffect(FrameEffect):
-    """Random glitch distortions — row shifts, channel offsets, color blocks."""
+    """Random glitch distortions — row shifts, channel offsets, color blocks.
+
+    The distortions of many burst frames are drawn ahead in one
+    vectorised call to a numpy ``Generator``; pass ``seed`` for a
+    reproducible sequence. Each base frame is stored once side by side
+    with itself, so a shifted row is a single slice copy out of it into
+    a reused buffer instead of an ``np.roll``.
+    """
 
     _param_attrs = {"intensity": "_intensity"}
 
@@ -17,7 +48,54 @@ class GlitchEffect(FrameEffect):
         super().__init__(width, height, params)
         self._intensity = params.get("intensity", 0.3)
         self._burst_end = 0.0
-        self._rng = random.Random()
+        self._rng = np.random.default_rng(params.get("seed"))
+        self._schedule: _Schedule | None = None
+        self._step = 0
+        self._rgb = np.empty((height, width, 3), dtype=np.uint8)
+        self._channel = np.empty((height, width * 2), dtype=np.uint8)
+
+    def prepare(self, analysis: FrameAnalysis) -> None:
+        analysis.derived["doubled"] = np.concatenate([analysis.array] * 2, axis=1)
+
+    def _draw_schedule(self) -> _Schedule:
+        """Draw the next SCHEDULE_STEPS burst frames in one call."""
+        w, h = self.width, self.height
+        max_rows = max(1, h // 4)
+        u = self._rng.random((SCHEDULE_STEPS, 2 * max_rows + 6 + 7 * MAX_BLOCKS))
+        fields = iter(np.hsplit(u, np.cumsum([max_rows, max_rows, 1, 1, 1, 1, 1, 1])))
+
+        # Row displacement: 1..h // 4 random rows per step, each shifted
+        # by up to a third of the width
+        rows = _ints(next(fields), 0, h - 1)
+        shifts = _ints(next(fields), -(w // 3), w // 3)
+        shifts[np.arange(max_rows) >= _ints(next(fields), 1, max_rows)] = 0
+        # A row picked twice is rolled twice
+        row_shifts = np.zeros((SCHEDULE_STEPS, h), dtype=np.intp)
+        np.add.at(row_shifts, (np.arange(SCHEDULE_STEPS)[:, None], rows), shifts)
+
+        # RGB channel offset (50% chance): one channel rolled by -5..5
+        chan_on = next(fields)[:, 0] < 0.5
+        channel = _ints(next(fields)[:, 0], 0, 2)
+        chan_shift = _ints(next(fields)[:, 0], -5, 5) % w
+
+        # Random color blocks (30% chance of 1..MAX_BLOCKS)
+        block_on = next(fields)[:, 0] < 0.3
+        block_count = np.where(block_on, _ints(next(fields)[:, 0], 1, MAX_BLOCKS), 0)
+        bu = next(fields).reshape(SCHEDULE_STEPS, MAX_BLOCKS, 7)
+        bx = _ints(bu[..., 0], 0, max(0, w - 4))
+        by = _ints(bu[..., 1], 0, max(0, h - 2))
+        bw = _ints(bu[..., 2], 3, np.minimum(20, w - bx))
+        bh = _ints(bu[..., 3], 1, np.minimum(4, h - by))
+        colors = _ints(bu[..., 4:], 0, 255)
+
+        return _Schedule(
+            starts=(-row_shifts) % w,
+            channel=channel,
+            roll=np.where(chan_on, chan_shift, 0),
+            block_count=block_count,
+            blocks=np.stack([bx, by, bw, bh], axis=2),
+            colors=colors.astype(np.uint8),
+        )
 
     def apply(self, frame: Image.Image, t: float) -> Image.Image:
         # Decide whether to trigger a new burst
@@ -28,31 +106,33 @@ class GlitchEffect(FrameEffect):
                 # No burst — return frame directly (upstream doesn't modify it)
                 return frame
 
-        arr = np.array(frame)
-        rng = self._rng
-
-        # Row displacement
-        num_rows = rng.randint(1, max(1, self.height // 4))
-        for _ in range(num_rows):
-            y = rng.randint(0, self.height - 1)
-            shift = rng.randint(-self.width // 3, self.width // 3)
-            arr[y] = np.roll(arr[y], shift, axis=0)
-
-        # RGB channel offset (50% chance)
-        if rng.random() < 0.5:
-            channel = rng.randint(0, 2)
-            shift = rng.randint(-5, 5)
-            arr[:, :, channel] = np.roll(arr[:, :, channel], shift, axis=1)
-
-        # Random color blocks (30% chance)
-        if rng.random() < 0.3:
-            num_blocks = rng.randint(1, 3)
-            for _ in range(num_blocks):
-                bx = rng.randint(0, self.width - 4)
-                by = rng.randint(0, self.height - 2)
-                bw = rng.randint(3, min(20, self.width - bx))
-                bh = rng.randint(1, min(4, self.height - by))
-                color = [rng.randint(0, 255) for _ in range(3)]
-                arr[by:by + bh, bx:bx + bw] = color
-
-        return Image.fromarray(arr, "RGB")
+        k = self._step % SCHEDULE_STEPS
+        if k == 0:
+            self._schedule = self._draw_schedule()
+        self._step += 1
+        schedule = self._schedule
+        analysis = self.analysis(frame)
+        doubled = analysis.derived["doubled"]
+        rgb = self._rgb
+        w = self.width
+
+        np.copyto(rgb, analysis.array)
+        starts = schedule.starts[k]
+        rows = np.flatnonzero(starts)
+        for y, start in zip(rows.tolist(), starts[rows].tolist()):
+            rgb[y] = doubled[y, start:start + w]
+
+        roll = int(schedule.roll[k])
+        if roll:
+            c = int(schedule.channel[k])
+            self._channel[:, :w] = rgb[:, :, c]
+            self._channel[:, w:] = rgb[:, :, c]
+            rgb[:, :, c] = self._channel[:, w - roll:2 * w - roll]
+
+        count = schedule.block_count[k]
+        for (x, y, bw, bh), color in zip(
+            schedule.blocks[k, :count].tolist(), schedule.colors[k, :count],
+        ):
+            rgb[y:y + bh, x:x + bw] = color
+
+        return Image.fromarray(rgb, "RGB")
@@ -0,0 +1,79 @@
+"""Bake periodic generators into a loop of frames.
+
+A generator that reports a ``period`` renders the same frames every
+cycle. :class:`LoopCache` quantises one cycle into ``round(period * fps)``
+slots and fills each slot the first time playback reaches it, so there
+is no start-up stall; after one full cycle every frame is a lookup. The
+cache resets when the generator's ``generation`` changes (parameter
+updates, new text, a new base frame).
+"""
+from __future__ import annotations
+
+import logging
+
+import numpy as np
+from PIL import Image
+
+from protogen.generators import ProceduralGenerator
+
+logger = logging.getLogger(__name__)
+
+# Cycles that would need more than this are rendered live instead
+MAX_BAKE_BYTES = 16 * 1024 * 1024
+
+
+class LoopCache:
+    """One cycle of a periodic generator's frames as an (N, H, W, 3) array."""
+
+    def __init__(self, fps: int, max_bytes: int = MAX_BAKE_BYTES) -> None:
+        self._fps = fps
+        self._max_bytes = max_bytes
+        self._key: tuple[int, float | None] | None = None
+        self._frames: np.ndarray | None = None
+        # One view per slot, so a replayed frame is the same object
+        self._views: list[np.ndarray] = []
+        self._filled: np.ndarray | None = None
+        self._remaining = 0
+
+    @property
+    def complete(self) -> bool:
+        """True once every frame of the current cycle is baked."""
+        return self._frames is not None and self._remaining == 0
+
+    def render(self, gen: ProceduralGenerator, t: float) -> Image.Image | np.ndarray:
+        """Return ``gen``'s frame at ``t``, from the cache when possible."""
+        period = gen.period
+        key = (gen.generation, period)
+        if key != self._key:
+            self._reset(gen, period)
+            self._key = key
+        if self._frames is None:
+            return gen.render(t)
+        n = len(self._frames)
+        i = int(t / period * n) % n
+        if not self._filled[i]:
+            self._frames[i] = np.asarray(gen.render(i * period / n), dtype=np.uint8)
+            self._filled[i] = True
+            self._remaining -= 1
+            if not self._remaining:
+                logger.debug("baked %d frames of %s", n, type(gen).__name__)
+        return self._views[i]
+
+    def _reset(self, gen: ProceduralGenerator, period: float | None) -> None:
+        self._frames = None
+        self._views = []
+        self._filled = None
+        if period is None or period <= 0:
+            return
+        n = max(1, round(period * self._fps))
+        if n * gen.width * gen.height * 3 > self._max_bytes:
+            logger.info(
+                "%s cycle is %d frames, too long to bake; rendering live",
+                type(gen).__name__, n,
+            )
+            return
+        # np.zeros pages are only committed as slots get filled
+        self._frames = np.zeros((n, gen.height, gen.width, 3), dtype=np.uint8)
+        self._views = list(self._frames)
+        self._filled = np.zeros(n, dtype=bool)
+        self._remaining = n
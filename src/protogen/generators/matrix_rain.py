@@ -25,20 +25,27 @@ class MatrixRainGenerator(ProceduralGenerator):
         self._drops = rng.uniform(-height, 0, self._num_cols).astype(np.float32)
         self._last_t = 0.0
         self._rng = rng
-        # Reusable framebuffer
+        # Reusable framebuffer for render()
         self._framebuf = np.zeros((height, width, 3), dtype=np.uint8)
+        self._rows = np.arange(height, dtype=np.int32)[:, None]
+        self._seg = np.empty((height, self._num_cols), dtype=np.int32)
         # Pre-compute trail fade colors (index 0 = head = white, 1..trail_len-1 = fading)
         self._trail_len = 6
         self._trail_colors = self._build_trail_colors()
 
     def _build_trail_colors(self) -> np.ndarray:
-        """Pre-compute trail colors as uint8 array (trail_len, 3)."""
-        trail = np.zeros((self._trail_len, 3), dtype=np.uint8)
+        """Pre-compute trail colors as uint8 array (trail_len + 1, col_w * 3).
+
+        Each row is one color repeated across a column's width. The extra
+        last row stays black and paints cells outside any trail.
+        """
+        trail = np.zeros((self._trail_len + 1, 3), dtype=np.uint8)
         trail[0] = (255, 255, 255)  # head: bright white
         for j in range(1, self._trail_len):
             fade = max(0.0, 1.0 - j / self._trail_len)
             trail[j] = (self._color * fade).astype(np.uint8)
-        return trail
+        # One column-wide run per color so a cell row is a single gather
+        return np.tile(trail, (1, self._col_w))
 
     def update_params(self, params: dict) -> None:
         super().update_params(params)
@@ -47,37 +54,46 @@ class MatrixRainGenerator(ProceduralGenerator):
             self._trail_colors = self._build_trail_colors()
 
     def render(self, t: float) -> Image.Image:
+        self.render_into(t, self._framebuf)
+        return Image.fromarray(self._framebuf, "RGB")
+
+    def render_into(self, t: float, out: np.ndarray) -> None:
         dt = t - self._last_t if self._last_t > 0 else 1.0 / 30
         self._last_t = t
 
-        # Clear framebuffer
-        self._framebuf[:] = 0
-
         # Vectorized drop advance
         self._drops += self._speed * dt * 30
 
-        fb = self._framebuf
-        col_w = self._col_w
         cell_h = self._cell_h
         trail_len = self._trail_len
         wrap = self.height + cell_h * trail_len
-        trail_colors = self._trail_colors
-        h = self.height
 
-        for i in range(self._num_cols):
-            head_y = int(self._drops[i]) % wrap
-            x0 = i * col_w
-            x1 = x0 + col_w
-
-            for j in range(trail_len):
-                y = head_y - j * cell_h
-                if 0 <= y < h:
-                    y1 = min(y + cell_h, h)
-                    fb[y:y1, x0:x1] = trail_colors[j]
-
-            # Reset drop when it goes off screen
-            if head_y > wrap:
-                if self._rng.random() < self._density:
-                    self._drops[i] = self._rng.uniform(-cell_h * 4, 0)
-
-        return Image.fromarray(self._framebuf, "RGB")
+        # Drops that completed a pass wrap back to the top; with
+        # probability `density` a column restarts at a fresh random
+        # offset instead (one batched draw for all columns). Keeping
+        # drops within one pass also keeps float32 precision over
+        # long runs.
+        done = self._drops >= wrap
+        if done.any():
+            self._drops[done] -= wrap
+            restart = done & (self._rng.random(self._num_cols) < self._density)
+            self._drops[restart] = self._rng.uniform(-cell_h * 4, 0, int(restart.sum()))
+
+        # Trail segment of every (row, column) cell: segment j covers
+        # rows [head - j * cell_h, head - j * cell_h + cell_h)
+        heads = self._drops.astype(np.int32) % wrap
+        np.subtract(heads, self._rows, out=self._seg)
+        self._seg += cell_h - 1
+        self._seg //= cell_h
+        # Segments starting above the top edge are not drawn, and anything
+        # outside the trail maps to the black entry
+        limit = np.minimum(heads // cell_h + 1, trail_len)
+        self._seg[(self._seg < 0) | (self._seg >= limit)] = trail_len
+
+        # Paint every column in one gather, viewing ``out`` as one
+        # (col_w * 3)-byte run per character cell row; any leftover
+        # width stays black
+        used = self._num_cols * self._col_w
+        cells = out[:, :used].reshape(self.height, self._num_cols, self._col_w * 3)
+        np.take(self._trail_colors, self._seg, axis=0, out=cells)
+        out[:, used:] = 0
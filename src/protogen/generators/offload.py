@@ -0,0 +1,325 @@
+"""Run a procedural generator in a worker process.
+
+The worker renders frames ahead of the playhead into a ring of slots in
+``multiprocessing.shared_memory``; the wrapper on the render side only
+copies the latest ready slot. Heavy numpy work (plasma's sine passes,
+rainbow sweep's HSV conversion) then runs on another core instead of
+holding the GIL on the loop that drives the display.
+
+Shared block layout::
+
+    header   int64[3 + 3 * ring]  playhead, base generation, stride,
+                                  slot frame numbers, slot generations,
+                                  base generation each slot was rendered on
+    slots    ring * (H, W, 3) uint8
+    base     (H, W, 3) uint8      base frame for wrapped FrameEffects
+
+Slots and the base frame are seqlocks: the writer makes the generation
+odd, copies the pixels, then makes it even again, and a reader accepts
+its copy only if the generation was even before and unchanged after.
+Generations are read and written under a shared lock, whose acquire
+and release order them against the unlocked pixel copies; plain numpy
+stores alone may become visible out of order (on aarch64, say).
+
+The stride is how many frame numbers apart the render side samples
+(see :meth:`OffloadedGenerator.set_rate`): the worker only renders
+frame numbers on that grid, so a throttled layer also costs its
+worker less.
+"""
+from __future__ import annotations
+
+import logging
+import multiprocessing as mp
+import queue
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+from PIL import Image
+
+from protogen.generators import FrameEffect, ProceduralGenerator
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RING = 4
+
+_PLAYHEAD = 0
+_BASE_GEN = 1
+_STRIDE = 2
+_SLOTS = 3
+_HEADER_ALIGN = 64
+
+
+def _layout(width: int, height: int, ring: int) -> tuple[int, int, int]:
+    """Return (header bytes, frame bytes, total bytes) of the shared block."""
+    header = -(-(_SLOTS + 3 * ring) * 8 // _HEADER_ALIGN) * _HEADER_ALIGN
+    frame = width * height * 3
+    return header, frame, header + frame * (ring + 1)
+
+
+def _views(buf, width: int, height: int, ring: int):
+    header_size, frame_size, _ = _layout(width, height, ring)
+    header = np.ndarray(_SLOTS + 3 * ring, dtype=np.int64, buffer=buf)
+    slots = np.ndarray(
+        (ring, height, width, 3), dtype=np.uint8, buffer=buf, offset=header_size,
+    )
+    base = np.ndarray(
+        (height, width, 3), dtype=np.uint8, buffer=buf,
+        offset=header_size + frame_size * ring,
+    )
+    return header, slots, base
+
+
+def _worker(
+    gen_cls: type[ProceduralGenerator],
+    width: int,
+    height: int,
+    params: dict,
+    fps: int,
+    ring: int,
+    shm_name: str,
+    updates: mp.Queue,
+    stop: mp.Event,
+    lock: mp.Lock,
+) -> None:
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        _render_ahead(gen_cls(width, height, params), fps, ring, shm, updates, stop, lock)
+    finally:
+        shm.close()
+
+
+def _reap(process: mp.Process) -> None:
+    """Wait for a stopped worker, killing it if it doesn't exit."""
+    process.join(timeout=2.0)
+    if process.is_alive():
+        process.terminate()
+        process.join()
+
+
+def _render_ahead(
+    gen: ProceduralGenerator,
+    fps: int,
+    ring: int,
+    shm: shared_memory.SharedMemory,
+    updates: mp.Queue,
+    stop: mp.Event,
+    lock: mp.Lock,
+) -> None:
+    header, slots, base = _views(shm.buf, gen.width, gen.height, ring)
+    seqs = header[_SLOTS:_SLOTS + ring]
+    gens = header[_SLOTS + ring:_SLOTS + 2 * ring]
+    bases = header[_SLOTS + 2 * ring:]
+    base_gen = 0
+    while not stop.is_set():
+        stale = False
+        try:
+            while True:
+                gen.update_params(updates.get_nowait())
+                stale = True
+        except queue.Empty:
+            pass
+        if isinstance(gen, FrameEffect):
+            with lock:
+                gen_now = int(header[_BASE_GEN])
+            if gen_now != base_gen and not gen_now & 1:
+                frame = base.copy()
+                with lock:
+                    unchanged = int(header[_BASE_GEN]) == gen_now
+                if unchanged:
+                    gen.set_base_frame(Image.fromarray(frame, "RGB"))
+                    base_gen = gen_now
+                    stale = True
+        if stale:
+            with lock:
+                seqs[:] = -1
+
+        # Frames are rendered only at multiples of the stride, from the
+        # newest one at or before the playhead
+        stride = max(1, int(header[_STRIDE]))
+        first = int(header[_PLAYHEAD]) // stride
+        for n in range(first, first + ring):
+            k = n * stride
+            slot = n % ring
+            if seqs[slot] != k:
+                break
+        else:
+            stop.wait(0.25 * stride / fps)
+            continue
+        frame = np.asarray(gen.render(k / fps), dtype=np.uint8)
+        with lock:
+            gens[slot] += 1
+            seqs[slot] = k
+            bases[slot] = base_gen
+        slots[slot] = frame
+        with lock:
+            gens[slot] += 1
+
+
+class OffloadedGenerator(ProceduralGenerator):
+    """Proxy that renders ``gen_cls`` in a worker process.
+
+    ``render(t)`` returns the frame for ``int(t * fps)`` when the worker
+    has it ready, otherwise the newest earlier frame. A spawned worker
+    takes a second or two to start, so until its first frame lands an
+    in-process instance renders instead; for a frame effect that is
+    also the case after every new base frame, until the worker has
+    rendered on it. Parameter updates are forwarded to the worker.
+    Call :meth:`close` to stop the worker and free the shared memory.
+    """
+
+    def __init__(
+        self,
+        gen_cls: type[ProceduralGenerator],
+        width: int,
+        height: int,
+        params: dict,
+        fps: int = 20,
+        ring: int = DEFAULT_RING,
+    ) -> None:
+        super().__init__(width, height, params)
+        self.gen_cls = gen_cls
+        self._fps = fps
+        self._ring = ring
+        self._frame = np.zeros((height, width, 3), dtype=np.uint8)
+        # Slots are read into the spare and swapped in once validated
+        self._spare = np.empty_like(self._frame)
+        # Frame number of _frame, -1 while there is none for the current base
+        self._frame_seq = -1
+        # Renders in-process while _frame_seq is -1
+        self._local: ProceduralGenerator | None = gen_cls(width, height, dict(params))
+
+        _, _, size = _layout(width, height, ring)
+        self._shm = shared_memory.SharedMemory(create=True, size=size)
+        self._header, self._slots, self._base = _views(self._shm.buf, width, height, ring)
+        self._header[:] = 0
+        self._seqs = self._header[_SLOTS:_SLOTS + ring]
+        self._gens = self._header[_SLOTS + ring:_SLOTS + 2 * ring]
+        self._bases = self._header[_SLOTS + 2 * ring:]
+        self._seqs[:] = -1
+        self._header[_STRIDE] = 1
+        # Joins the worker after close() without blocking the caller
+        self._reaper: threading.Thread | None = None
+
+        ctx = mp.get_context("spawn")
+        self._updates = ctx.Queue()
+        self._stop = ctx.Event()
+        self._lock = ctx.Lock()
+        self._process = ctx.Process(
+            target=_worker,
+            args=(gen_cls, width, height, dict(params), fps, ring,
+                  self._shm.name, self._updates, self._stop, self._lock),
+            name=f"gen-{gen_cls.__name__}",
+            daemon=True,
+        )
+        self._process.start()
+        logger.info("offloaded %s to pid %d", gen_cls.__name__, self._process.pid)
+
+    def set_rate(self, fps: float) -> None:
+        """Tell the worker ``render`` is sampled ``fps`` times a second.
+
+        It then renders ahead only the frames that will be asked for.
+        """
+        if self._shm is not None:
+            self._header[_STRIDE] = max(1, round(self._fps / fps))
+
+    def update_params(self, params: dict) -> None:
+        super().update_params(params)
+        self._updates.put(dict(params))
+        if self._local is not None:
+            self._local.update_params(params)
+
+    def render(self, t: float) -> Image.Image:
+        self._fetch(t)
+        if self._frame_seq < 0:
+            return self._local.render(t)
+        return Image.fromarray(self._frame, "RGB")
+
+    def render_into(self, t: float, out: np.ndarray) -> None:
+        self._fetch(t)
+        if self._frame_seq < 0:
+            self._local.render_into(t, out)
+        else:
+            np.copyto(out, self._frame)
+
+    def _fetch(self, t: float) -> None:
+        """Make ``_frame`` the newest ready frame at or before ``t``.
+
+        Only frames rendered on the current base frame qualify. A plain
+        generator drops its in-process instance once the worker has
+        delivered.
+        """
+        k = int(t * self._fps)
+        self._header[_PLAYHEAD] = k
+        base_gen = int(self._header[_BASE_GEN])
+        with self._lock:
+            seqs = self._seqs.tolist()
+            gens = self._gens.tolist()
+            bases = self._bases.tolist()
+        best = -1
+        for slot, (seq, gen, base) in enumerate(zip(seqs, gens, bases)):
+            if gen & 1 or base != base_gen:
+                continue
+            if self._frame_seq < seq <= k and seq > best:
+                best, best_slot, best_gen = seq, slot, gen
+        if best >= 0:
+            np.copyto(self._spare, self._slots[best_slot])
+            # Keep it only if the worker didn't start rewriting the slot
+            with self._lock:
+                unchanged = self._gens[best_slot] == best_gen
+            if unchanged:
+                self._frame, self._spare = self._spare, self._frame
+                self._frame_seq = best
+                if self._local is not None and not isinstance(self, FrameEffect):
+                    self._local.close()
+                    self._local = None
+
+    def close(self) -> None:
+        if self._local is not None:
+            self._local.close()
+            self._local = None
+        if self._shm is None:
+            return
+        self._stop.set()
+        # The worker may be mid-render; wait for it off the caller's thread
+        self._reaper = threading.Thread(
+            target=_reap, args=(self._process,),
+            name=f"reap-{self.gen_cls.__name__}", daemon=True,
+        )
+        self._reaper.start()
+        self._updates.close()
+        del self._header, self._slots, self._base, self._seqs, self._gens, self._bases
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
+
+
+class OffloadedFrameEffect(OffloadedGenerator, FrameEffect):
+    """Offloaded FrameEffect; base frames are shared with the worker."""
+
+    def set_base_frame(self, frame: Image.Image) -> None:
+        super().set_base_frame(frame)
+        self._local.set_base_frame(frame)
+        # Odd generation marks a write in progress
+        with self._lock:
+            self._header[_BASE_GEN] += 1
+        self._base[:] = np.asarray(frame.convert("RGB"), dtype=np.uint8)
+        with self._lock:
+            self._header[_BASE_GEN] += 1
+        # Frames on the old base are stale; render locally until a new one lands
+        self._frame_seq = -1
+
+    def apply(self, frame: Image.Image, t: float) -> Image.Image:
+        return OffloadedGenerator.render(self, t)
+
+
+def offload(
+    gen_cls: type[ProceduralGenerator],
+    width: int,
+    height: int,
+    params: dict,
+    fps: int = 20,
+) -> OffloadedGenerator:
+    """Wrap ``gen_cls`` in the matching offloaded proxy."""
+    cls = OffloadedFrameEffect if issubclass(gen_cls, FrameEffect) else OffloadedGenerator
+    return cls(gen_cls, width, height, params, fps)
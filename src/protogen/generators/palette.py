@@ -0,0 +1,126 @@
+"""Precomputed 256-entry colour palettes for generators.
+
+A palette is a read-only (256, 3) uint8 array. Generators compute a
+scalar field of palette indices and map it to RGB with one gather
+(:func:`apply_palette`), so colour math happens once per palette
+instead of once per pixel per frame.
+
+Palettes come from a name in :data:`NAMED_PALETTES` or from a list of
+colour stops in the manifest params (see :func:`get_palette`). Cyclic
+palettes (the hue wheel) can be rotated, which is how hue animation
+works without touching pixels.
+"""
+from __future__ import annotations
+
+import functools
+import logging
+from collections.abc import Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+PALETTE_SIZE = 256
+DEFAULT_PALETTE = "cyan"
+
+
+def _freeze(palette: np.ndarray) -> np.ndarray:
+    palette.setflags(write=False)
+    return palette
+
+
+def _hue_components(steps_per_turn: float) -> np.ndarray:
+    """(256, 3) float RGB in [0, 1] of fully saturated hue ``i / steps_per_turn``."""
+    h = (np.arange(PALETTE_SIZE, dtype=np.float64) * (6.0 / steps_per_turn)) % 6.0
+    r = np.clip(np.abs(h - 3) - 1, 0, 1)
+    g = np.clip(2 - np.abs(h - 2), 0, 1)
+    b = np.clip(2 - np.abs(h - 4), 0, 1)
+    return np.stack([r, g, b], axis=1)
+
+
+def hue_wheel() -> np.ndarray:
+    """Fully saturated hues, red at index 0, one turn over the palette."""
+    return np.round(_hue_components(PALETTE_SIZE) * 255).astype(np.uint8)
+
+
+def gradient(stops: Sequence[Sequence[int]]) -> np.ndarray:
+    """Linear gradient through evenly spaced RGB ``stops``."""
+    colors = np.asarray(stops, dtype=np.float32).reshape(-1, 3)
+    if len(colors) == 1:
+        colors = np.stack([np.zeros(3, dtype=np.float32), colors[0]])
+    pos = np.linspace(0, len(colors) - 1, PALETTE_SIZE)
+    channels = [np.interp(pos, np.arange(len(colors)), colors[:, c]) for c in range(3)]
+    return np.round(np.stack(channels, axis=1)).clip(0, 255).astype(np.uint8)
+
+
+NAMED_PALETTES = {
+    "rainbow": hue_wheel,
+    "cyan": lambda: gradient([(0, 0, 0), (25, 204, 255)]),
+    "fire": lambda: gradient([(0, 0, 0), (180, 20, 0), (255, 140, 0), (255, 255, 160)]),
+    "ice": lambda: gradient([(0, 0, 0), (0, 60, 160), (80, 200, 255), (255, 255, 255)]),
+    "toxic": lambda: gradient([(0, 0, 0), (0, 120, 20), (160, 255, 0)]),
+}
+
+# Palettes whose last entry runs back into the first
+CYCLIC_PALETTES = frozenset({"rainbow"})
+
+
+@functools.lru_cache(maxsize=None)
+def _named(name: str) -> np.ndarray:
+    return _freeze(NAMED_PALETTES[name]())
+
+
+def get_palette(spec: str | Sequence[Sequence[int]] | None) -> np.ndarray:
+    """Resolve a palette name or a list of colour stops.
+
+    Unknown names fall back to :data:`DEFAULT_PALETTE` with a warning.
+    """
+    if spec is None:
+        return _named(DEFAULT_PALETTE)
+    if isinstance(spec, str):
+        if spec not in NAMED_PALETTES:
+            logger.warning("unknown palette %r, using %s", spec, DEFAULT_PALETTE)
+            spec = DEFAULT_PALETTE
+        return _named(spec)
+    return _freeze(gradient(spec))
+
+
+def is_cyclic(spec: str | Sequence[Sequence[int]] | None) -> bool:
+    return isinstance(spec, str) and spec in CYCLIC_PALETTES
+
+
+def rotate(palette: np.ndarray, shift: int) -> np.ndarray:
+    """Return ``palette`` with entry ``i`` moved to ``i - shift`` (hue rotation)."""
+    return np.roll(palette, -shift, axis=0)
+
+
+def shade_table(palette: np.ndarray) -> np.ndarray:
+    """(256 * 256, 3) table: row ``(v << 8) | i`` is ``palette[i] * v / 255``.
+
+    Lets a per-pixel brightness ``v`` and palette index ``i`` become RGB
+    in one gather instead of a multiply and divide per channel.
+    """
+    return _shade(palette.astype(np.float64) / 255)
+
+
+def _shade(components: np.ndarray) -> np.ndarray:
+    levels = np.arange(256, dtype=np.float64)[:, None, None]
+    shaded = np.round(levels * components[None, :, :])
+    return _freeze(shaded.astype(np.uint8).reshape(-1, 3))
+
+
+@functools.lru_cache(maxsize=None)
+def hue_shade_table(steps_per_turn: float = PALETTE_SIZE) -> np.ndarray:
+    """:func:`shade_table` of the hue wheel, shared by hue effects.
+
+    ``steps_per_turn`` = 255 matches Pillow's HSV mode, where hue 255
+    is a full turn.
+    """
+    return _shade(_hue_components(steps_per_turn))
+
+
+def apply_palette(
+    indices: np.ndarray, palette: np.ndarray, out: np.ndarray | None = None,
+) -> np.ndarray:
+    """Map an index field to RGB: ``out[...] = palette[indices]``."""
+    return np.take(palette, indices, axis=0, out=out)
@@ -4,58 +4,105 @@ import numpy as np
 from PIL import Image
 
 from protogen.generators import ProceduralGenerator
+from protogen.generators.palette import PALETTE_SIZE, apply_palette, get_palette, is_cyclic
+
+# Sine table: SINE_SIZE steps per turn, values in [-32, 31] so four
+# summed waves plus 128 always index the 256-entry palette.
+SINE_SIZE = 1024
+SINE_MASK = SINE_SIZE - 1
+SINE_LUT = np.clip(
+    np.round(np.sin(np.arange(SINE_SIZE) * (2 * np.pi / SINE_SIZE)) * 32), -32, 31,
+).astype(np.int16)
+# Two turns back to back: SINE_LUT rotated by k is the view [k:k + SINE_SIZE]
+_SINE_LUT2 = np.concatenate([SINE_LUT, SINE_LUT])
+
+# Time multiplier of each wave
+_WAVE_SPEEDS = (1.0, 0.7, 1.3, 0.5)
+
+
+# Field index i holds plasma value i / 128 - 0.5. These map it to the
+# palette index of that value, wrapping for cyclic palettes and
+# saturating at the ends otherwise.
+_FIELD_VALUE = np.arange(PALETTE_SIZE) / 128 - 0.5
+_FIELD_WRAP = np.floor(_FIELD_VALUE * PALETTE_SIZE).astype(np.intp) & (PALETTE_SIZE - 1)
+_FIELD_CLAMP = np.clip(np.round(_FIELD_VALUE * 255), 0, 255).astype(np.intp)
+
+
+def _field_palette(spec) -> np.ndarray:
+    """Palette indexed directly by the plasma field."""
+    palette = get_palette(spec)
+    return palette[_FIELD_WRAP if is_cyclic(spec) else _FIELD_CLAMP]
 
 
 class PlasmaGenerator(ProceduralGenerator):
-    """Flowing plasma effect with overlapping sine waves."""
+    """Flowing plasma effect with overlapping sine waves.
+
+    ``palette`` is a palette name or a list of colour stops (see
+    :mod:`protogen.generators.palette`).
+
+    Runs in fixed point: each wave's spatial phase is a precomputed
+    integer grid in sine-table steps, time only adds a per-wave integer
+    offset, and the summed table values index a precomputed palette.
+    A frame is a handful of integer adds and table gathers plus one
+    palette gather into reused buffers.
+    """
 
     _param_attrs = {"speed": "_speed"}
 
     def __init__(self, width: int, height: int, params: dict) -> None:
         super().__init__(width, height, params)
         self._speed = params.get("speed", 1.0)
-        self._palette = params.get("palette", "cyan")
-        # Pre-compute coordinate grids
-        y_coords, x_coords = np.mgrid[0:height, 0:width]
-        self._x = x_coords.astype(np.float32) / width
-        self._y = y_coords.astype(np.float32) / height
-        # Pre-compute radial distance (never changes)
-        self._dist = np.sqrt(
-            ((self._x - 0.5) ** 2 + (self._y - 0.5) ** 2) * 100,
-            dtype=np.float32,
+        self._lut = _field_palette(params.get("palette"))
+        # Spatial phase of each wave in sine-table steps. The first two
+        # depend on x or y only, so they are gathered as a row and a
+        # column and broadcast.
+        to_steps = SINE_SIZE / (2 * np.pi)
+        x = np.arange(width) / width
+        y = np.arange(height)[:, None] / height
+        dist = np.sqrt(((x - 0.5) ** 2 + (y - 0.5) ** 2) * 100)
+        self._row, self._col, self._diag, self._dist = (
+            (np.round(wave * to_steps).astype(np.intp) & SINE_MASK)
+            for wave in (x * 10, y * 10, (x + y) * 8, dist)
         )
-        # Pre-compute static wave inputs
-        self._x10 = self._x * 10
-        self._y10 = self._y * 10
-        self._xy8 = (self._x + self._y) * 8
+        # Reused per-frame buffers
+        self._wave = np.empty((height, width), dtype=np.int16)
+        self._sum = np.empty((height, width), dtype=np.int16)
+        self._rgb = np.empty((height, width, 3), dtype=np.uint8)
 
-    def render(self, t: float) -> Image.Image:
+    def update_params(self, params: dict) -> None:
+        super().update_params(params)
+        if "palette" in params:
+            self._lut = _field_palette(params["palette"])
+
+    @property
+    def period(self) -> float | None:
+        # Wave speeds 1, 0.7, 1.3 and 0.5 all complete whole cycles
+        # after 20 * pi units of st
+        return 20 * np.pi / abs(self._speed) if self._speed else None
+
+    def _offsets(self, t: float) -> tuple[int, ...]:
+        """Each wave's time offset at ``t`` in sine-table steps."""
         st = t * self._speed
+        to_steps = SINE_SIZE / (2 * np.pi)
+        return tuple(round(st * speed * to_steps) & SINE_MASK for speed in _WAVE_SPEEDS)
+
+    def frame_key(self, t: float) -> tuple[int, ...]:
+        # The frame depends on t only through the wave offsets
+        return self.generation, *self._offsets(t)
+
+    def render(self, t: float) -> Image.Image:
+        self.render_into(t, self._rgb)
+        return Image.fromarray(self._rgb, "RGB")
 
-        # Combine multiple sine waves for plasma effect (in-place accumulation)
-        v = np.sin(self._x10 + st)
-        v += np.sin(self._y10 + st * 0.7)
-        v += np.sin(self._xy8 + st * 1.3)
-        v += np.sin(self._dist + st * 0.5)
-
-        v *= 0.25  # Range: -1 to 1
-        v += 0.5   # Normalize to 0-1
-
-        if self._palette == "rainbow":
-            # HSV-like rainbow mapping
-            h = v * 6.0  # h/60 pre-scaled
-            r = np.clip(np.abs(h % 6 - 3) - 1, 0, 1)
-            g = np.clip(2 - np.abs(h % 6 - 2), 0, 1)
-            b = np.clip(2 - np.abs(h % 6 - 4), 0, 1)
-            rgb = np.empty((self.height, self.width, 3), dtype=np.uint8)
-            rgb[:, :, 0] = (r * 255).astype(np.uint8)
-            rgb[:, :, 1] = (g * 255).astype(np.uint8)
-            rgb[:, :, 2] = (b * 255).astype(np.uint8)
-        else:
-            # Cyan palette
-            rgb = np.empty((self.height, self.width, 3), dtype=np.uint8)
-            rgb[:, :, 0] = (v * (0.1 * 255)).astype(np.uint8)
-            rgb[:, :, 1] = (v * (0.8 * 255)).astype(np.uint8)
-            rgb[:, :, 2] = (v * 255).astype(np.uint8)
-
-        return Image.fromarray(rgb, "RGB")
+    def render_into(self, t: float, out: np.ndarray) -> None:
+        # Rotating the table by a wave's time offset (a free view) is
+        # cheaper than adding the offset to every pixel's phase
+        luts = [_SINE_LUT2[offset:offset + SINE_SIZE] for offset in self._offsets(t)]
+        np.add(luts[0][self._row], luts[1][self._col], out=self._sum)
+        np.take(luts[2], self._diag, out=self._wave)
+        self._sum += self._wave
+        np.take(luts[3], self._dist, out=self._wave)
+        self._sum += self._wave
+        # [-128, 124] -> palette index
+        self._sum += 128
+        apply_palette(self._sum, self._lut, out=out)
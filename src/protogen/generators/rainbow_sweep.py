@@ -3,55 +3,43 @@ from __future__ import annotations
 import numpy as np
 from PIL import Image
 
-from protogen.generators import FrameEffect
+from protogen.generators import FrameAnalysis, FrameEffect
+from protogen.generators.palette import PALETTE_SIZE, apply_palette, hue_shade_table
+
+# Hue turns per second at speed 1.0 (120 degrees per second)
+_TURNS_PER_SECOND = 120 / 360
 
 
 class RainbowSweepEffect(FrameEffect):
-    """Recolors non-black pixels with a sweeping rainbow based on x-position."""
+    """Recolors non-black pixels with a sweeping rainbow based on x-position.
+
+    Hue depends only on x and brightness is the brightest channel, so a
+    frame is one hue row plus a single gather from the shaded hue wheel.
+    """
 
     _param_attrs = {"speed": "_speed"}
+    _analysis_fields = ("channel_max", "lit")
 
     def __init__(self, width: int, height: int, params: dict) -> None:
         super().__init__(width, height, params)
         self._speed = params.get("speed", 1.0)
-        # Pre-compute x coordinate grid (0..1) for hue mapping
-        self._x_grid = np.tile(
-            np.linspace(0, 1, width, endpoint=False, dtype=np.float32), (height, 1)
-        )
+        self._shades = hue_shade_table()
+        # Hue wheel position of each column at t = 0
+        self._x_hue = np.arange(width, dtype=np.float64) * (PALETTE_SIZE / width)
+        self._idx = np.empty((height, width), dtype=np.intp)
+        self._rgb = np.empty((height, width, 3), dtype=np.uint8)
 
-    def apply(self, frame: Image.Image, t: float) -> Image.Image:
-        rgb_arr = np.array(frame)
+    def prepare(self, analysis: FrameAnalysis) -> None:
+        # Brightness row of the shade table; black stays black
+        analysis.derived["shade_row"] = analysis.channel_max.astype(np.intp) << 8
 
-        # Mask & brightness: single max call
-        channel_max = rgb_arr.max(axis=2)
-        mask = channel_max > 0
-        if not mask.any():
+    def apply(self, frame: Image.Image, t: float) -> Image.Image:
+        analysis = self.analysis(frame)
+        if not analysis.lit:
             return frame
 
-        brightness = channel_max.astype(np.float32) * (1.0 / 255.0)
-
-        # Hue sweeps across x-axis and shifts over time
-        hue = (self._x_grid * 360 + t * self._speed * 120) % 360
-
-        # HSV to RGB conversion (S=1, V=brightness) using np.choose
-        h60 = hue / 60.0
-        sector = h60.astype(np.int32) % 6
-        f = h60 - np.floor(h60)
-        v = brightness
-        p = np.zeros_like(v)
-        q = v * (1.0 - f)
-        u = v * f  # t in standard HSV formula, renamed to avoid shadowing
-
-        # np.choose: select R, G, B per sector in one vectorized call
-        r = np.choose(sector, [v, q, p, p, u, v])
-        g = np.choose(sector, [u, v, v, q, p, p])
-        b = np.choose(sector, [p, p, u, v, v, q])
-
-        result = np.empty_like(rgb_arr)
-        result[:, :, 0] = (r * 255).clip(0, 255)
-        result[:, :, 1] = (g * 255).clip(0, 255)
-        result[:, :, 2] = (b * 255).clip(0, 255)
-
-        # Keep black pixels black
-        result[~mask] = 0
-        return Image.fromarray(result.astype(np.uint8), "RGB")
+        shift = t * self._speed * _TURNS_PER_SECOND * PALETTE_SIZE
+        hue = (self._x_hue + shift).astype(np.intp) & (PALETTE_SIZE - 1)
+        np.bitwise_or(analysis.derived["shade_row"], hue, out=self._idx)
+        apply_palette(self._idx, self._shades, out=self._rgb)
+        return Image.fromarray(self._rgb, "RGB")
@@ -1,12 +1,21 @@
 from __future__ import annotations
 
-from PIL import Image, ImageDraw, ImageFont
+import numpy as np
+from PIL import Image
 
+from protogen.frames import Rect
 from protogen.generators import ProceduralGenerator
+from protogen.generators.glyphs import color_ramp, default_font, get_atlas
 
 
 class ScrollingTextGenerator(ProceduralGenerator):
-    """Horizontal scrolling text from right to left."""
+    """Horizontal scrolling text from right to left.
+
+    The text is laid out from the shared glyph atlas into a coverage
+    strip and coloured with one table gather. New text only re-pastes
+    cached glyphs; a new colour only re-runs the gather. Each frame is a
+    window cropped from the coloured strip.
+    """
 
     _param_attrs = {"speed": "_speed"}
 
@@ -15,34 +24,62 @@ class ScrollingTextGenerator(ProceduralGenerator):
         self._text = params.get("text", "PROTOGEN")
         self._speed = params.get("speed", 50.0)  # pixels per second
         self._color = tuple(params.get("color", [0, 255, 255]))
-        self._font = ImageFont.load_default()
+        self._font = default_font()
+        self._atlas = get_atlas(self._font)
         self._render_text_image()
 
     def _render_text_image(self) -> None:
-        """Pre-render the full text into a wide image for scrolling."""
-        bbox = self._font.getbbox(self._text)
+        """Lay the full text out into a wide coverage strip for scrolling."""
+        bbox = self._atlas.getbbox(self._text)
         tw = bbox[2] - bbox[0]
         th = bbox[3] - bbox[1]
         # Add padding: full screen width on each side for smooth scroll
         total_w = tw + self.width * 2
-        self._text_img = Image.new("RGB", (total_w, self.height), (0, 0, 0))
-        draw = ImageDraw.Draw(self._text_img)
+        self._coverage = np.zeros((self.height, total_w), dtype=np.uint8)
         y = (self.height - th) // 2
-        draw.text((self.width, y), self._text, fill=self._color, font=self._font)
+        self._atlas.draw(self._coverage, (self.width, y), self._text)
         self._total_width = total_w
+        # Text scrolls sideways only: every frame's ink is in these rows
+        rows = np.flatnonzero(self._coverage.any(axis=1))
+        self._ink_rows = (int(rows[0]), int(rows[-1]) + 1) if len(rows) else (0, 0)
+        self._colorize()
+
+    def _colorize(self) -> None:
+        self._strip = np.take(color_ramp(self._color), self._coverage, axis=0)
+        self._text_img = Image.fromarray(self._strip, "RGB")
 
     def update_params(self, params: dict) -> None:
         super().update_params(params)
         if "color" in params:
             self._color = tuple(params["color"])
-            self._render_text_image()
+            self._colorize()
 
     def set_text(self, text: str) -> None:
         """Update the scrolling text dynamically."""
         self._text = text
         self._render_text_image()
+        self.generation += 1
+
+    @property
+    def period(self) -> float | None:
+        return self._total_width / self._speed if self._speed > 0 else None
+
+    @property
+    def ink_bounds(self) -> Rect:
+        top, bottom = self._ink_rows
+        return 0, top, self.width, bottom
+
+    def frame_key(self, t: float) -> tuple[int, int]:
+        return self.generation, int(t * self._speed) % self._total_width
 
     def render(self, t: float) -> Image.Image:
         offset = int(t * self._speed) % self._total_width
         # Crop a window from the pre-rendered text image
         return self._text_img.crop((offset, 0, offset + self.width, self.height))
+
+    def render_into(self, t: float, out: np.ndarray) -> None:
+        offset = int(t * self._speed) % self._total_width
+        # Same window as render(); past the strip's end is black
+        n = min(self.width, self._total_width - offset)
+        out[:, :n] = self._strip[:, offset:offset + n]
+        out[:, n:] = 0
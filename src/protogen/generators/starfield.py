@@ -5,9 +5,31 @@ from PIL import Image
 
 from protogen.generators import ProceduralGenerator
 
+# Largest star block edge; a star's size is max(1, (1 - z) * MAX_SIZE)
+MAX_SIZE = 3
+
+
+def _stencil(max_half: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Pixel offsets of the largest star block, innermost ring first.
+
+    Returns ``(dy, dx, counts)``: a block of half-width ``h`` is the
+    first ``counts[h] = (2h + 1) ** 2`` offsets.
+    """
+    dy, dx = np.mgrid[-max_half:max_half + 1, -max_half:max_half + 1]
+    dy, dx = dy.ravel(), dx.ravel()
+    order = np.argsort(np.maximum(abs(dy), abs(dx)), kind="stable")
+    counts = (2 * np.arange(max_half + 1) + 1) ** 2
+    return dy[order].astype(np.int32), dx[order].astype(np.int32), counts
+
 
 class StarfieldGenerator(ProceduralGenerator):
-    """3D starfield flying outward from center."""
+    """3D starfield flying outward from center.
+
+    Stars are splatted in one batch: every visible star expands to its
+    block's offsets from a shared stencil, and all pixels land with a
+    single ``np.maximum.at`` scatter, so where stars overlap the
+    brighter (nearer) one wins.
+    """
 
     _param_attrs = {"speed": "_speed"}
 
@@ -23,8 +45,9 @@ class StarfieldGenerator(ProceduralGenerator):
         self._sz = rng.uniform(0.1, 1.0, self._star_count).astype(np.float32)
         self._last_t = 0.0
         self._rng = rng
-        # Reusable framebuffer
+        # Reusable framebuffer for render()
         self._framebuf = np.zeros((height, width, 3), dtype=np.uint8)
+        self._dy, self._dx, self._counts = _stencil(MAX_SIZE // 2)
 
     def update_params(self, params: dict) -> None:
         super().update_params(params)
@@ -32,11 +55,15 @@ class StarfieldGenerator(ProceduralGenerator):
             self._color = np.array(params["color"], dtype=np.float32)
 
     def render(self, t: float) -> Image.Image:
+        self.render_into(t, self._framebuf)
+        return Image.fromarray(self._framebuf, "RGB")
+
+    def render_into(self, t: float, out: np.ndarray) -> None:
         dt = t - self._last_t if self._last_t > 0 else 1.0 / 30
         self._last_t = t
 
         # Clear framebuffer
-        self._framebuf[:] = 0
+        out[:] = 0
 
         # Vectorized z update
         self._sz -= self._speed * dt * 0.5
@@ -60,29 +87,20 @@ class StarfieldGenerator(ProceduralGenerator):
         # Brightness and size
         one_minus_z = 1.0 - self._sz
         brightness = np.maximum(0.2, one_minus_z)
-        sizes = np.maximum(1, (one_minus_z * 3).astype(np.int32))
+        sizes = np.clip((one_minus_z * MAX_SIZE).astype(np.int32), 1, MAX_SIZE)
 
         # Visibility mask
         visible = (px >= 0) & (px < self.width) & (py >= 0) & (py < self.height)
-
-        # Draw visible stars
-        fb = self._framebuf
-        color = self._color
-        for i in np.where(visible)[0]:
-            br = brightness[i]
-            cr = int(color[0] * br)
-            cg = int(color[1] * br)
-            cb = int(color[2] * br)
-            x, y, sz = int(px[i]), int(py[i]), int(sizes[i])
-            if sz <= 1:
-                fb[y, x] = (cr, cg, cb)
-            else:
-                # Draw square block approximation
-                half = sz // 2
-                x0 = max(0, x - half)
-                y0 = max(0, y - half)
-                x1 = min(self.width, x + half + 1)
-                y1 = min(self.height, y + half + 1)
-                fb[y0:y1, x0:x1] = (cr, cg, cb)
-
-        return Image.fromarray(self._framebuf, "RGB")
+        px, py = px[visible], py[visible]
+        colors = (self._color * brightness[visible, None]).astype(np.uint8)
+        counts = self._counts[sizes[visible] // 2]
+
+        # Every star's block pixels at once: (stars, stencil) coordinates,
+        # keeping offsets inside the star's block and the screen
+        xs = px[:, None] + self._dx
+        ys = py[:, None] + self._dy
+        keep = np.arange(len(self._dx)) < counts[:, None]
+        keep &= (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+        star, _ = np.nonzero(keep)
+        # Scatter through a (pixels, 3) view of ``out``
+        np.maximum.at(out.reshape(-1, 3), ys[keep] * self.width + xs[keep], colors[star])
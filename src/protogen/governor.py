@@ -0,0 +1,116 @@
+"""Adaptive frame rate for the effect layers.
+
+Each effect is sampled at the fps its manifest entry asks for,
+whatever the load. Inside a sealed visor that can heat the Pi until it
+throttles, which then stalls the panel all at once. A
+:class:`FrameGovernor` watches how much of each second the render side
+is busy, how many ticks overran their frame interval, and the CPU
+temperature, and scales every layer's rate down when any of them runs
+high; the rate recovers in small steps once there is headroom again.
+"""
+from __future__ import annotations
+
+import logging
+from collections.abc import Callable
+
+logger = logging.getLogger(__name__)
+
+# Share of max_load under which the rate may grow again
+RAISE_BELOW = 0.6
+# Scale added per period while there is headroom
+RAISE_STEP = 0.1
+# Most the scale drops in one period
+MAX_DROP = 0.5
+
+
+class FrameGovernor:
+    """Scale applied to the effect layers' fps, adjusted every ``period`` seconds.
+
+    ``max_load`` is the share of wall time rendering may take. Above
+    it, or when more than ``max_missed`` of the ticks took longer than
+    their frame interval, the scale drops in proportion to the
+    overload. Between ``temp_high`` and ``temp_critical`` (°C, read
+    through ``read_temp``, which may return None) the scale is capped
+    linearly from 1 down to 0, where every layer runs at ``min_fps``.
+    """
+
+    def __init__(
+        self,
+        max_load: float = 0.5,
+        max_missed: float = 0.05,
+        temp_high: float = 70.0,
+        temp_critical: float = 80.0,
+        min_fps: int = 5,
+        period: float = 2.0,
+        read_temp: Callable[[], float | None] | None = None,
+    ) -> None:
+        self.max_load = max_load
+        self.max_missed = max_missed
+        self.temp_high = temp_high
+        self.temp_critical = max(temp_critical, temp_high + 1.0)
+        self.min_fps = min_fps
+        self.period = period
+        self._read_temp = read_temp
+        self.scale = 1.0
+        # Measurements of the last full period
+        self.load = 0.0
+        self.missed = 0.0
+        self.temperature: float | None = None
+        self._window_start: float | None = None
+        self._busy = 0.0
+        self._ticks = 0
+        self._overruns = 0
+
+    @property
+    def throttled(self) -> bool:
+        return self.scale < 1.0
+
+    def fps(self, requested: float) -> float:
+        """Effective rate of a layer that asks for ``requested`` fps."""
+        return max(min(requested, self.min_fps), requested * self.scale)
+
+    def record(self, t: float, busy: float, interval: float) -> bool:
+        """Account a tick at clock time ``t`` that kept rendering busy ``busy`` seconds.
+
+        Returns True when the period ended and the scale changed.
+        """
+        if self._window_start is None or t < self._window_start:
+            self._window_start = t
+        self._busy += busy
+        self._ticks += 1
+        if busy > interval:
+            self._overruns += 1
+        elapsed = t - self._window_start
+        if elapsed < self.period:
+            return False
+        self.load = self._busy / elapsed
+        self.missed = self._overruns / self._ticks
+        self._window_start = t
+        self._busy = 0.0
+        self._ticks = self._overruns = 0
+        if self._read_temp is not None:
+            self.temperature = self._read_temp()
+        return self._adjust()
+
+    def _adjust(self) -> bool:
+        scale = self.scale
+        if self.load > self.max_load:
+            # Render cost is roughly proportional to the effects' rate
+            scale *= max(MAX_DROP, self.max_load / self.load)
+        elif self.missed > self.max_missed:
+            scale *= 1.0 - RAISE_STEP
+        elif self.load < self.max_load * RAISE_BELOW:
+            scale = min(1.0, scale + RAISE_STEP)
+        temp = self.temperature
+        if temp is not None and temp > self.temp_high:
+            heat = (temp - self.temp_high) / (self.temp_critical - self.temp_high)
+            scale = min(scale, max(0.0, 1.0 - heat))
+        if scale == self.scale:
+            return False
+        self.scale = scale
+        logger.info(
+            "effects at %d%% of their fps (load %.0f%%, %s)",
+            round(scale * 100), self.load * 100,
+            "temperature unknown" if temp is None else f"{temp:.0f}°C",
+        )
+        return True
@@ -27,6 +27,7 @@ def _create_app(
     get_display_fps: Callable[[], float] | None = None,
     system_monitor: SystemMonitor | None = None,
     get_jpeg: Callable[[int], bytes | None] | None = None,
+    get_metrics: Callable[[], dict] | None = None,
 ):
 
     app = FastAPI()
@@ -94,6 +95,16 @@ def _create_app(
         await put(Command(event=InputEvent.SET_EFFECT, value=name))
         return {"status": "ok"}
 
+    @app.post("/api/effect/{name}/add")
+    async def add_effect(name: str):
+        await put(Command(event=InputEvent.ADD_EFFECT, value=name))
+        return {"status": "ok"}
+
+    @app.post("/api/effect/{name}/remove")
+    async def remove_effect(name: str):
+        await put(Command(event=InputEvent.REMOVE_EFFECT, value=name))
+        return {"status": "ok"}
+
     @app.post("/api/effect/{name}/params")
     async def update_effect_params(name: str, data: dict):
         await put(Command(
@@ -121,6 +132,12 @@ def _create_app(
         metrics["brightness"] = get_brightness()
         return metrics
 
+    @app.get("/api/metrics")
+    async def render_metrics():
+        if get_metrics is None:
+            return Response(status_code=204)
+        return get_metrics()
+
     @app.get("/api/state")
     async def get_state():
         return {
@@ -181,6 +198,10 @@ def _create_app(
                     await put(Command(event=InputEvent.SET_EFFECT, value=data["name"]))
                 elif action == "clear_effect":
                     await put(Command(event=InputEvent.CLEAR_EFFECT))
+                elif action == "add_effect":
+                    await put(Command(event=InputEvent.ADD_EFFECT, value=data["name"]))
+                elif action == "remove_effect":
+                    await put(Command(event=InputEvent.REMOVE_EFFECT, value=data["name"]))
                 elif action == "set_text":
                     text = data.get("text", "")
                     await put(Command(event=InputEvent.SET_TEXT, value=text))
@@ -215,6 +236,7 @@ class WebInput:
         get_display_fps: Callable[[], float] | None = None,
         system_monitor: SystemMonitor | None = None,
         get_jpeg: Callable[[int], bytes | None] | None = None,
+        get_metrics: Callable[[], dict] | None = None,
     ) -> None:
         self._port = port
         self._expression_names = expression_names or []
@@ -228,6 +250,7 @@ class WebInput:
         self._get_display_fps = get_display_fps or (lambda: 0.0)
         self._system_monitor = system_monitor
         self._get_jpeg = get_jpeg
+        self._get_metrics = get_metrics
 
     async def run(self, put: Callable[[Command], Awaitable[None]]) -> None:
         import uvicorn
@@ -242,6 +265,7 @@ class WebInput:
             get_display_fps=self._get_display_fps,
             system_monitor=self._system_monitor,
             get_jpeg=self._get_jpeg,
+            get_metrics=self._get_metrics,
         )
         config = uvicorn.Config(app, host="0.0.0.0", port=self._port, log_level="info", ws="wsproto", loop="none")
         server = uvicorn.Server(config)
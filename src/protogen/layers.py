@@ -0,0 +1,143 @@
+"""Effect layers and the integer blend modes that stack them.
+
+The render pipeline keeps its effects as a stack of :class:`Layer`
+objects over the expression frame: frame effects, which transform the
+result below them, then generators drawn on top. Each layer blends its
+output over what is below with a :class:`BlendMode`, samples its
+generator at its own fps and keeps its last output, so a layer that
+isn't due, or whose generator reports an unchanged frame, costs nothing
+on a tick.
+"""
+from __future__ import annotations
+
+from collections.abc import Hashable
+from dataclasses import dataclass, field
+from enum import Enum
+
+import numpy as np
+
+from protogen.frames import EMPTY_RECT, Frame, Rect
+from protogen.generators import FrameEffect, ProceduralGenerator
+from protogen.generators.loop_cache import LoopCache
+
+# Opacity is fixed point in 1/256 steps; OPAQUE shows only the layer
+OPAQUE = 256
+# Weight of the newest sample in a layer's smoothed render cost
+COST_SMOOTHING = 0.1
+
+
+class BlendMode(Enum):
+    """How a layer's pixels combine with the result below it."""
+
+    # Brightest of the two per channel ("lighter")
+    MAX = "max"
+    # Sum per channel, saturating at 255
+    ADD = "add"
+    # The layer over what is below, weighted by the layer's opacity
+    ALPHA = "alpha"
+    # Product scaled so that white leaves what is below unchanged
+    MULTIPLY = "multiply"
+
+
+def opacity_steps(opacity: float) -> int:
+    """Fixed-point opacity (0..OPAQUE) of a 0.0-1.0 float."""
+    return max(0, min(OPAQUE, round(opacity * OPAQUE)))
+
+
+def blend(
+    mode: BlendMode,
+    below: np.ndarray,
+    above: np.ndarray,
+    out: np.ndarray,
+    opacity: int = OPAQUE,
+    scratch: np.ndarray | None = None,
+) -> None:
+    """Blend uint8 ``above`` over ``below`` into ``out``.
+
+    The three arrays have the same shape and ``out`` may be ``below``.
+    Everything is integer: sums and products are widened to uint16 in
+    ``scratch``, a ``(2, *out.shape)`` uint16 array that is allocated
+    when not given. ``opacity`` only weights :attr:`BlendMode.ALPHA`.
+    """
+    if mode is BlendMode.MAX:
+        np.maximum(below, above, out=out)
+        return
+    if mode is BlendMode.ALPHA and opacity >= OPAQUE:
+        np.copyto(out, above)
+        return
+    if scratch is None:
+        scratch = np.empty((2, *out.shape), dtype=np.uint16)
+    wide, tmp = scratch
+    if mode is BlendMode.ADD:
+        np.add(below, above, out=wide, dtype=np.uint16)
+        np.minimum(wide, 255, out=wide)
+    elif mode is BlendMode.MULTIPLY:
+        # round(b * a / 255) without a division: with x = b * a + 128
+        # it is (x + (x >> 8)) >> 8, exact over the uint8 range
+        np.multiply(below, above, out=wide, dtype=np.uint16)
+        wide += 128
+        np.right_shift(wide, 8, out=tmp)
+        wide += tmp
+        wide >>= 8
+    else:
+        np.multiply(below, OPAQUE - max(opacity, 0), out=wide, dtype=np.uint16)
+        np.multiply(above, max(opacity, 0), out=tmp, dtype=np.uint16)
+        wide += tmp
+        wide >>= 8
+    np.copyto(out, wide, casting="unsafe")
+
+
+@dataclass(eq=False)
+class Layer:
+    """One effect in the stack: its generator, how it blends, its last output.
+
+    ``frame`` is what the layer last produced and ``version`` is bumped
+    whenever it may hold different pixels. ``dirty`` bounds the change
+    since the pipeline last composited the layer (None: unknown).
+    """
+
+    name: str
+    generator: ProceduralGenerator
+    mode: BlendMode
+    fps: int = 20
+    opacity: int = OPAQUE
+    loop_cache: LoopCache | None = None
+    # Whether the manifest asked for loop_cache, as opposed to the governor
+    bake: bool = False
+    # Clock time the next sample is due
+    due: float = 0.0
+    frame: Frame | None = None
+    version: int = 0
+    # frame_key() of the generator frame in buf
+    key: Hashable | None = None
+    # Pool buffer the layer renders or blends into
+    buf: np.ndarray | None = None
+    dirty: Rect | None = EMPTY_RECT
+    # The generator's ink bounds when it last rendered
+    bounds: Rect | None = None
+    # Frame a frame effect was last given as its base
+    source: Frame | None = None
+    # What a blended frame effect last returned, blended over source in buf
+    output: Frame | None = None
+    # Gain of an intensity-only frame effect folded into the display,
+    # None while the layer renders
+    gain: float | None = None
+    # Smoothed seconds one sample of the layer takes to render
+    cost: float = 0.0
+    # Whether this is a frame effect, which transforms what is below it
+    transforms: bool = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.transforms = isinstance(self.generator, FrameEffect)
+
+    @property
+    def replaces(self) -> bool:
+        """Whether the output hides what is below it entirely."""
+        return self.mode is BlendMode.ALPHA and self.opacity >= OPAQUE
+
+    def note_cost(self, seconds: float) -> None:
+        """Fold the render time of one sample into :attr:`cost`."""
+        if self.cost:
+            self.cost += COST_SMOOTHING * (seconds - self.cost)
+        else:
+            self.cost = seconds
@@ -12,6 +12,8 @@ from protogen.config import Config
 from protogen.expression import load_expressions, load_effects
 from protogen.expression_manager import ExpressionManager
 from protogen.expression_store import ExpressionStore
+from protogen.frame_clock import DropPolicy
+from protogen.governor import FrameGovernor
 from protogen.input_manager import InputManager
 from protogen.boot_animation import play_boot_animation
 from protogen.generators import register_generators, GENERATORS, FrameEffect
@@ -54,12 +56,30 @@ async def async_main() -> None:
     expressions = load_expressions(config.expressions_dir)
     store = ExpressionStore(expressions)
     effects = load_effects(config.expressions_dir)
-    pipeline = RenderPipeline(display)
+    drop_policy = DropPolicy(config.frame_drop_policy)
+    system_monitor = SystemMonitor()
+    governor = None
+    if config.governor.enabled:
+        governor = FrameGovernor(
+            max_load=config.governor.max_load,
+            temp_high=config.governor.temp_high,
+            temp_critical=config.governor.temp_critical,
+            min_fps=config.governor.min_fps,
+            read_temp=system_monitor.get_cpu_temp,
+        )
+    pipeline = RenderPipeline(
+        display,
+        fps=config.render_fps,
+        drop_policy=drop_policy,
+        threaded=config.render_thread,
+        governor=governor,
+    )
     expr_mgr = ExpressionManager(
         pipeline, store,
         blink_interval_min=config.blink_interval_min,
         blink_interval_max=config.blink_interval_max,
         transition_duration_ms=config.transition_duration_ms,
+        drop_policy=drop_policy,
     )
 
     def make_effect_thumbnail(name: str) -> bytes | None:
@@ -80,8 +100,6 @@ async def async_main() -> None:
         img.save(buf, format="PNG")
         return buf.getvalue()
 
-    system_monitor = SystemMonitor()
-
     if config.input.web_enabled:
         from protogen.inputs.web import WebInput
         input_mgr.add_source(WebInput(
@@ -97,6 +115,7 @@ async def async_main() -> None:
             get_display_fps=lambda: pipeline.get_fps(),
             system_monitor=system_monitor,
             get_jpeg=pipeline.get_jpeg,
+            get_metrics=pipeline.get_metrics,
         ))
 
     # 播放開機動畫
@@ -112,7 +131,7 @@ async def async_main() -> None:
             if cmd.event == InputEvent.SET_EXPRESSION:
                 expr_mgr.set_expression(cmd.value)
             elif cmd.event == InputEvent.SET_BRIGHTNESS:
-                display.set_brightness(cmd.value)
+                pipeline.set_brightness(cmd.value)
             elif cmd.event == InputEvent.SET_TEXT:
                 pipeline.set_effect_text(cmd.value)
             elif cmd.event == InputEvent.TOGGLE_BLINK:
@@ -120,14 +139,41 @@ async def async_main() -> None:
             elif cmd.event == InputEvent.SET_EFFECT:
                 effect = effects.get(cmd.value)
                 if effect is not None:
-                    pipeline.set_effect(effect.generator_name, effect.generator_params, effect.fps)
+                    pipeline.set_effect(
+                        effect.generator_name, effect.generator_params,
+                        effect.fps, offload=effect.offload, bake=effect.bake,
+                        blend=effect.blend, opacity=effect.opacity,
+                        layer_name=effect.name,
+                    )
             elif cmd.event == InputEvent.SET_EFFECT_PARAMS:
                 pipeline.update_effect_params(cmd.value)
             elif cmd.event == InputEvent.SET_EFFECT_WITH_PARAMS:
                 effect = effects.get(cmd.value["name"])
                 if effect is not None:
-                    pipeline.set_effect(effect.generator_name, effect.generator_params, effect.fps)
-                    pipeline.update_effect_params(cmd.value.get("params", {}))
+                    # A stacked effect keeps its place and its neighbours
+                    if not any(layer.name == effect.name for layer in pipeline.layers):
+                        pipeline.set_effect(
+                            effect.generator_name, effect.generator_params,
+                            effect.fps, offload=effect.offload, bake=effect.bake,
+                            blend=effect.blend, opacity=effect.opacity,
+                            layer_name=effect.name,
+                        )
+                    pipeline.update_effect_params(
+                        cmd.value.get("params", {}), name=effect.name
+                    )
+            elif cmd.event == InputEvent.ADD_EFFECT:
+                effect = effects.get(cmd.value)
+                if effect is not None:
+                    pipeline.add_effect(
+                        effect.generator_name, effect.generator_params,
+                        effect.fps, offload=effect.offload, bake=effect.bake,
+                        blend=effect.blend, opacity=effect.opacity,
+                        layer_name=effect.name,
+                    )
+            elif cmd.event == InputEvent.REMOVE_EFFECT:
+                effect = effects.get(cmd.value)
+                if effect is not None:
+                    pipeline.remove_effect(effect.name)
             elif cmd.event == InputEvent.CLEAR_EFFECT:
                 pipeline.clear_effect()
 
@@ -143,7 +189,7 @@ async def async_main() -> None:
         input_mgr.run_all(),
         handle_commands(),
         pump_display_events(),
-        pipeline.run_effect_loop(),
+        pipeline.run(),
     )
 
     # 優雅關閉：收到 SIGINT/SIGTERM 時取消所有 task
@@ -164,6 +210,7 @@ async def async_main() -> None:
         for t in pending:
             t.cancel()
         await asyncio.gather(*pending, return_exceptions=True)
+        pipeline.close()
         display.clear()
 
 
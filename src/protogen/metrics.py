@@ -0,0 +1,64 @@
+"""Timings of the stages of the render path.
+
+``RenderPipeline.get_fps()`` says how often frames arrive, not where
+the frame budget goes. :class:`StageTimings` keeps the most recent
+durations of each stage (generator render, effect apply, composite,
+dedup, display push, JPEG encode) in a fixed-size ring per stage:
+recording one is a list store, and percentiles are only computed
+when someone asks for them.
+"""
+from __future__ import annotations
+
+import numpy as np
+
+# Durations kept per stage
+SAMPLES = 512
+
+STAGES = ("render", "effect", "composite", "dedup", "push", "jpeg")
+
+
+class TimingRing:
+    """The last ``size`` durations of one stage, in seconds."""
+
+    def __init__(self, size: int = SAMPLES) -> None:
+        self._samples = [0.0] * size
+        self._next = 0
+        # Durations recorded over the ring's lifetime
+        self.count = 0
+
+    def add(self, seconds: float) -> None:
+        self._samples[self._next] = seconds
+        self._next = (self._next + 1) % len(self._samples)
+        self.count += 1
+
+    def summary(self) -> dict:
+        """Sample count and p50 / p95 / p99 / max of the ring, in milliseconds."""
+        n = min(self.count, len(self._samples))
+        if not n:
+            return {"count": 0, "p50": None, "p95": None, "p99": None, "max": None}
+        samples = np.array(self._samples[:n]) * 1000.0
+        p50, p95, p99 = np.percentile(samples, (50, 95, 99))
+        return {
+            "count": self.count,
+            "p50": round(float(p50), 3),
+            "p95": round(float(p95), 3),
+            "p99": round(float(p99), 3),
+            "max": round(float(samples.max()), 3),
+        }
+
+
+class StageTimings:
+    """One :class:`TimingRing` per stage of the render path.
+
+    Written from the render thread and read from the event loop; a
+    summary may miss the duration being recorded at that moment.
+    """
+
+    def __init__(self, stages: tuple[str, ...] = STAGES, size: int = SAMPLES) -> None:
+        self._rings = {stage: TimingRing(size) for stage in stages}
+
+    def record(self, stage: str, seconds: float) -> None:
+        self._rings[stage].add(seconds)
+
+    def summary(self) -> dict[str, dict]:
+        return {stage: ring.summary() for stage, ring in self._rings.items()}
@@ -2,140 +2,839 @@ from __future__ import annotations
 
 import asyncio
 import io
+import itertools
 import logging
+import threading
 import time
+import zlib
+from collections import deque
+from collections.abc import Callable
 
 import numpy as np
 from PIL import Image
 
-from protogen.display.base import DisplayBase
-from protogen.generators import ProceduralGenerator, FrameEffect, GENERATORS
+from protogen.display.base import GAIN_ONE, DisplayBase, gain_steps, intensity_lut
+from protogen.frame_clock import DropPolicy, FrameClock
+from protogen.frame_pool import FramePool
+from protogen.frames import (
+    EMPTY_RECT,
+    Frame,
+    IndexedFrame,
+    Rect,
+    frame_to_array,
+    frame_to_image,
+    rect_is_empty,
+    rect_slices,
+    show_frame,
+    union_rect,
+)
+from protogen.generators import FrameEffect, GENERATORS
+from protogen.generators.loop_cache import LoopCache
+from protogen.generators.offload import OffloadedGenerator
+from protogen.generators.offload import offload as offload_generator
+from protogen.governor import FrameGovernor
+from protogen.layers import BlendMode, Layer, blend, opacity_steps
+from protogen.metrics import StageTimings
 
 logger = logging.getLogger(__name__)
 
+# Region selecting a whole frame
+_FULL = (slice(None), slice(None))
+
+
+def _stacked(layers: list[Layer], layer: Layer) -> list[Layer]:
+    """``layers`` with ``layer`` added.
+
+    Frame effects go above the other frame effects and below every
+    generator, generators on top; a layer of the same name is replaced
+    where it is.
+    """
+    stack = list(layers)
+    for index, old in enumerate(stack):
+        if old.name == layer.name:
+            stack[index] = layer
+            return stack
+    if layer.transforms:
+        stack.insert(sum(1 for old in stack if old.transforms), layer)
+    else:
+        stack.append(layer)
+    return stack
+
 
 class RenderPipeline:
     """Display wrapper that tracks the last frame and composites effects.
 
     Sits between the expression system and the hardware display.
-    Effects are rendered as an independent overlay and composited
-    with the expression frame using pixel-wise max (lighter).
+    Effects form a stack of :class:`~protogen.layers.Layer` over the
+    expression frame: frame effects transform it in order, then
+    generators are blended on top, each with its own blend mode. Every
+    layer is sampled at its own fps and keeps its last output, so only
+    layers that are due are rendered on a tick.
+
+    While :meth:`run` is active the pipeline owns the only frame clock:
+    expression sources (animations, transitions, blinks) just post
+    their latest frame, effects are sampled at their own fps on the
+    clock's ticks, and at most one composited frame is pushed to the
+    hardware per tick. Without the loop, frames are pushed immediately.
+
+    With ``threaded=True`` the clock, effect rendering, compositing and
+    every display call run on a dedicated render thread instead of the
+    event loop, so web traffic can't stall the panel. The asyncio side
+    then only swaps the latest-frame reference or queues state changes
+    (effect, params, brightness) for the thread to apply between ticks.
+    Generators render into, and composites are written into, buffers
+    from :attr:`frame_pool`; the composite last pushed stays intact
+    while the next one is being drawn. Expression sources may post
+    frames acquired from the pool too: once a newer frame replaces one
+    and nothing displays it any more, the pipeline releases it, so
+    steady-state rendering allocates no frames. Expression frames may
+    be PIL images, (H, W, 3) uint8 arrays or indexed frames; the latter
+    two reach the display without a PIL round-trip. Effects that only
+    scale intensity (``FrameEffect.gain``) at the top of the stack
+    render nothing: the frame below them is pushed as is and the
+    display folds the gain into its brightness LUT.
+
+    Unchanged frames are not pushed again. Sources say when they change:
+    expression frames and layer outputs by object identity, generators
+    through ``frame_key`` (see :meth:`ProceduralGenerator.frame_key`).
+    When none of the frames going into a composite changed the previous
+    composite is kept without touching a pixel; otherwise the new
+    composite's crc32 is compared with the one on the panel.
+
+    Posted frames may carry a dirty rect (see :func:`show_frame`), and
+    generators bound their ink (``ink_bounds``). The pipeline unions
+    these over the blended layers into the change since the last push:
+    composites recompute only that rect, plus whatever the reused pool
+    buffer missed since it last held a composite, and the display is
+    told to rewrite only that rect.
+
+    Every stage of the render path records its duration in
+    :attr:`timings`; :meth:`get_metrics` reports their percentiles.
+
+    With a :class:`~protogen.governor.FrameGovernor` each layer is
+    sampled at the governor's share of its fps, and every tick reports
+    how long it kept the pipeline busy. While the governor throttles,
+    periodic layers are also baked into a loop cache.
     """
 
-    def __init__(self, display: DisplayBase) -> None:
+    def __init__(
+        self,
+        display: DisplayBase,
+        fps: int = 30,
+        drop_policy: DropPolicy = DropPolicy.DROP,
+        threaded: bool = False,
+        governor: FrameGovernor | None = None,
+    ) -> None:
         self.width = display.width
         self.height = display.height
         self._display = display
-        self.last_frame: Image.Image | None = None
-        self.last_displayed_frame: Image.Image | None = None
-        self._effect: ProceduralGenerator | None = None
+        self.last_frame: Frame | None = None
+        self.last_displayed_frame: Frame | None = None
+        # Effect stack, bottom to top; replaced, never mutated, so other
+        # threads can read it
+        self._layers: list[Layer] = []
+        # Layers from this index up fold their gain into the display
+        self._fold_from = 0
         self._effect_name: str | None = None
-        self._effect_fps: int = 20
-        self._effect_frame: Image.Image | None = None
+        self._fps = fps
+        self._drop_policy = drop_policy
+        self._running = False
+        self._dirty = False
+        self._threaded = threaded
+        # Scales the layers' fps to the render cost and CPU temperature
+        self.governor = governor
+        # Durations of the render path's stages
+        self.timings = StageTimings()
+        self._thread: threading.Thread | None = None
+        self._thread_wake = threading.Event()
+        self._stop = threading.Event()
+        # State changes queued for the render thread; deque appends and
+        # pops are atomic, so no lock is needed
+        self._ops: deque[Callable[[], None]] = deque()
+        # Product of the folded gains, None when no layer folds
+        self._effect_gain: float | None = None
+        # Frame seq of the last push made with a gain, and that gain
+        self._gain_seq = -1
+        self._displayed_gain = GAIN_ONE
         self._last_frame_time: float = 0.0
         self._ema_interval: float = 0.0
         self._pending_text: str | None = None
         self._black_frame = Image.new("RGB", (self.width, self.height), (0, 0, 0))
-        self._last_base_id: int | None = None
         # Frame dedup: skip pushing identical frames to hardware
         self._last_pushed_id: int | None = None
-        self._last_composited_bytes: bytes | None = None
-        # Effect loop sleep: wait instead of polling when no effect active
-        self._effect_active = asyncio.Event()
+        # Buffers for effect output, composites and posted frames
+        self.frame_pool = FramePool((self.height, self.width, 3))
+        # Composite last pushed, its crc32 (None until a full compare
+        # needs it), and the (frame, version) of what it was made from:
+        # the frame below the generators (version -1 for the expression
+        # frame), then each generator layer
+        self._front: np.ndarray | None = None
+        self._front_crc: int | None = None
+        self._composite_inputs: list[tuple[Frame, int]] | None = None
+        # uint16 intermediates of the blend modes, allocated on first use
+        self._scratch: np.ndarray | None = None
+        # Gain of the last FrameEffect push, None if there was none
+        self._pushed_gain: int | None = None
+        # Change of last_frame since a push last took it; posted from
+        # other threads, so both are swapped under the lock
+        self._frame_lock = threading.Lock()
+        self._base_dirty: Rect | None = None
+        # Who posted last_frame (see show_image)
+        self._base_source: object = None
+        # What the last push showed ("frame", "effect", "composite"); a
+        # dirty rect only holds against a push of the same kind
+        self._push_kind: str | None = None
+        # Composites pushed, each one's dirty rect against the one
+        # before, and the (composite number, pool lease) of buffers
+        # known to hold a composite
+        self._composite_seq = 0
+        self._damage: deque[Rect | None] = deque(maxlen=8)
+        self._buffer_state: dict[int, tuple[int, int]] = {}
+        # Replaced pool frames, released once nothing refers to them
+        self._retired: deque[np.ndarray] = deque()
+        # Bumped on every push, keys the JPEG cache
+        self._frame_seq = 0
+        # Master loop sleeps on this while there is nothing to present
+        self._wake = asyncio.Event()
         # JPEG cache for preview endpoints
         self._jpeg_cache: bytes | None = None
-        self._jpeg_frame_id: int | None = None
-        # Cached numpy array for base frame in compositing
+        self._jpeg_seq: int = -1
+        # Frame get_jpeg is encoding, kept out of the pool until done;
+        # taken and checked against releases under the lock
+        self._jpeg_lock = threading.Lock()
+        self._jpeg_frame: Frame | None = None
+        # Cached numpy array of the frame below the generator layers
         self._base_arr: np.ndarray | None = None
         self._last_base_arr_id: int | None = None
 
     @property
     def active_effect_name(self) -> str | None:
+        """The effect last set or added, while it is stacked."""
         return self._effect_name
 
-    def set_effect(self, name: str, params: dict, fps: int = 20) -> None:
+    @property
+    def layers(self) -> tuple[Layer, ...]:
+        """The effect stack, bottom to top."""
+        return tuple(self._layers)
+
+    def set_effect(
+        self,
+        name: str,
+        params: dict,
+        fps: int = 20,
+        offload: bool = False,
+        bake: bool = False,
+        blend: BlendMode | str | None = None,
+        opacity: float = 1.0,
+        layer_name: str | None = None,
+    ) -> None:
+        """Replace the effect stack with generator ``name``.
+
+        ``offload`` renders it in a worker process; ``bake`` caches one
+        cycle of a periodic generator and replays it. ``blend``,
+        ``opacity`` and ``layer_name`` are as for :meth:`add_effect`.
+        """
+        layer = self._make_layer(name, params, fps, offload, bake, blend, opacity, layer_name)
+        if layer is None:
+            return
+        self._effect_name = layer.name
+        self._post(lambda: self._set_layers([layer]))
+        self._wake.set()
+
+    def add_effect(
+        self,
+        name: str,
+        params: dict,
+        fps: int = 20,
+        offload: bool = False,
+        bake: bool = False,
+        blend: BlendMode | str | None = None,
+        opacity: float = 1.0,
+        layer_name: str | None = None,
+    ) -> None:
+        """Stack generator ``name`` on the active effects.
+
+        The layer is named ``layer_name`` (a manifest effect name),
+        defaulting to ``name``. Frame effects go above the other frame
+        effects and below every generator, generators on top; a layer
+        already stacked under that name is replaced where it is.
+        ``blend`` is a :class:`BlendMode` or its value and defaults to
+        ``"alpha"`` (the output replaces what it transforms) for frame
+        effects and to ``"max"`` for generators; ``opacity`` (0.0-1.0)
+        weights the alpha blend.
+        """
+        layer = self._make_layer(name, params, fps, offload, bake, blend, opacity, layer_name)
+        if layer is None:
+            return
+        self._effect_name = layer.name
+        self._post(lambda: self._set_layers(_stacked(self._layers, layer)))
+        self._wake.set()
+
+    def remove_effect(self, name: str) -> None:
+        """Take the layer named ``name`` off the stack, if it is there."""
+        logger.info("effect removed: %s", name)
+
+        def apply() -> None:
+            layers = [layer for layer in self._layers if layer.name != name]
+            if self._effect_name == name:
+                self._effect_name = layers[-1].name if layers else None
+            self._set_layers(layers)
+        self._post(apply)
+
+    def _make_layer(
+        self,
+        name: str,
+        params: dict,
+        fps: int,
+        offload: bool,
+        bake: bool,
+        blend: BlendMode | str | None,
+        opacity: float,
+        layer_name: str | None,
+    ) -> Layer | None:
         gen_cls = GENERATORS.get(name)
         if gen_cls is None:
-            return
-        self._effect = gen_cls(self.width, self.height, params)
-        self._effect_name = name
-        self._effect_fps = fps
-        self._effect_frame = None
-        self._last_base_id = None
+            return None
+        if blend is None:
+            mode = BlendMode.ALPHA if issubclass(gen_cls, FrameEffect) else BlendMode.MAX
+        else:
+            mode = BlendMode(blend)
+        if offload:
+            effect = offload_generator(gen_cls, self.width, self.height, params, fps)
+        else:
+            effect = gen_cls(self.width, self.height, params)
+        if fps > self._fps:
+            logger.info("effect %s capped at the pipeline's %d fps", name, self._fps)
+        logger.info("effect set: %s (fps=%d, blend=%s)", layer_name or name, fps, mode.value)
+        return Layer(
+            layer_name or name, effect, mode, fps=fps, opacity=opacity_steps(opacity),
+            loop_cache=LoopCache(fps) if bake else None, bake=bake,
+        )
+
+    def _set_layers(self, layers: list[Layer]) -> None:
+        """Install ``layers`` as the stack, closing effects that left it."""
+        previous = self._layers
+        for layer in previous:
+            if not any(layer is kept for kept in layers):
+                layer.generator.close()
+                self._retire(layer.buf)
+                layer.buf = None
+        for layer in layers:
+            if not any(layer is old for old in previous):
+                effect = layer.generator
+                if self._pending_text is not None and hasattr(effect, "set_text"):
+                    effect.set_text(self._pending_text)
+                    self._pending_text = None
+                self._pace(layer)
+            # Frame effects may sit on a different chain now: every
+            # layer renders again on the next tick
+            layer.due = 0.0
+            layer.source = None
+            layer.gain = None
+        self._layers = layers
+        self._fold_from = len(layers)
+        self._reset_gain()
+        self._release_effect_buffers()
+        if not layers:
+            # Re-display pure expression frame (bypass dedup since effects were cleared)
+            self._last_pushed_id = None
+            self._request_present()
+
+    def _release_effect_buffers(self) -> None:
+        self._base_arr = None
         self._last_base_arr_id = None
-        self._last_composited_bytes = None
-        self._effect_active.set()
-        logger.info("effect set: %s (fps=%d)", name, fps)
-        if self._pending_text is not None and hasattr(self._effect, "set_text"):
-            self._effect.set_text(self._pending_text)
-            self._pending_text = None
+        self._retire(self._front)
+        self._front = None
+        self._composite_inputs = None
 
-    def update_effect_params(self, params: dict) -> None:
-        if self._effect is not None:
-            self._effect.update_params(params)
+    def update_effect_params(self, params: dict, name: str | None = None) -> None:
+        """Update effect ``name``'s params, by default the active effect's."""
+        name = name or self._effect_name
+
+        def apply() -> None:
+            for layer in self._layers:
+                if layer.name == name:
+                    layer.generator.update_params(params)
+        self._post(apply)
 
     def clear_effect(self) -> None:
         logger.info("effect cleared")
-        self._effect = None
         self._effect_name = None
-        self._effect_frame = None
-        self._last_base_id = None
-        self._last_base_arr_id = None
-        self._last_composited_bytes = None
-        self._effect_active.clear()
-        # Re-display pure expression frame (bypass dedup since effect was cleared)
-        if self.last_frame is not None:
-            self._last_pushed_id = id(self.last_frame)
-            self.last_displayed_frame = self.last_frame
-            self._display.show_image(self.last_frame)
+        self._post(lambda: self._set_layers([]))
 
     def set_effect_text(self, text: str) -> None:
-        self._pending_text = text
-        if self._effect is not None and hasattr(self._effect, "set_text"):
-            self._effect.set_text(text)
+        def apply() -> None:
+            self._pending_text = text
+            for layer in self._layers:
+                if hasattr(layer.generator, "set_text"):
+                    layer.generator.set_text(text)
+        self._post(apply)
+
+    def _post(self, op: Callable[[], None]) -> None:
+        """Apply a state change on the render thread, or now if there is none."""
+        if self._thread is not None:
+            self._ops.append(op)
+            self._thread_wake.set()
+        else:
+            op()
+
+    def _drain_ops(self) -> None:
+        while self._ops:
+            self._ops.popleft()()
 
-    async def run_effect_loop(self) -> None:
+    async def run(self) -> None:
+        """Master frame loop; pushes at most one frame per clock tick.
+
+        Sleeps on an event while there is no effect and no new frame,
+        so an idle static expression costs nothing. In threaded mode
+        the loop runs on the render thread and this coroutine just
+        keeps it alive until cancelled.
+        """
+        if self._threaded:
+            await self._run_threaded()
+            return
+        clock = FrameClock(self._fps, self._drop_policy)
+        start = time.monotonic()
+        self._running = True
+        try:
+            clock.start()
+            while True:
+                if not self._dirty and not self._layers:
+                    self._wake.clear()
+                    await self._wake.wait()
+                    clock.start()
+                self._tick(time.monotonic() - start, clock.interval)
+                await asyncio.sleep(clock.advance())
+        finally:
+            self._running = False
+
+    async def _run_threaded(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._render_thread_main, name="render", daemon=True,
+        )
+        self._thread.start()
+        try:
+            await asyncio.Event().wait()
+        finally:
+            self._stop.set()
+            self._thread_wake.set()
+            self._thread.join(timeout=1.0)
+            self._thread = None
+            self._drain_ops()
+
+    def _render_thread_main(self) -> None:
+        clock = FrameClock(self._fps, self._drop_policy)
         start = time.monotonic()
-        while True:
-            # Sleep until an effect is active instead of polling
-            await self._effect_active.wait()
-            if self._effect is not None:
-                t = time.monotonic() - start
-                if isinstance(self._effect, FrameEffect) and self.last_frame is not None:
-                    # Only update _base_frame when the expression frame changes
-                    frame_id = id(self.last_frame)
-                    if frame_id != self._last_base_id:
-                        self._effect.set_base_frame(self.last_frame)
-                        self._last_base_id = frame_id
-                self._effect_frame = self._effect.render(t)
-                self._push_composited()
-            await asyncio.sleep(1.0 / self._effect_fps)
-
-    def _push_composited(self) -> None:
-        if self._effect_frame is None:
+        clock.start()
+        while not self._stop.is_set():
+            self._drain_ops()
+            if self._idle():
+                self._thread_wake.clear()
+                # Re-check: a post may have landed before the clear
+                if self._idle():
+                    self._thread_wake.wait()
+                clock.start()
+                continue
+            try:
+                self._tick(time.monotonic() - start, clock.interval)
+            except Exception:
+                logger.exception("render thread failed to present a frame")
+            self._stop.wait(clock.advance())
+
+    def _idle(self) -> bool:
+        return not self._dirty and not self._layers and not self._ops
+
+    # Kept for callers from before the loop also drove expression frames
+    run_effect_loop = run
+
+    def _tick(self, t: float, interval: float) -> None:
+        started = time.perf_counter()
+        governor = self.governor
+        # Half a tick of slack so a layer whose fps divides the
+        # pipeline's isn't pushed a whole tick late by scheduling jitter
+        due = [layer for layer in self._layers if t + interval / 2 >= layer.due]
+        if due:
+            self._render_layers(t, due)
+            for layer in due:
+                step = 1.0 / (layer.fps if governor is None else governor.fps(layer.fps))
+                layer.due += step
+                if layer.due <= t:
+                    layer.due = t + step
+        if due or self._dirty:
+            self._present()
+        if governor is not None and governor.record(t, time.perf_counter() - started, interval):
+            self._apply_governor()
+
+    def _apply_governor(self) -> None:
+        """Bake periodic generator layers while throttled: replaying a cycle is cheap.
+
+        Frame effects are left alone, as their cache resets with every
+        new base frame. Caches the governor added go once it stops
+        throttling. Offloaded layers pass the new rate on to their
+        workers.
+        """
+        throttled = self.governor.throttled
+        for layer in self._layers:
+            self._pace(layer)
+        for layer in self._layers[:self._fold_from]:
+            if layer.transforms or layer.bake:
+                continue
+            if throttled and layer.loop_cache is None and layer.generator.period is not None:
+                logger.info("baking effect %s while throttled", layer.name)
+                layer.loop_cache = LoopCache(layer.fps)
+                self._retire(layer.buf)
+                layer.buf = None
+                layer.key = None
+            elif not throttled and layer.loop_cache is not None:
+                logger.info("no longer baking effect %s", layer.name)
+                layer.loop_cache = None
+
+    def _pace(self, layer: Layer) -> None:
+        """Have an offloaded worker render at the rate its layer is sampled."""
+        if isinstance(layer.generator, OffloadedGenerator):
+            fps = layer.fps if self.governor is None else self.governor.fps(layer.fps)
+            layer.generator.set_rate(fps)
+
+    def _reset_gain(self) -> None:
+        if self._effect_gain is not None:
+            self._effect_gain = None
+            self._display.set_gain(1.0)
+
+    def _render_layers(self, t: float, due: list[Layer] | None = None) -> None:
+        """Sample the layers in ``due`` (default: all of them) at ``t``, bottom up.
+
+        Each frame effect takes the output of the frame effects below
+        it, or the expression frame, as its base frame.
+        """
+        if due is None:
+            due = self._layers
+        fold_from = self._fold_gains(t, due)
+        source = self.last_frame if self.last_frame is not None else self._black_frame
+        for layer in self._layers[:fold_from]:
+            if layer.transforms:
+                if layer in due:
+                    started = time.perf_counter()
+                    self._render_transform(layer, t, source)
+                    elapsed = time.perf_counter() - started
+                    layer.note_cost(elapsed)
+                    self.timings.record("effect", elapsed)
+                if layer.frame is not None:
+                    source = layer.frame
+            elif layer in due:
+                started = time.perf_counter()
+                self._render_generator(layer, t)
+                elapsed = time.perf_counter() - started
+                layer.note_cost(elapsed)
+                self.timings.record("render", elapsed)
+
+    def _fold_gains(self, t: float, due: list[Layer]) -> int:
+        """Fold the gains of intensity-only frame effects into the display's.
+
+        Only a run of them at the top of the stack folds, as the display
+        scales the whole pushed frame. Returns the index of the lowest
+        folded layer.
+        """
+        stack = self._layers
+        fold_from = len(stack)
+        if not stack[-1].transforms:
+            # Nothing to fold, and the gain was reset when stacked
+            self._fold_from = fold_from
+            return fold_from
+        gain = 1.0
+        sampled = False
+        while fold_from > 0:
+            layer = stack[fold_from - 1]
+            if not (layer.transforms and layer.replaces):
+                break
+            if layer in due:
+                layer.gain = layer.generator.gain(t)
+                sampled = True
+            if layer.gain is None:
+                break
+            gain *= layer.gain
+            fold_from -= 1
+        self._fold_from = fold_from
+        if fold_from == len(stack):
+            self._reset_gain()
+        elif sampled:
+            self._effect_gain = gain
+            self._display.set_gain(gain)
+        return fold_from
+
+    def _render_transform(self, layer: Layer, t: float, source: Frame) -> None:
+        effect = layer.generator
+        # Only hand over the base frame when it changes
+        new_source = source is not layer.source
+        if new_source:
+            effect.set_base_frame(frame_to_image(source))
+            layer.source = source
+        if layer.loop_cache is not None:
+            frame = layer.loop_cache.render(effect, t)
+        else:
+            frame = effect.render(t)
+        if not layer.replaces:
+            if not new_source and frame is layer.output and layer.buf is not None:
+                # buf already holds this blend
+                return
+            layer.output = frame
+            # Blended over its base into a fresh buffer; the last one
+            # may still be on the panel
+            self._retire(layer.buf)
+            layer.buf = self.frame_pool.acquire()
+            self._blend(layer, frame_to_array(source), frame_to_array(frame), layer.buf, _FULL)
+            frame = layer.buf
+        if frame is not layer.frame:
+            layer.version += 1
+        layer.frame = frame
+
+    def _render_generator(self, layer: Layer, t: float) -> None:
+        effect = layer.generator
+        if layer.loop_cache is not None:
+            frame = layer.loop_cache.render(effect, t)
+            if frame is not layer.frame:
+                layer.version += 1
+                self._note_layer_change(layer)
+            layer.frame = frame
+            return
+        key = effect.frame_key(t)
+        # An equal key means the buffer already holds this frame
+        if key is None or key != layer.key:
+            if layer.buf is None:
+                layer.buf = self.frame_pool.acquire()
+            effect.render_into(t, layer.buf)
+            layer.key = key
+            layer.version += 1
+            self._note_layer_change(layer)
+        layer.frame = layer.buf
+
+    def _note_layer_change(self, layer: Layer) -> None:
+        """Grow the layer's dirty rect by what a new frame may have changed."""
+        # Outside both the old and the new ink bounds both frames are black
+        bounds = layer.generator.ink_bounds
+        change = union_rect(layer.bounds, bounds)
+        layer.dirty = union_rect(layer.dirty, change)
+        layer.bounds = bounds
+
+    def _blend(
+        self,
+        layer: Layer,
+        below: np.ndarray,
+        above: np.ndarray,
+        out: np.ndarray,
+        region: tuple[slice, slice],
+    ) -> None:
+        """Blend ``layer``'s ``above`` over ``below`` into ``out`` within ``region``."""
+        if layer.mode is BlendMode.MAX:
+            if region is _FULL:
+                np.maximum(below, above, out=out)
+            else:
+                np.maximum(below[region], above[region], out=out[region])
+            return
+        scratch = None
+        if not layer.replaces:
+            if self._scratch is None:
+                self._scratch = np.empty((2, self.height, self.width, 3), dtype=np.uint16)
+            scratch = self._scratch[(slice(None), *region)]
+        blend(layer.mode, below[region], above[region], out[region], layer.opacity, scratch)
+
+    def _request_present(self) -> None:
+        """Present on the next tick, or right away when the loop isn't running."""
+        if self._thread is not None:
+            self._dirty = True
+            self._thread_wake.set()
+        elif self._running:
+            self._dirty = True
+            self._wake.set()
+        else:
+            self._present()
+
+    def _present(self) -> None:
+        self._dirty = False
+        self._push()
+        self._release_retired()
+
+    def _push(self) -> None:
+        if self._layers:
+            self._push_layers()
+            return
+        image, dirty = self._take_base()
+        self._push_frame(image, dirty)
+
+    def _push_frame(self, image: Frame | None, dirty: Rect | None) -> None:
+        if image is None:
             return
-        if isinstance(self._effect, FrameEffect):
-            self.last_displayed_frame = self._effect_frame
-            self._display.show_image(self._effect_frame)
+        # Skip if this exact image object was already pushed
+        frame_id = id(image)
+        if frame_id == self._last_pushed_id:
             return
-        base = self.last_frame
-        if base is None:
-            base = self._black_frame
-        # Cache base array conversion — only recompute when base frame changes
-        base_id = id(base)
-        if base_id != self._last_base_arr_id:
-            self._base_arr = np.asarray(base)
-            self._last_base_arr_id = base_id
-        effect_arr = np.asarray(self._effect_frame)
-        composited_arr = np.maximum(self._base_arr, effect_arr)
+        self._last_pushed_id = frame_id
+        self._pushed_gain = None
+        if self._push_kind != "frame":
+            dirty = None
+        self._push_kind = "frame"
+        self.last_displayed_frame = image
+        self._frame_seq += 1
+        self._show_on_display(image, dirty)
+
+    def _take_base(self) -> tuple[Frame | None, Rect | None]:
+        """The latest expression frame and its change since the last take."""
+        with self._frame_lock:
+            dirty, self._base_dirty = self._base_dirty, EMPTY_RECT
+            return self.last_frame, dirty
+
+    def _push_layers(self) -> None:
+        base, base_dirty = self._take_base()
+        # Output of the topmost frame effect, and the generators above it
+        top_layer: Layer | None = None
+        generators: list[Layer] = []
+        for layer in self._layers[:self._fold_from]:
+            if layer.frame is None:
+                continue
+            if layer.transforms:
+                top_layer = layer
+            else:
+                generators.append(layer)
+        if generators:
+            self._push_composited(base, base_dirty, top_layer, generators)
+        elif top_layer is None and self._effect_gain is None:
+            # Nothing rendered yet
+            self._push_frame(base, base_dirty)
+        else:
+            self._push_effect(base, top_layer)
+
+    def _push_effect(self, base: Frame | None, top_layer: Layer | None) -> None:
+        """Push the frame effects' output, or the expression frame, whole at the folded gain."""
+        if top_layer is not None:
+            frame = top_layer.frame
+        else:
+            frame = base if base is not None else self._black_frame
+        gain = None if self._effect_gain is None else gain_steps(self._effect_gain)
+        # The same frame at the same gain is already on the panel
+        if frame is self.last_displayed_frame and gain == self._pushed_gain:
+            return
+        self._pushed_gain = gain
+        self._push_kind = "effect"
+        self.last_displayed_frame = frame
+        self._frame_seq += 1
+        if gain is not None:
+            self._gain_seq = self._frame_seq
+            self._displayed_gain = gain
+        self._show_on_display(frame)
+
+    def _push_composited(
+        self,
+        base: Frame | None,
+        base_dirty: Rect | None,
+        top_layer: Layer | None,
+        generators: list[Layer],
+    ) -> None:
+        """Blend the generator layers over the frame below them and push the result."""
+        if top_layer is None:
+            below = base if base is not None else self._black_frame
+            inputs = [(below, -1)]
+        else:
+            below = top_layer.frame
+            inputs = [(below, top_layer.version)]
+        dirty_rects = []
+        for layer in generators:
+            inputs.append((layer.frame, layer.version))
+            dirty_rects.append(layer.dirty)
+            layer.dirty = EMPTY_RECT
+        previous = self._composite_inputs
+        comparable = previous is not None and len(previous) == len(inputs)
+        if comparable:
+            for (frame, version), (old, old_version) in zip(inputs, previous):
+                if frame is not old or version != old_version:
+                    break
+            else:
+                # None of the inputs changed since the last composite
+                return
+        self._composite_inputs = inputs
+        # Change against the composite on the panel
+        dirty = None
+        if comparable and self._push_kind == "composite" and self._front is not None:
+            (frame, version), (old, old_version) = inputs[0], previous[0]
+            if version == -1 and old_version == -1:
+                dirty = base_dirty
+            elif frame is old and version == old_version:
+                dirty = EMPTY_RECT
+            for rect, (frame, version), (old, old_version) in zip(
+                dirty_rects, inputs[1:], previous[1:],
+            ):
+                if frame is not old and version == old_version:
+                    # Swapped in without a render, so its change is unknown
+                    rect = None
+                dirty = union_rect(dirty, rect)
+        # Cache the array of the frame below — only recompute when it changes
+        below_id = id(below)
+        if below_id != self._last_base_arr_id:
+            self._base_arr = frame_to_array(below)
+            self._last_base_arr_id = below_id
+        composited = self.frame_pool.acquire()
+        update = union_rect(dirty, self._stale_rect(composited))
+        timings = self.timings
+        if not rect_is_empty(update):
+            started = time.perf_counter()
+            region = _FULL if update is None else rect_slices(update)
+            below_arr = self._base_arr
+            for layer in generators:
+                self._blend(layer, below_arr, np.asarray(layer.frame), composited, region)
+                below_arr = composited
+            timings.record("composite", time.perf_counter() - started)
         # Skip pushing if composited result is identical to last push
-        composited_bytes = composited_arr.tobytes()
-        if composited_bytes == self._last_composited_bytes:
+        started = time.perf_counter()
+        if dirty is None:
+            crc = zlib.crc32(composited)
+            if self._front is not None and self._front_crc is None:
+                self._front_crc = zlib.crc32(self._front)
+            same = self._front is not None and crc == self._front_crc
+        else:
+            crc = None
+            region = rect_slices(dirty)
+            same = rect_is_empty(dirty) or np.array_equal(
+                composited[region], self._front[region],
+            )
+        timings.record("dedup", time.perf_counter() - started)
+        if same:
+            # Now a copy of the front, so still up to date next time
+            self._note_composite(composited, self._composite_seq)
+            self.frame_pool.release(composited)
             return
-        self._last_composited_bytes = composited_bytes
-        composited_image = Image.fromarray(composited_arr, "RGB")
-        self.last_displayed_frame = composited_image
-        self._display.show_image(composited_image)
+        self._retire(self._front)
+        self._front = composited
+        self._front_crc = crc
+        self._composite_seq += 1
+        self._damage.append(dirty)
+        self._note_composite(composited, self._composite_seq)
+        self._pushed_gain = None
+        self._push_kind = "composite"
+        self.last_displayed_frame = composited
+        self._frame_seq += 1
+        started = time.perf_counter()
+        self._display.show_array(composited, dirty)
+        timings.record("push", time.perf_counter() - started)
+
+    def _note_composite(self, buf: np.ndarray, seq: int) -> None:
+        self._buffer_state[id(buf)] = (seq, self.frame_pool.leases(buf))
+
+    def _stale_rect(self, buf: np.ndarray) -> Rect | None:
+        """What changed since ``buf`` last held a composite; None if unknown.
+
+        Valid only if nobody else acquired it since, which its lease
+        count shows.
+        """
+        state = self._buffer_state.get(id(buf))
+        if state is None or self._front is None:
+            return None
+        seq, lease = state
+        behind = self._composite_seq - seq
+        if lease + 1 != self.frame_pool.leases(buf) or behind > len(self._damage):
+            return None
+        stale = EMPTY_RECT
+        for rect in itertools.islice(reversed(self._damage), behind):
+            stale = union_rect(stale, rect)
+        return stale
 
     def get_fps(self) -> float:
         if self._ema_interval <= 0:
@@ -143,19 +842,138 @@ class RenderPipeline:
         return 1.0 / self._ema_interval
 
     def get_jpeg(self, quality: int = 60) -> bytes | None:
-        """Return JPEG bytes of last_displayed_frame, cached until frame changes."""
-        frame = self.last_displayed_frame
-        if frame is None:
-            return None
-        fid = id(frame)
-        if fid != self._jpeg_frame_id:
+        """Return JPEG bytes of last_displayed_frame, cached until frame changes.
+
+        May be called from another thread than the render side: the
+        frame being encoded isn't returned to the pool meanwhile.
+        """
+        with self._jpeg_lock:
+            seq = self._frame_seq
+            frame = self.last_displayed_frame
+            if frame is None:
+                return None
+            if seq == self._jpeg_seq:
+                return self._jpeg_cache
+            self._jpeg_frame = frame
+        try:
+            started = time.perf_counter()
+            image = frame_to_image(frame)
+            if seq == self._gain_seq and self._displayed_gain < GAIN_ONE:
+                # Show the gain the display applied (brightness is left out)
+                image = image.point(intensity_lut(100, self._displayed_gain).tolist() * 3)
             buf = io.BytesIO()
-            frame.save(buf, format="JPEG", quality=quality)
+            image.save(buf, format="JPEG", quality=quality)
             self._jpeg_cache = buf.getvalue()
-            self._jpeg_frame_id = fid
+            self._jpeg_seq = seq
+            self.timings.record("jpeg", time.perf_counter() - started)
+        finally:
+            with self._jpeg_lock:
+                self._jpeg_frame = None
         return self._jpeg_cache
 
-    def show_image(self, image: Image.Image) -> None:
+    def get_metrics(self) -> dict:
+        """Frame rate, stage timing percentiles (ms), layer costs and governor state."""
+        governor = self.governor
+        layers = []
+        for layer in self._layers:
+            fps = layer.fps if governor is None else governor.fps(layer.fps)
+            layers.append({
+                "name": layer.name,
+                "fps": layer.fps,
+                "effective_fps": round(min(fps, self._fps), 1),
+                "cost": round(layer.cost * 1000.0, 3),
+                "baked": layer.loop_cache is not None,
+            })
+        metrics = {
+            "display_fps": round(self.get_fps(), 1),
+            "render_fps": self._fps,
+            "stages": self.timings.summary(),
+            "layers": layers,
+            "governor": None,
+        }
+        if governor is not None:
+            metrics["governor"] = {
+                "scale": round(governor.scale, 3),
+                "load": round(governor.load, 3),
+                "missed": round(governor.missed, 3),
+                "cpu_temp": governor.temperature,
+            }
+        return metrics
+
+    def _retire(self, frame: Frame | None) -> None:
+        """Queue a replaced pool frame for release; other frames are ignored."""
+        if self.frame_pool.owns(frame):
+            self._retired.append(frame)
+
+    def _release_retired(self) -> None:
+        """Return retired frames to the pool unless still shown or cached.
+
+        Runs on the render side, where nothing else is mid-read except
+        the frame :meth:`get_jpeg` may be encoding, which is checked
+        under its lock. Identity caches keyed on a released frame are
+        dropped, as the buffer comes back with new contents.
+        """
+        if not self._retired:
+            return
+        with self._jpeg_lock:
+            self._release_unused()
+
+    def _release_unused(self) -> None:
+        in_use = [
+            self.last_frame, self.last_displayed_frame, self._base_arr, self._front,
+            self._jpeg_frame,
+        ]
+        for layer in self._layers:
+            in_use.append(layer.buf)
+        pending: dict[int, np.ndarray] = {}
+        for _ in range(len(self._retired)):
+            frame = self._retired.popleft()
+            pending[id(frame)] = frame
+        for frame_id, frame in pending.items():
+            if any(frame is used for used in in_use):
+                self._retired.append(frame)
+                continue
+            if frame_id == self._last_pushed_id:
+                self._last_pushed_id = None
+            if frame_id == self._last_base_arr_id:
+                self._last_base_arr_id = None
+            for layer in self._layers:
+                if frame is layer.source:
+                    layer.source = None
+            if self._composite_inputs is not None and any(
+                frame is used for used, _ in self._composite_inputs
+            ):
+                self._composite_inputs = None
+            self.frame_pool.release(frame)
+
+    def _show_on_display(self, frame: Frame, dirty: Rect | None = None) -> None:
+        started = time.perf_counter()
+        show_frame(self._display, frame, dirty)
+        self.timings.record("push", time.perf_counter() - started)
+
+    def show_array(
+        self, frame: np.ndarray, dirty: Rect | None = None, source: object = None
+    ) -> None:
+        self.show_image(frame, dirty, source)
+
+    def show_indexed(
+        self, frame: IndexedFrame, dirty: Rect | None = None, source: object = None
+    ) -> None:
+        self.show_image(frame, dirty, source)
+
+    def show_image(
+        self, image: Frame, dirty: Rect | None = None, source: object = None
+    ) -> None:
+        """Post the latest expression frame.
+
+        ``dirty`` bounds its change from the frame ``source`` posted
+        before; None means unknown. It is dropped when the frame it
+        replaces came from another source (say the blink engine
+        cutting into an animation). With the render thread,
+        arrays not from :attr:`frame_pool` are copied into a pool
+        buffer first: a source may rewrite its array in place (delta
+        sequences decode into one buffer) while the thread reads it.
+        """
         now = time.monotonic()
         if self._last_frame_time > 0:
             dt = now - self._last_frame_time
@@ -164,31 +982,48 @@ class RenderPipeline:
             else:
                 self._ema_interval += 0.1 * (dt - self._ema_interval)
         self._last_frame_time = now
-        self.last_frame = image
-        if self._effect is not None and self._effect_frame is not None:
-            self._push_composited()
-        else:
-            # Skip if this exact image object was already pushed
-            frame_id = id(image)
-            if frame_id == self._last_pushed_id:
-                return
-            self._last_pushed_id = frame_id
-            self.last_displayed_frame = image
-            self._display.show_image(image)
+        if self._threaded and isinstance(image, np.ndarray) and not self.frame_pool.owns(image):
+            buf = self.frame_pool.acquire()
+            np.copyto(buf, image)
+            image = buf
+        with self._frame_lock:
+            previous = self.last_frame
+            self.last_frame = image
+            # The source's previous frame may not be what was shown
+            if previous is None or source is not self._base_source:
+                dirty = None
+            self._base_source = source
+            self._base_dirty = union_rect(self._base_dirty, dirty)
+        if previous is not image:
+            self._retire(previous)
+        self._request_present()
 
     def clear(self) -> None:
-        self.last_frame = None
+        self._retire(self.last_frame)
+        with self._frame_lock:
+            self.last_frame = None
         self.last_displayed_frame = None
-        self._last_pushed_id = None
-        self._last_composited_bytes = None
         self._jpeg_cache = None
-        self._jpeg_frame_id = None
+        self._post(self._clear_display)
+
+    def _clear_display(self) -> None:
+        self._last_pushed_id = None
+        self._push_kind = None
+        self._retire(self._front)
+        self._front = None
+        self._composite_inputs = None
         self._base_arr = None
         self._last_base_arr_id = None
+        self._frame_seq += 1
         self._display.clear()
 
+    def close(self) -> None:
+        """Release the effects' resources; call after the loop stops."""
+        for layer in self._layers:
+            layer.generator.close()
+
     def set_brightness(self, value: int) -> None:
-        self._display.set_brightness(value)
+        self._post(lambda: self._display.set_brightness(value))
 
     @property
     def brightness(self) -> int:
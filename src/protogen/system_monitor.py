@@ -26,7 +26,7 @@ class SystemMonitor:
         if self._cached_status is not None and (now - self._cache_time) < self._cache_ttl:
             return self._cached_status
         status = {
-            "cpu_temp": self._get_cpu_temp(),
+            "cpu_temp": self.get_cpu_temp(),
             "cpu_usage": self._get_cpu_usage(),
             "memory_used": self._get_memory_used(),
             "uptime": self._get_uptime(),
@@ -36,7 +36,8 @@ class SystemMonitor:
         self._cache_time = now
         return status
 
-    def _get_cpu_temp(self) -> float | None:
+    def get_cpu_temp(self) -> float | None:
+        """CPU temperature in °C, read now; cheaper than a full :meth:`get_status`."""
         if self._psutil is None:
             return None
         try:
@@ -1,5 +1,6 @@
 import asyncio
 
+import numpy as np
 import pytest
 from PIL import Image
 
@@ -26,3 +27,62 @@ async def test_play_loop_can_be_stopped(mock_display):
     await asyncio.sleep(0.1)
     engine.stop()
     await asyncio.wait_for(task, timeout=1.0)
+
+
+@pytest.mark.asyncio
+async def test_play_array_frames(mock_display):
+    """ndarray frames are pushed through show_array."""
+    frames = np.zeros((2, 32, 128, 3), dtype=np.uint8)
+    frames[1, :, :, 2] = 200
+    engine = AnimationEngine(mock_display)
+
+    await engine.play(list(frames), fps=60, loop=False)
+
+    assert mock_display.last_image.getpixel((0, 0)) == (0, 0, 200)
+
+
+@pytest.mark.asyncio
+async def test_play_drops_frames_to_keep_wall_clock(mock_display):
+    """A display slower than the frame interval causes drops, not slowdown."""
+    import time
+
+    class SlowDisplay:
+        def __init__(self):
+            self.shown = 0
+
+        def show_image(self, image):
+            self.shown += 1
+            time.sleep(0.03)
+
+    display = SlowDisplay()
+    frames = [Image.new("RGB", (128, 32)) for _ in range(10)]
+    engine = AnimationEngine(display)
+
+    start = time.monotonic()
+    await engine.play(frames, fps=100, loop=False)
+    elapsed = time.monotonic() - start
+
+    assert display.shown < 10
+    assert engine.stats.dropped > 0
+    assert engine.stats.late > 0
+    assert elapsed < 0.2
+
+
+@pytest.mark.asyncio
+async def test_play_passes_dirty_rects_of_consecutive_frames(mock_display):
+    frames = np.zeros((3, 32, 128, 3), dtype=np.uint8)
+    frames[1, 10:12, 40:50] = 255
+    frames[2, 10:12, 40:44] = 255
+    pushed = []
+    original = mock_display.show_array
+
+    def show_array(frame, dirty=None, source=None):
+        pushed.append(dirty)
+        original(frame, dirty, source)
+
+    mock_display.show_array = show_array
+    engine = AnimationEngine(mock_display)
+    await engine.play(list(frames), fps=20, loop=False)
+
+    # The first frame's predecessor is unknown; later ones only the blink
+    assert pushed == [None, (40, 10, 50, 12), (44, 10, 50, 12)]
@@ -15,3 +15,14 @@ def test_brightness_valid_values_unchanged():
     """Valid brightness values pass through unchanged."""
     cfg = DisplayConfig(brightness=50)
     assert cfg.brightness == 50
+
+
+def test_governor_section_loaded(tmp_path):
+    from protogen.config import Config
+
+    path = tmp_path / "config.yaml"
+    path.write_text("governor:\n  enabled: false\n  temp_high: 65.0\n", encoding="utf-8")
+    cfg = Config.load(path)
+    assert cfg.governor.enabled is False
+    assert cfg.governor.temp_high == 65.0
+    assert cfg.governor.min_fps == 5
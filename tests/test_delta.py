@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from protogen.delta import DeltaFrameSequence, encode_delta, write_delta_pack
+from protogen.framepack import FramePack
+from protogen.frames import diff_rect
+
+
+def _bw_frames(n: int, width: int = 16, height: int = 8) -> list[np.ndarray]:
+    """Black frames with a white bar that moves one pixel per frame."""
+    frames = []
+    for i in range(n):
+        arr = np.zeros((height, width, 3), dtype=np.uint8)
+        arr[2:5, i % width:i % width + 3] = 255
+        frames.append(arr)
+    return frames
+
+
+def test_delta_sequential_decode_matches_source():
+    frames = _bw_frames(20)
+    seq = DeltaFrameSequence.from_frames(frames, 16, 8, keyframe_interval=6)
+    for i, expected in enumerate(frames):
+        assert np.array_equal(seq[i], expected)
+
+
+def test_delta_random_access_seeks_from_keyframe():
+    frames = _bw_frames(20)
+    seq = DeltaFrameSequence.from_frames(frames, 16, 8, keyframe_interval=6)
+    for i in (13, 2, 19, 7, 7, 1):
+        assert np.array_equal(seq[i], frames[i])
+
+
+def test_delta_frame_zero_does_not_disturb_playback():
+    frames = _bw_frames(10)
+    seq = DeltaFrameSequence.from_frames(frames, 16, 8, keyframe_interval=30)
+    seq[4]
+    assert np.array_equal(seq[0], frames[0])
+    assert seq._pos == 4
+    assert np.array_equal(seq[5], frames[5])
+
+
+def test_delta_recolours_without_reencoding():
+    frames = _bw_frames(3)
+    seq = DeltaFrameSequence.from_frames(frames, 16, 8, color=(0, 255, 200))
+    assert tuple(seq[1][3, 1]) == (0, 255, 200)
+    assert tuple(seq[1][0, 0]) == (0, 0, 0)
+
+
+def test_delta_delta_frames_store_only_changes():
+    payloads = encode_delta(_bw_frames(3), 16, 8, keyframe_interval=30)
+    assert len(payloads[0]) == 16 * 8 // 8  # packed keyframe
+    # The bar moves right by one: 3 rows x (1 pixel off + 1 pixel on) = 6 runs
+    assert len(payloads[1]) == 6 * 2 * 2
+
+
+def test_delta_memory_much_smaller_than_rgb():
+    frames = _bw_frames(200, 128, 32)
+    seq = DeltaFrameSequence.from_frames(frames, 128, 32)
+    assert seq.nbytes * 10 < sum(f.nbytes for f in frames)
+
+
+def test_delta_pack_roundtrip(tmp_path):
+    frames = _bw_frames(12)
+    path = tmp_path / "anim.pack"
+    assert write_delta_pack(path, frames, 16, 8, keyframe_interval=5) == 12
+
+    pack = FramePack(path)
+    assert pack.param == 5
+    with pytest.raises(ValueError):
+        pack.read_array(0)
+    seq = DeltaFrameSequence.from_pack(pack)
+    for i, expected in enumerate(frames):
+        assert np.array_equal(seq[i], expected)
+
+
+def test_delta_dirty_rect_covers_toggled_pixels():
+    frames = _bw_frames(20)
+    frames[7][7, 15] = 255  # a lone pixel far from the bar
+    seq = DeltaFrameSequence.from_frames(frames, 16, 8, keyframe_interval=6)
+    for i in range(1, 20):
+        rect = seq.dirty_rect(i)
+        if i % 6 == 0:
+            assert rect is None
+            continue
+        x0, y0, x1, y1 = diff_rect(frames[i - 1], frames[i])
+        assert rect[0] <= x0 and rect[1] <= y0 and rect[2] >= x1 and rect[3] >= y1
+        # Runs inside one row give the exact box
+        if i not in (7, 8):
+            assert rect == (x0, y0, x1, y1)
@@ -94,10 +94,19 @@ async def _process_command(
     elif cmd.event == InputEvent.SET_EFFECT_WITH_PARAMS:
         effect = effects.get(cmd.value["name"])
         if effect is not None:
-            pipeline.set_effect(
+            if not any(layer.name == effect.name for layer in pipeline.layers):
+                pipeline.set_effect(
+                    effect.generator_name, effect.generator_params, effect.fps,
+                    layer_name=effect.name,
+                )
+            pipeline.update_effect_params(cmd.value.get("params", {}), name=effect.name)
+    elif cmd.event == InputEvent.ADD_EFFECT:
+        effect = effects.get(cmd.value)
+        if effect is not None:
+            pipeline.add_effect(
                 effect.generator_name, effect.generator_params, effect.fps,
+                layer_name=effect.name,
             )
-            pipeline.update_effect_params(cmd.value.get("params", {}))
 
 
 # ---------------------------------------------------------------------------
@@ -184,7 +193,7 @@ async def test_set_effect_through_pipeline(mock_display):
     await _process_command(cmd, expr_mgr, pipeline, effects, mock_display)
 
     assert pipeline.active_effect_name == "matrix_rain"
-    assert pipeline._effect is not None
+    assert pipeline.layers
 
 
 @pytest.mark.asyncio
@@ -211,12 +220,36 @@ async def test_clear_effect_through_pipeline(mock_display):
     await _process_command(cmd, expr_mgr, pipeline, effects, mock_display)
 
     assert pipeline.active_effect_name is None
-    assert pipeline._effect is None
+    assert not pipeline.layers
     # After clearing, the display should show the original expression
     assert mock_display.last_image is not None
     assert mock_display.last_image.getpixel((0, 0)) == (0, 255, 0)
 
 
+@pytest.mark.asyncio
+async def test_effect_params_keep_the_other_stacked_layers(mock_display):
+    """SET_EFFECT_WITH_PARAMS on a stacked effect updates it in place."""
+    store, _ = _make_store("happy")
+    pipeline = RenderPipeline(mock_display)
+    expr_mgr = ExpressionManager(pipeline, store)
+    input_mgr = InputManager()
+    effects = _make_effects()
+
+    await input_mgr.put(Command(event=InputEvent.ADD_EFFECT, value="matrix_rain"))
+    await input_mgr.put(Command(event=InputEvent.ADD_EFFECT, value="starfield"))
+    await input_mgr.put(Command(
+        event=InputEvent.SET_EFFECT_WITH_PARAMS,
+        value={"name": "matrix_rain", "params": {"speed": 2.5}},
+    ))
+    for _ in range(3):
+        cmd = await input_mgr.get()
+        await _process_command(cmd, expr_mgr, pipeline, effects, mock_display)
+
+    assert [layer.name for layer in pipeline.layers] == ["matrix_rain", "starfield"]
+    assert pipeline.layers[0].generator.params["speed"] == 2.5
+    assert pipeline.layers[1].generator.params["speed"] == 1.0
+
+
 @pytest.mark.asyncio
 async def test_multiple_commands_in_sequence(mock_display):
     """Multiple commands processed in order produce the correct final state."""
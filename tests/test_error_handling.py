@@ -240,3 +240,17 @@ def test_effect_defaults_when_optional_keys_omitted(tmp_path):
     result = load_effects(tmp_path)
     assert result["minimal"].generator_params == {}
     assert result["minimal"].fps == 20
+    assert result["minimal"].blend is None
+    assert result["minimal"].opacity == 1.0
+
+
+def test_unknown_blend_mode_raises(tmp_path):
+    """An effect with an unknown blend mode fails at load, not when stacked."""
+    _write_manifest(tmp_path, {
+        "effects": {
+            "odd": {"generator": "plasma", "blend": "screen"},
+        },
+    })
+
+    with pytest.raises(ValueError):
+        load_effects(tmp_path)
@@ -57,3 +57,79 @@ def test_expression_animation(tmp_path):
     assert len(expressions["blink"].frames) == 3
 
 
+
+
+def _write_animation_manifest(tmp_path, entry):
+    import json
+    manifest = {"expressions": {"anim": {"type": "animation", **entry}}}
+    (tmp_path / "manifest.json").write_text(json.dumps(manifest))
+
+
+def test_expression_animation_prefers_pack(tmp_path):
+    from PIL import Image
+    from protogen.framepack import write_framepack
+
+    frames = [Image.new("RGB", (128, 32), (0, i * 50, 0)) for i in range(4)]
+    write_framepack(tmp_path / "anim.pack", frames, 128, 32)
+    _write_animation_manifest(tmp_path, {"pack": "anim.pack", "frames_dir": "missing"})
+
+    expressions = load_expressions(tmp_path)
+    assert len(expressions["anim"].frames) == 4
+    assert tuple(expressions["anim"].frames[2][0, 0]) == (0, 100, 0)
+
+
+def test_expression_animation_raw_pack_is_memory_mapped(tmp_path):
+    import numpy as np
+    from PIL import Image
+    from protogen.framepack import write_framepack
+
+    frames = [Image.new("RGB", (128, 32), (i, 0, 0)) for i in range(3)]
+    write_framepack(tmp_path / "anim.pack", frames, 128, 32, "raw")
+    _write_animation_manifest(tmp_path, {"pack": "anim.pack"})
+
+    anim = load_expressions(tmp_path)["anim"]
+    frame = anim.frames[1]
+    assert isinstance(frame.base, np.memmap)
+    assert frame.shape == (32, 128, 3)
+    assert frame[0, 0, 0] == 1
+
+
+def test_expression_animation_bad_pack_falls_back(tmp_path):
+    from PIL import Image
+
+    anim_dir = tmp_path / "frames"
+    anim_dir.mkdir()
+    for i in range(2):
+        Image.new("RGB", (128, 32)).save(anim_dir / f"frame_{i:02d}.png")
+    (tmp_path / "anim.pack").write_bytes(b"garbage")
+    _write_animation_manifest(tmp_path, {"pack": "anim.pack", "frames_dir": "frames"})
+
+    expressions = load_expressions(tmp_path)
+    assert len(expressions["anim"].frames) == 2
+
+
+def test_expression_animation_delta_encoding(tmp_path):
+    import numpy as np
+    from PIL import Image
+    from protogen.delta import DeltaFrameSequence
+
+    anim_dir = tmp_path / "frames"
+    anim_dir.mkdir()
+    for i in range(3):
+        img = Image.new("RGB", (128, 32))
+        img.putpixel((i, 0), (255, 255, 255))
+        img.save(anim_dir / f"frame_{i:02d}.png")
+    _write_animation_manifest(tmp_path, {
+        "frames_dir": "frames", "encoding": "delta", "color": [0, 255, 255],
+    })
+
+    frames = load_expressions(tmp_path)["anim"].frames
+    assert isinstance(frames, DeltaFrameSequence)
+    assert tuple(frames[2][0, 2]) == (0, 255, 255)
+    assert not np.any(frames[2][0, :2])
+
+
+def test_expression_animation_unknown_encoding_skipped(tmp_path):
+    _write_animation_manifest(tmp_path, {"frames_dir": "frames", "encoding": "hologram"})
+    (tmp_path / "frames").mkdir()
+    assert "anim" not in load_expressions(tmp_path)
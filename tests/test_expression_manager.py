@@ -95,6 +95,57 @@ async def test_transition_cross_fade(mock_display):
     assert pixel == (0, 0, 255)
 
 
+@pytest.mark.asyncio
+async def test_transition_frames_come_from_pipeline_pool(mock_display):
+    pipeline = RenderPipeline(mock_display)
+    store = ExpressionStore({
+        "red": Expression(
+            name="red", type=ExpressionType.STATIC,
+            image=Image.new("RGB", (128, 32), (255, 0, 0)),
+        ),
+        "blue": Expression(
+            name="blue", type=ExpressionType.STATIC,
+            image=Image.new("RGB", (128, 32), (0, 0, 255)),
+        ),
+    })
+    mgr = ExpressionManager(pipeline, store, transition_duration_ms=300)
+    mgr.set_expression("red")
+    mgr.set_expression("blue")
+    await asyncio.sleep(0.1)
+    assert pipeline.frame_pool.owns(pipeline.last_frame)
+    await asyncio.sleep(0.35)
+
+    # Each blend went back to the pool once the next one replaced it
+    assert pipeline.frame_pool.available == pipeline.frame_pool.allocated
+    assert pipeline.frame_pool.allocated <= 4
+
+
+@pytest.mark.asyncio
+async def test_transition_frames_carry_changed_region(mock_display):
+    pipeline = RenderPipeline(mock_display)
+    calm = Image.new("RGB", (128, 32), (0, 40, 0))
+    wink = calm.copy()
+    wink.paste((255, 255, 0), (90, 8, 110, 14))
+    store = ExpressionStore({
+        "calm": Expression(name="calm", type=ExpressionType.STATIC, image=calm),
+        "wink": Expression(name="wink", type=ExpressionType.STATIC, image=wink),
+    })
+    rects = []
+    original = pipeline.show_array
+
+    def show_array(frame, dirty=None, source=None):
+        rects.append(dirty)
+        original(frame, dirty, source)
+
+    pipeline.show_array = show_array
+    mgr = ExpressionManager(pipeline, store, transition_duration_ms=100)
+    mgr.set_expression("calm")
+    mgr.set_expression("wink")
+    await asyncio.sleep(0.2)
+
+    assert rects and set(rects) == {(90, 8, 110, 14)}
+
+
 @pytest.mark.asyncio
 async def test_transition_skipped_when_zero(mock_display):
     """With transition_duration_ms=0, expression switches immediately."""
@@ -0,0 +1,59 @@
+import pytest
+
+from protogen.frame_clock import DropPolicy, FrameClock
+
+
+class FakeTime:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_deadlines_are_absolute():
+    """Render time is absorbed by the wait instead of adding to it."""
+    fake = FakeTime()
+    clock = FrameClock(10, clock=fake)
+    clock.start()
+    fake.now = 0.03  # frame 0 took 30 ms to render
+    assert clock.advance() == pytest.approx(0.07)
+    fake.now = 0.1 + 0.05
+    assert clock.advance() == pytest.approx(0.05)
+    assert clock.stats.late == 0
+
+
+def test_drop_policy_skips_to_due_frame():
+    fake = FakeTime()
+    clock = FrameClock(10, DropPolicy.DROP, clock=fake)
+    clock.start()
+    fake.now = 0.35  # stalled for three and a half frames
+    assert clock.advance() == 0.0
+    assert clock.frame == 3
+    assert clock.stats.late == 1
+    assert clock.stats.dropped == 2
+
+
+def test_catch_up_policy_keeps_every_frame():
+    fake = FakeTime()
+    clock = FrameClock(10, DropPolicy.CATCH_UP, clock=fake)
+    clock.start()
+    fake.now = 0.35
+    assert clock.advance() == 0.0
+    assert clock.frame == 1
+    assert clock.advance() == 0.0
+    assert clock.advance() == 0.0
+    assert clock.advance() == pytest.approx(0.05)  # caught up with frame 4
+    assert clock.stats.dropped == 0
+    assert clock.stats.late == 3
+
+
+def test_start_resets_stats():
+    fake = FakeTime()
+    clock = FrameClock(10, clock=fake)
+    clock.start()
+    fake.now = 1.0
+    clock.advance()
+    clock.start()
+    assert clock.frame == 0
+    assert clock.stats.presented == 0
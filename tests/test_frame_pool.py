@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from protogen.frame_pool import FramePool
+
+
+def test_acquire_reuses_released_buffers_oldest_first():
+    pool = FramePool((4, 8, 3), count=2)
+    a = pool.acquire()
+    b = pool.acquire()
+    assert a.shape == (4, 8, 3) and a.dtype == np.uint8
+    assert a is not b
+    pool.release(b)
+    pool.release(a)
+    assert pool.acquire() is b
+    assert pool.acquire() is a
+    assert pool.allocated == 2
+
+
+def test_acquire_grows_when_empty():
+    pool = FramePool((2, 2, 3), count=1)
+    first = pool.acquire()
+    second = pool.acquire()
+    assert first is not second
+    assert pool.allocated == 2
+    assert pool.available == 0
+    pool.release(first)
+    pool.release(second)
+    assert pool.available == 2
+
+
+def test_release_rejects_foreign_frames():
+    pool = FramePool((2, 2, 3), count=1)
+    assert not pool.owns(np.zeros((2, 2, 3), dtype=np.uint8))
+    assert not pool.owns(None)
+    with pytest.raises(ValueError):
+        pool.release(np.zeros((2, 2, 3), dtype=np.uint8))
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from protogen.framepack import FramePack, write_framepack
+
+
+def _frames(n: int) -> list[Image.Image]:
+    return [Image.new("RGB", (16, 8), (i * 10, 255 - i, 7)) for i in range(n)]
+
+
+@pytest.mark.parametrize("encoding", ["raw", "zlib"])
+def test_framepack_roundtrip(tmp_path, encoding):
+    path = tmp_path / "anim.pack"
+    frames = _frames(5)
+    assert write_framepack(path, frames, 16, 8, encoding) == 5
+
+    pack = FramePack(path)
+    assert len(pack) == 5
+    assert (pack.width, pack.height) == (16, 8)
+    for i, frame in enumerate(frames):
+        assert np.array_equal(pack.read_array(i), np.asarray(frame))
+    assert pack.read_frame(3).getpixel((0, 0)) == (30, 252, 7)
+
+
+def test_framepack_zlib_is_smaller(tmp_path):
+    write_framepack(tmp_path / "raw.pack", _frames(10), 16, 8, "raw")
+    write_framepack(tmp_path / "zlib.pack", _frames(10), 16, 8, "zlib")
+    assert (tmp_path / "zlib.pack").stat().st_size < (tmp_path / "raw.pack").stat().st_size
+
+
+def test_framepack_rejects_wrong_size(tmp_path):
+    with pytest.raises(ValueError):
+        write_framepack(tmp_path / "bad.pack", [Image.new("RGB", (4, 4))], 16, 8)
+
+
+def test_framepack_rejects_bad_magic(tmp_path):
+    path = tmp_path / "junk.pack"
+    path.write_bytes(b"NOPE" + b"\x00" * 32)
+    with pytest.raises(ValueError):
+        FramePack(path)
+
+
+def test_framepack_rejects_truncated(tmp_path):
+    path = tmp_path / "anim.pack"
+    write_framepack(path, _frames(3), 16, 8, "raw")
+    path.write_bytes(path.read_bytes()[:-10])
+    with pytest.raises(ValueError):
+        FramePack(path)
+
+
+def test_framepack_raw_as_array(tmp_path):
+    path = tmp_path / "anim.pack"
+    write_framepack(path, _frames(4), 16, 8, "raw")
+    arr = FramePack(path).as_array()
+    assert isinstance(arr, np.memmap)
+    assert arr.shape == (4, 8, 16, 3)
+    assert tuple(arr[2, 0, 0]) == (20, 253, 7)
+
+
+def test_framepack_zlib_as_array_raises(tmp_path):
+    path = tmp_path / "anim.pack"
+    write_framepack(path, _frames(2), 16, 8, "zlib")
+    with pytest.raises(ValueError):
+        FramePack(path).as_array()
@@ -0,0 +1,126 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from protogen.frames import (
+    EMPTY_RECT, IndexedFrame, LazyFrameSequence, diff_rect, frame_to_array,
+    load_indexed, png_loader, union_rect,
+)
+
+
+def _counting_loader(calls: list[int]):
+    def load(index: int) -> Image.Image:
+        calls.append(index)
+        return Image.new("RGB", (4, 4), (index, 0, 0))
+    return load
+
+
+def test_lazy_sequence_decodes_nothing_up_front():
+    calls: list[int] = []
+    seq = LazyFrameSequence(100, _counting_loader(calls))
+    assert len(seq) == 100
+    assert calls == []
+    assert seq.cached_count == 0
+
+
+def test_lazy_sequence_returns_requested_frame():
+    seq = LazyFrameSequence(10, _counting_loader([]), prefetch=2)
+    assert seq[3].getpixel((0, 0)) == (3, 0, 0)
+    assert seq[-1].getpixel((0, 0)) == (9, 0, 0)
+
+
+def test_lazy_sequence_evicts_played_frames():
+    """Only frame 0 and the prefetch window stay resident."""
+    seq = LazyFrameSequence(100, _counting_loader([]), prefetch=4)
+    for i in range(50):
+        seq[i]
+    assert set(seq._cache) == {0, 49, 50, 51, 52, 53}
+
+
+def test_lazy_sequence_prefetch_wraps_for_loops():
+    seq = LazyFrameSequence(10, _counting_loader([]), prefetch=3)
+    seq[8]
+    assert set(seq._cache) == {0, 8, 9, 1}
+
+
+def test_lazy_sequence_short_animation_fully_cached():
+    """Animations shorter than the window are decoded once and kept."""
+    calls: list[int] = []
+    seq = LazyFrameSequence(5, _counting_loader(calls), prefetch=16)
+    for _ in range(3):
+        list(seq)
+    assert sorted(calls) == [0, 1, 2, 3, 4]
+
+
+def test_lazy_sequence_index_error():
+    seq = LazyFrameSequence(3, _counting_loader([]))
+    with pytest.raises(IndexError):
+        seq[3]
+
+
+def test_png_loader_indexes_few_colour_frames(tmp_path):
+    path = tmp_path / "frame_00.png"
+    Image.new("L", (8, 4), 200).save(path)
+    frame = png_loader([path])(0)
+    assert isinstance(frame, IndexedFrame)
+    assert frame.size == (8, 4)
+    assert tuple(frame.to_array()[0, 0]) == (200, 200, 200)
+
+
+def test_load_indexed_keeps_rgb_for_many_colours(tmp_path):
+    path = tmp_path / "gradient.png"
+    arr = np.random.default_rng(0).integers(0, 256, (32, 32, 3), dtype=np.uint8)
+    Image.fromarray(arr, "RGB").save(path)
+    frame = load_indexed(path)
+    assert isinstance(frame, Image.Image)
+    assert frame.mode == "RGB"
+
+
+def test_indexed_frame_roundtrip():
+    arr = np.zeros((4, 6, 3), dtype=np.uint8)
+    arr[1, 2] = (0, 255, 200)
+    arr[3, 5] = (10, 20, 30)
+    frame = IndexedFrame.from_array(arr)
+    assert frame.indices.dtype == np.uint8
+    assert frame.indices.shape == (4, 6)
+    assert len(frame.palette) == 3
+    assert np.array_equal(frame.to_array(), arr)
+    assert np.array_equal(frame_to_array(frame), arr)
+
+
+def test_indexed_frame_recolour_shares_indices():
+    arr = np.zeros((2, 2, 3), dtype=np.uint8)
+    arr[0, 0] = (0, 255, 255)
+    frame = IndexedFrame.from_array(arr)
+    red = frame.with_palette([(0, 0, 0), (255, 0, 0)])
+    assert red.indices is frame.indices
+    assert tuple(red.to_array()[0, 0]) == (255, 0, 0)
+
+
+def test_indexed_frame_too_many_colours():
+    arr = np.zeros((1, 300, 3), dtype=np.uint8)
+    arr[0, :, 0] = np.arange(300) % 256
+    arr[0, :, 1] = np.arange(300) // 256
+    assert IndexedFrame.from_array(arr) is None
+
+
+def test_union_rect_treats_none_as_everything_and_skips_empty():
+    assert union_rect((1, 2, 3, 4), (0, 3, 2, 9)) == (0, 2, 3, 9)
+    assert union_rect(EMPTY_RECT, (1, 2, 3, 4)) == (1, 2, 3, 4)
+    assert union_rect((1, 2, 3, 4), None) is None
+
+
+def test_diff_rect_bounds_changed_pixels():
+    a = np.zeros((8, 16, 3), dtype=np.uint8)
+    b = a.copy()
+    assert diff_rect(a, b) == EMPTY_RECT
+    b[2, 5, 1] = 9
+    b[4, 3] = 1
+    assert diff_rect(a, b) == (3, 2, 6, 5)
+    assert diff_rect(a, np.zeros((4, 4, 3), dtype=np.uint8)) is None
+
+    ia, ib = IndexedFrame.from_array(a), IndexedFrame.from_array(b)
+    assert diff_rect(ia, ib) == (3, 2, 6, 5)
+    # Same palette: only the indices are compared
+    recoloured = ia.with_palette(ia.palette)
+    assert diff_rect(ia, recoloured) == EMPTY_RECT
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw
+
+from protogen.generators.glyphs import color_ramp, default_font, get_atlas
+
+TEXTS = ["PROTOGEN", "Hello, World!", "AVA Tj ffj //\\\\ gjpqy", "  lead", " ", ""]
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_atlas_bbox_matches_font(text):
+    font = default_font()
+    assert get_atlas(font).getbbox(text) == font.getbbox(text)
+
+
+@pytest.mark.parametrize("xy", [(5, 8), (-3, -2), (90, 25)])
+@pytest.mark.parametrize("text", TEXTS)
+def test_atlas_draw_matches_imagedraw(text, xy):
+    font = default_font()
+    expected = Image.new("L", (100, 30))
+    ImageDraw.Draw(expected).text(xy, text, fill=255, font=font)
+    canvas = np.zeros((30, 100), dtype=np.uint8)
+    get_atlas(font).draw(canvas, xy, text)
+    np.testing.assert_array_equal(canvas, np.asarray(expected))
+
+
+def test_atlas_caches_glyphs_per_font():
+    atlas = get_atlas(default_font())
+    assert get_atlas(default_font()) is atlas
+    assert atlas.glyph("A") is atlas.glyph("A")
+    assert not atlas.glyph("A").mask.flags.writeable
+
+
+def test_color_ramp_matches_imagedraw_fill():
+    font = default_font()
+    color = (13, 200, 77)
+    expected = Image.new("RGB", (60, 16))
+    ImageDraw.Draw(expected).text((2, 2), "Ag&", fill=color, font=font)
+    canvas = np.zeros((16, 60), dtype=np.uint8)
+    get_atlas(font).draw(canvas, (2, 2), "Ag&")
+    np.testing.assert_array_equal(color_ramp(color)[canvas], np.asarray(expected))
@@ -0,0 +1,66 @@
+from protogen.governor import FrameGovernor
+
+
+def _run(governor, seconds, busy, interval=1 / 30, start=0.0):
+    """Tick at 30 fps for ``seconds``, each tick busy for ``busy`` seconds."""
+    changed = False
+    for i in range(round(seconds * 30) + 1):
+        changed |= governor.record(start + i * interval, busy, interval)
+    return changed
+
+
+def test_overload_lowers_scale_in_proportion():
+    governor = FrameGovernor(max_load=0.5, period=1.0)
+    # 30 ticks of 25 ms each: 75% of the time busy
+    assert _run(governor, 1.0, 0.025)
+    assert abs(governor.load - 0.775) < 0.01
+    assert abs(governor.scale - 0.5 / governor.load) < 1e-9
+    assert governor.throttled
+
+
+def test_missed_frames_lower_scale_even_at_low_load():
+    governor = FrameGovernor(max_load=0.9, period=1.0)
+    for i in range(31):
+        governor.record(i / 30, 0.05 if i % 5 == 0 else 0.0, 1 / 30)
+    assert governor.missed > governor.max_missed
+    assert governor.scale < 1.0
+
+
+def test_scale_recovers_in_steps_with_headroom():
+    governor = FrameGovernor(max_load=0.5, period=1.0)
+    governor.scale = 0.5
+    _run(governor, 1.0, 0.001)
+    assert abs(governor.scale - 0.6) < 1e-9
+    for second in range(1, 10):
+        _run(governor, 1.0, 0.001, start=second + 1 / 30)
+    assert governor.scale == 1.0
+    assert not governor.throttled
+
+
+def test_temperature_caps_scale():
+    temps = iter([75.0, 85.0, 60.0])
+    governor = FrameGovernor(temp_high=70.0, temp_critical=80.0, period=1.0,
+                             read_temp=lambda: next(temps))
+    _run(governor, 1.0, 0.0)
+    assert governor.temperature == 75.0
+    assert abs(governor.scale - 0.5) < 1e-9
+    _run(governor, 1.0, 0.0, start=1 + 1 / 30)
+    assert governor.scale == 0.0
+    # Cooled down: the cap lifts, the scale only grows a step at a time
+    _run(governor, 1.0, 0.0, start=2 + 2 / 30)
+    assert abs(governor.scale - 0.1) < 1e-9
+
+
+def test_unknown_temperature_is_ignored():
+    governor = FrameGovernor(period=1.0, read_temp=lambda: None)
+    assert not _run(governor, 1.0, 0.001)
+    assert governor.scale == 1.0
+
+
+def test_fps_floor():
+    governor = FrameGovernor(min_fps=5)
+    governor.scale = 0.0
+    assert governor.fps(30) == 5
+    assert governor.fps(3) == 3
+    governor.scale = 0.5
+    assert governor.fps(30) == 15
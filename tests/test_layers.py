@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from protogen.layers import OPAQUE, BlendMode, blend, opacity_steps
+
+
+def _reference(mode, below, above, opacity):
+    b = below.astype(np.int64)
+    a = above.astype(np.int64)
+    if mode is BlendMode.MAX:
+        return np.maximum(b, a)
+    if mode is BlendMode.ADD:
+        return np.minimum(b + a, 255)
+    if mode is BlendMode.MULTIPLY:
+        return np.floor(b * a / 255 + 0.5).astype(np.int64)
+    return (b * (OPAQUE - opacity) + a * opacity) >> 8
+
+
+@pytest.mark.parametrize("mode", list(BlendMode))
+@pytest.mark.parametrize("opacity", [0, 1, 77, 128, 255, OPAQUE])
+def test_blend_matches_reference(mode, opacity):
+    rng = np.random.default_rng(3)
+    below = rng.integers(0, 256, (9, 17, 3), dtype=np.uint8)
+    above = rng.integers(0, 256, (9, 17, 3), dtype=np.uint8)
+    # Saturated and black pixels
+    below[0, :, 0] = above[0, :, 0] = 255
+    below[1, :, :] = 0
+    out = np.empty_like(below)
+    blend(mode, below, above, out, opacity)
+    np.testing.assert_array_equal(out, _reference(mode, below, above, opacity))
+
+
+def test_multiply_is_exact_over_all_values():
+    values = np.arange(256, dtype=np.uint8)
+    below = np.repeat(values, 256).reshape(256, 256, 1)
+    above = np.tile(values, 256).reshape(256, 256, 1)
+    out = np.empty_like(below)
+    blend(BlendMode.MULTIPLY, below, above, out)
+    expected = (below.astype(np.int64) * above + 127) // 255
+    np.testing.assert_array_equal(out, expected)
+
+
+def test_blend_in_place_over_region_with_scratch():
+    rng = np.random.default_rng(4)
+    below = rng.integers(0, 256, (8, 8, 3), dtype=np.uint8)
+    above = rng.integers(0, 256, (8, 8, 3), dtype=np.uint8)
+    expected = below.copy()
+    expected[2:5, 1:7] = _reference(BlendMode.ADD, below[2:5, 1:7], above[2:5, 1:7], OPAQUE)
+    scratch = np.empty((2, 8, 8, 3), dtype=np.uint16)
+    region = (slice(2, 5), slice(1, 7))
+    blend(BlendMode.ADD, below[region], above[region], below[region],
+          scratch=scratch[(slice(None), *region)])
+    np.testing.assert_array_equal(below, expected)
+
+
+def test_opacity_steps_clamps():
+    assert opacity_steps(1.0) == OPAQUE
+    assert opacity_steps(0.5) == 128
+    assert opacity_steps(-1.0) == 0
+    assert opacity_steps(3.0) == OPAQUE
@@ -0,0 +1,98 @@
+import numpy as np
+from PIL import Image
+
+from protogen.generators import ProceduralGenerator
+from protogen.generators.breathe import BreatheEffect
+from protogen.generators.loop_cache import LoopCache
+from protogen.generators.plasma import PlasmaGenerator
+from protogen.generators.scrolling_text import ScrollingTextGenerator
+
+
+class CountingGenerator(ProceduralGenerator):
+    """Period 1 s; pixel value encodes the render time."""
+
+    def __init__(self, width, height, params):
+        super().__init__(width, height, params)
+        self.calls = 0
+
+    @property
+    def period(self):
+        return self.params.get("period", 1.0)
+
+    def render(self, t):
+        self.calls += 1
+        value = int(t * 100) % 256
+        return Image.new("RGB", (self.width, self.height), (value, 0, 0))
+
+
+def test_second_cycle_is_served_from_cache():
+    gen = CountingGenerator(8, 4, {})
+    cache = LoopCache(fps=10)
+    first = [cache.render(gen, i / 10).copy() for i in range(10)]
+    assert gen.calls == 10
+    assert cache.complete
+    second = [cache.render(gen, 1.0 + i / 10) for i in range(10)]
+    assert gen.calls == 10
+    for a, b in zip(first, second):
+        np.testing.assert_array_equal(a, b)
+    # A replayed slot is the same object, so consumers can dedup by identity
+    assert cache.render(gen, 0.0) is cache.render(gen, 1.0)
+
+
+def test_frames_rendered_at_slot_times():
+    gen = CountingGenerator(8, 4, {})
+    cache = LoopCache(fps=10)
+    frame = cache.render(gen, 0.35)
+    assert frame[0, 0, 0] == 30
+
+
+def test_update_params_invalidates():
+    gen = CountingGenerator(8, 4, {})
+    cache = LoopCache(fps=10)
+    for i in range(10):
+        cache.render(gen, i / 10)
+    gen.update_params({"period": 0.5})
+    cache.render(gen, 0.0)
+    assert gen.calls == 11
+    assert not cache.complete
+
+
+def test_aperiodic_and_oversized_render_live():
+    gen = CountingGenerator(8, 4, {"period": None})
+    cache = LoopCache(fps=10)
+    cache.render(gen, 0.0)
+    cache.render(gen, 0.0)
+    assert gen.calls == 2
+
+    gen = CountingGenerator(8, 4, {"period": 100.0})
+    cache = LoopCache(fps=10, max_bytes=1024)
+    cache.render(gen, 0.0)
+    cache.render(gen, 0.0)
+    assert gen.calls == 2
+
+
+def test_builtin_periods_repeat():
+    plasma = PlasmaGenerator(32, 8, {"speed": 1.0})
+    np.testing.assert_allclose(
+        np.asarray(plasma.render(0.3), dtype=int),
+        np.asarray(plasma.render(0.3 + plasma.period), dtype=int),
+        atol=1,
+    )
+
+    text = ScrollingTextGenerator(128, 32, {"speed": 50.0})
+    assert np.array_equal(
+        np.asarray(text.render(0.2)), np.asarray(text.render(0.2 + text.period)),
+    )
+
+    breathe = BreatheEffect(8, 4, {"period": 3.0})
+    assert breathe.period == 3.0
+
+
+def test_base_frame_change_invalidates():
+    effect = BreatheEffect(8, 4, {"period": 1.0})
+    cache = LoopCache(fps=10)
+    effect.set_base_frame(Image.new("RGB", (8, 4), (200, 200, 200)))
+    bright = cache.render(effect, 0.25).copy()
+    effect.set_base_frame(Image.new("RGB", (8, 4), (0, 0, 0)))
+    assert cache.render(effect, 0.25).max() == 0
+    assert bright.max() > 0
@@ -0,0 +1,38 @@
+import numpy as np
+
+from protogen.metrics import StageTimings, TimingRing
+
+
+def test_empty_ring_has_no_percentiles():
+    summary = TimingRing(8).summary()
+    assert summary["count"] == 0
+    assert summary["p50"] is None and summary["max"] is None
+
+
+def test_ring_keeps_only_the_latest_samples():
+    ring = TimingRing(4)
+    for ms in (100, 100, 1, 2, 3, 4):
+        ring.add(ms / 1000)
+    summary = ring.summary()
+    assert summary["count"] == 6
+    assert summary["max"] == 4.0
+    assert summary["p50"] == 2.5
+
+
+def test_percentiles_in_milliseconds():
+    ring = TimingRing(1000)
+    samples = np.arange(1, 1001) / 1e6
+    for s in samples:
+        ring.add(float(s))
+    summary = ring.summary()
+    expected = np.percentile(samples * 1000, (50, 95, 99))
+    assert [summary["p50"], summary["p95"], summary["p99"]] == [round(v, 3) for v in expected]
+
+
+def test_stage_timings_summarise_every_stage():
+    timings = StageTimings(("render", "push"), size=4)
+    timings.record("push", 0.002)
+    summary = timings.summary()
+    assert set(summary) == {"render", "push"}
+    assert summary["render"]["count"] == 0
+    assert summary["push"]["p99"] == 2.0
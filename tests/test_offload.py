@@ -0,0 +1,160 @@
+import time
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from protogen.generators import FrameEffect
+from protogen.generators.offload import OffloadedGenerator, offload
+from protogen.generators.plasma import PlasmaGenerator
+from protogen.generators.rainbow_sweep import RainbowSweepEffect
+
+
+def _wait_for(gen, t, expected, timeout=20.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        arr = np.asarray(gen.render(t))
+        if np.array_equal(arr, expected):
+            return arr
+        time.sleep(0.02)
+    pytest.fail("worker never produced the expected frame")
+
+
+def test_offloaded_plasma_matches_in_process():
+    params = {"speed": 1.0, "palette": "cyan"}
+    gen = offload(PlasmaGenerator, 64, 16, params, fps=10)
+    try:
+        assert isinstance(gen, OffloadedGenerator)
+        assert not isinstance(gen, FrameEffect)
+        expected = np.asarray(PlasmaGenerator(64, 16, dict(params)).render(0.5))
+        _wait_for(gen, 0.5, expected)
+    finally:
+        gen.close()
+
+
+def test_renders_in_process_until_worker_delivers():
+    params = {"speed": 1.0}
+    gen = offload(RainbowSweepEffect, 32, 8, params, fps=10)
+    try:
+        base = Image.new("RGB", (32, 8), (0, 180, 0))
+        gen.set_base_frame(base)
+        expected = np.asarray(RainbowSweepEffect(32, 8, dict(params)).apply(base, 0.3))
+        # The spawned worker can't have started yet
+        assert gen._frame_seq < 0
+        np.testing.assert_array_equal(np.asarray(gen.render(0.3)), expected)
+        out = np.zeros((8, 32, 3), dtype=np.uint8)
+        gen.render_into(0.3, out)
+        np.testing.assert_array_equal(out, expected)
+        deadline = time.monotonic() + 20.0
+        while gen._frame_seq < 0 and time.monotonic() < deadline:
+            gen.render(0.5)
+            time.sleep(0.02)
+        assert gen._frame_seq >= 0
+        _wait_for(gen, 0.5, np.asarray(RainbowSweepEffect(32, 8, dict(params)).apply(base, 0.5)))
+    finally:
+        gen.close()
+
+
+def test_offloaded_params_reach_worker():
+    gen = offload(PlasmaGenerator, 32, 8, {"speed": 1.0}, fps=10)
+    try:
+        gen.update_params({"speed": 3.0})
+        assert gen.params["speed"] == 3.0
+        expected = np.asarray(PlasmaGenerator(32, 8, {"speed": 3.0}).render(1.0))
+        _wait_for(gen, 1.0, expected)
+    finally:
+        gen.close()
+
+
+def test_offloaded_frame_effect_uses_shared_base():
+    gen = offload(RainbowSweepEffect, 32, 8, {"speed": 1.0}, fps=10)
+    try:
+        assert isinstance(gen, FrameEffect)
+        base = Image.new("RGB", (32, 8), (200, 200, 200))
+        gen.set_base_frame(base)
+        local = RainbowSweepEffect(32, 8, {"speed": 1.0})
+        expected = np.asarray(local.apply(base, 0.3))
+        _wait_for(gen, 0.3, expected)
+    finally:
+        gen.close()
+
+
+def test_close_releases_worker_and_memory():
+    from multiprocessing import shared_memory
+
+    gen = offload(PlasmaGenerator, 16, 8, {}, fps=10)
+    name = gen._shm.name
+    process = gen._process
+    gen.close()
+    gen.close()  # idempotent
+    gen._reaper.join(timeout=10.0)
+    assert not process.is_alive()
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)
+
+
+def test_slot_being_rewritten_is_not_taken():
+    gen = offload(PlasmaGenerator, 16, 8, {"speed": 1.0}, fps=10)
+    try:
+        _wait_for(gen, 0.5, np.asarray(PlasmaGenerator(16, 8, {"speed": 1.0}).render(0.5)))
+        gen._stop.set()
+        gen._process.join(timeout=10.0)
+        seen = gen._frame_seq
+        # A later frame whose slot the worker is still writing (odd generation)
+        gen._seqs[0] = seen + 3
+        gen._gens[0] += 1
+        gen._slots[0] = 255
+        gen.render(seen / 10 + 1.0)
+        assert gen._frame_seq == seen
+        gen._gens[0] += 1
+        np.testing.assert_array_equal(np.asarray(gen.render(seen / 10 + 1.0)), 255)
+        assert gen._frame_seq == seen + 3
+    finally:
+        gen.close()
+
+
+def test_frames_rendered_on_an_old_base_are_not_returned():
+    gen = offload(RainbowSweepEffect, 32, 8, {"speed": 1.0}, fps=10)
+    local = RainbowSweepEffect(32, 8, {"speed": 1.0})
+    try:
+        first = Image.new("RGB", (32, 8), (200, 200, 200))
+        gen.set_base_frame(first)
+        deadline = time.monotonic() + 20.0
+        while gen._frame_seq < 0 and time.monotonic() < deadline:
+            gen.render(0.1)
+            time.sleep(0.02)
+        assert gen._frame_seq >= 0
+        # Let the worker fill slots ahead on the first base
+        time.sleep(0.2)
+
+        second = Image.new("RGB", (32, 8), (0, 90, 0))
+        gen.set_base_frame(second)
+        for t in (0.2, 0.3, 0.4):
+            np.testing.assert_array_equal(
+                np.asarray(gen.render(t)), np.asarray(local.apply(second, t)),
+            )
+        deadline = time.monotonic() + 20.0
+        while gen._frame_seq < 0 and time.monotonic() < deadline:
+            gen.render(0.5)
+            time.sleep(0.02)
+        # The worker's frame, now on the new base
+        assert gen._frame_seq >= 0
+        _wait_for(gen, 0.5, np.asarray(local.apply(second, 0.5)))
+    finally:
+        gen.close()
+
+
+def test_worker_renders_only_the_frames_sampled_at_the_set_rate():
+    gen = offload(PlasmaGenerator, 16, 8, {"speed": 1.0}, fps=10)
+    try:
+        gen.set_rate(2.5)
+        deadline = time.monotonic() + 20.0
+        while gen._frame_seq < 0 and time.monotonic() < deadline:
+            gen.render(0.8)
+            time.sleep(0.02)
+        assert gen._frame_seq == 8
+        time.sleep(0.3)
+        # Every fourth frame, ahead of the playhead at frame 8
+        assert sorted(gen._seqs.tolist()) == [8, 12, 16, 20]
+    finally:
+        gen.close()
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from protogen.generators.palette import (
+    NAMED_PALETTES, PALETTE_SIZE, apply_palette, get_palette, gradient,
+    hue_shade_table, hue_wheel, is_cyclic, rotate, shade_table,
+)
+
+
+@pytest.mark.parametrize("name", sorted(NAMED_PALETTES))
+def test_named_palettes_are_frozen_256_entries(name):
+    palette = get_palette(name)
+    assert palette.shape == (PALETTE_SIZE, 3)
+    assert palette.dtype == np.uint8
+    assert not palette.flags.writeable
+    assert get_palette(name) is palette  # cached
+
+
+def test_unknown_name_falls_back_to_default():
+    np.testing.assert_array_equal(get_palette("nope"), get_palette("cyan"))
+    np.testing.assert_array_equal(get_palette(None), get_palette("cyan"))
+
+
+def test_gradient_from_stops():
+    palette = get_palette([[0, 0, 0], [255, 0, 0], [255, 255, 255]])
+    assert palette[0].tolist() == [0, 0, 0]
+    assert palette[-1].tolist() == [255, 255, 255]
+    mid = palette[PALETTE_SIZE // 2]
+    assert mid[0] == 255 and 0 < mid[1] < 10
+
+
+def test_single_stop_ramps_from_black():
+    palette = gradient([[0, 200, 100]])
+    assert palette[0].tolist() == [0, 0, 0]
+    assert palette[-1].tolist() == [0, 200, 100]
+
+
+def test_hue_wheel_primaries_and_cycle():
+    wheel = hue_wheel()
+    assert wheel[0].tolist() == [255, 0, 0]
+    assert wheel[PALETTE_SIZE // 3].tolist()[1] == 255
+    assert is_cyclic("rainbow")
+    assert not is_cyclic("cyan")
+    assert not is_cyclic([[0, 0, 0], [1, 1, 1]])
+
+
+def test_rotate_moves_entries():
+    wheel = hue_wheel()
+    rotated = rotate(wheel, 10)
+    np.testing.assert_array_equal(rotated[0], wheel[10])
+    np.testing.assert_array_equal(rotated[-10], wheel[0])
+
+
+def test_shade_table_scales_by_brightness():
+    palette = get_palette("fire")
+    table = shade_table(palette)
+    for v, i in [(0, 200), (255, 37), (128, 255)]:
+        expected = np.round(palette[i].astype(float) * v / 255).astype(int)
+        assert table[(v << 8) | i].tolist() == expected.tolist()
+    assert hue_shade_table() is hue_shade_table()
+
+
+def test_apply_palette_gathers_into_buffer():
+    palette = get_palette("ice")
+    field = np.array([[0, 255], [128, 1]], dtype=np.intp)
+    out = np.empty((2, 2, 3), dtype=np.uint8)
+    result = apply_palette(field, palette, out=out)
+    assert result is out
+    np.testing.assert_array_equal(out[0, 1], palette[255])
@@ -1,6 +1,6 @@
 import pytest
 import numpy as np
-from PIL import Image
+from PIL import Image, ImageDraw
 
 from protogen.generators import ProceduralGenerator, GENERATORS
 
@@ -60,6 +60,44 @@ def test_matrix_rain_default_params():
     assert frame.size == (128, 32)
 
 
+def _loop_matrix_rain(gen):
+    """Reference frame painted column by column, segment by segment."""
+    fb = np.zeros((gen.height, gen.width, 3), dtype=np.uint8)
+    wrap = gen.height + gen._cell_h * gen._trail_len
+    for i, drop in enumerate(gen._drops):
+        head_y = int(drop) % wrap
+        for j in range(gen._trail_len):
+            y = head_y - j * gen._cell_h
+            if 0 <= y < gen.height:
+                x0 = i * gen._col_w
+                fb[y:y + gen._cell_h, x0:x0 + gen._col_w] = gen._trail_colors[j, :3]
+    return fb
+
+
+def test_matrix_rain_matches_per_column_loop():
+    gen = MatrixRainGenerator(130, 37, {"color": [200, 40, 90]})
+    rng = np.random.default_rng(7)
+    for _ in range(20):
+        gen._drops = rng.uniform(-40, 60, gen._num_cols).astype(np.float32)
+        gen._last_t = 1.0
+        assert np.array_equal(np.asarray(gen.render(1.0)), _loop_matrix_rain(gen))
+
+
+def test_matrix_rain_drops_wrap_and_restart():
+    gen = MatrixRainGenerator(128, 32, {"density": 1.0})
+    wrap = 32 + gen._cell_h * gen._trail_len
+    gen._drops[:] = wrap - 0.5
+    gen._last_t = 1.0
+    gen.render(1.1)
+    # Every column finished its pass and restarted above the screen
+    assert (gen._drops <= 0).all()
+
+    gen = MatrixRainGenerator(128, 32, {"density": 0.0})
+    for t in range(1, 200):
+        gen.render(t * 0.05)
+    assert (gen._drops < wrap).all()
+
+
 # --- Starfield ---
 
 from protogen.generators.starfield import StarfieldGenerator
@@ -80,6 +118,36 @@ def test_starfield_default_params():
     assert frame.size == (128, 32)
 
 
+def test_starfield_splat_matches_per_star_blocks():
+    """Batched splat equals drawing each star's clipped block, brightest on top."""
+    gen = StarfieldGenerator(64, 32, {"star_count": 300, "color": [255, 120, 30]})
+    gen._last_t = 1.0
+    frame = np.asarray(gen.render(1.0))
+
+    expected = np.zeros_like(frame)
+    cx, cy = 32, 16
+    for x, y, z in zip(gen._sx, gen._sy, gen._sz):
+        px, py = int(cx + x / z * cx), int(cy + y / z * cy)
+        if not (0 <= px < 64 and 0 <= py < 32):
+            continue
+        color = (gen._color * max(0.2, 1 - z)).astype(np.uint8)
+        half = max(1, int((1 - z) * 3)) // 2
+        block = expected[max(0, py - half):py + half + 1, max(0, px - half):px + half + 1]
+        np.maximum(block, color, out=block)
+    assert np.array_equal(frame, expected)
+
+
+def test_starfield_large_star_clipped_at_edge():
+    gen = StarfieldGenerator(16, 8, {"star_count": 1, "speed": 0.0})
+    gen._sx[:] = -0.199
+    gen._sy[:] = -0.199
+    gen._sz[:] = 0.2
+    frame = np.asarray(gen.render(1.0))
+    # Centre (0, 0) with half-width 1: only the in-bounds 2x2 corner is lit
+    assert frame.any(axis=2).sum() == 4
+    assert frame[:2, :2].any(axis=2).all()
+
+
 # --- Plasma ---
 
 from protogen.generators.plasma import PlasmaGenerator
@@ -100,6 +168,35 @@ def test_plasma_default_params():
     assert frame.size == (128, 32)
 
 
+def _float_plasma_value(gen, t):
+    """Reference plasma value in float, as the engine approximates it."""
+    y, x = np.mgrid[0:gen.height, 0:gen.width]
+    x = x / gen.width
+    y = y / gen.height
+    dist = np.sqrt(((x - 0.5) ** 2 + (y - 0.5) ** 2) * 100)
+    st = t * gen._speed
+    v = (np.sin(x * 10 + st) + np.sin(y * 10 + st * 0.7)
+         + np.sin((x + y) * 8 + st * 1.3) + np.sin(dist + st * 0.5))
+    return v * 0.25 + 0.5
+
+
+def test_plasma_fixed_point_matches_float_reference():
+    gen = PlasmaGenerator(128, 32, {"speed": 1.3})
+    for t in (0.0, 0.8, 12.5):
+        v = _float_plasma_value(gen, t)
+        blue = np.asarray(gen.render(t))[:, :, 2].astype(int)
+        expected = (np.clip(v, 0, 1) * 255).astype(int)
+        assert np.abs(blue - expected).max() <= 8
+
+
+def test_plasma_frames_do_not_alias_buffers():
+    gen = PlasmaGenerator(64, 16, {"palette": "rainbow"})
+    first = gen.render(0.0)
+    snapshot = np.asarray(first).copy()
+    gen.render(2.0)
+    np.testing.assert_array_equal(np.asarray(first), snapshot)
+
+
 # --- Scrolling Text ---
 
 from protogen.generators.scrolling_text import ScrollingTextGenerator
@@ -127,6 +224,61 @@ def test_scrolling_text_default_params():
     assert frame.size == (128, 32)
 
 
+def test_scrolling_text_matches_imagedraw_after_updates():
+    gen = ScrollingTextGenerator(64, 16, {"text": "A", "speed": 40.0})
+    gen.set_text("Hi there!")
+    gen.update_params({"color": [200, 50, 10]})
+
+    font = gen._font
+    left, top, right, bottom = font.getbbox("Hi there!")
+    strip = Image.new("RGB", (right - left + 128, 16))
+    ImageDraw.Draw(strip).text(
+        (64, (16 - (bottom - top)) // 2), "Hi there!", fill=(200, 50, 10), font=font,
+    )
+    for t in (0.0, 0.9, 2.3):
+        offset = int(t * 40.0) % strip.width
+        expected = strip.crop((offset, 0, offset + 64, 16))
+        np.testing.assert_array_equal(np.asarray(gen.render(t)), np.asarray(expected))
+
+
+@pytest.mark.parametrize("cls, params", [
+    (MatrixRainGenerator, {"density": 0.5}),
+    (StarfieldGenerator, {"star_count": 200}),
+    (PlasmaGenerator, {"palette": "fire"}),
+    (ScrollingTextGenerator, {"text": "out of bounds", "speed": 90.0}),
+    (DummyGenerator, {}),
+])
+def test_render_into_matches_render(cls, params):
+    import copy
+
+    from protogen.generators.glyphs import default_font
+
+    gen = cls(66, 16, params)
+    # Same random state; the shared font can't be copied
+    twin = copy.deepcopy(gen, {id(default_font()): default_font()})
+    out = np.full((16, 66, 3), 77, dtype=np.uint8)
+    for t in (0.4, 1.0, 1.8, 2.7, 9.9):
+        twin.render_into(t, out)
+        np.testing.assert_array_equal(out, np.asarray(gen.render(t)))
+
+
+@pytest.mark.parametrize("cls", [PlasmaGenerator, ScrollingTextGenerator])
+def test_equal_frame_keys_mean_equal_frames(cls):
+    gen = cls(64, 16, {"speed": 0.05})
+    assert gen.frame_key(1.0) == gen.frame_key(1.001)
+    np.testing.assert_array_equal(np.asarray(gen.render(1.0)), np.asarray(gen.render(1.001)))
+    assert gen.frame_key(1.0) != gen.frame_key(400.0)
+
+    key = gen.frame_key(1.0)
+    gen.update_params({"speed": 0.05})
+    assert gen.frame_key(1.0) != key
+
+
+def test_stateful_generators_have_no_frame_key():
+    assert MatrixRainGenerator(16, 8, {}).frame_key(1.0) is None
+    assert StarfieldGenerator(16, 8, {}).frame_key(1.0) is None
+
+
 def test_frame_effect_set_base_frame():
     """FrameEffect exposes set_base_frame() public method."""
     from protogen.generators import FrameEffect
@@ -140,3 +292,14 @@ def test_frame_effect_set_base_frame():
     effect.set_base_frame(new_frame)
     rendered = effect.render(0.0)
     assert rendered.getpixel((0, 0)) == (255, 0, 0)
+
+
+def test_plasma_palette_from_stops_and_update():
+    gen = PlasmaGenerator(32, 8, {"palette": [[0, 0, 0], [255, 0, 0]]})
+    arr = np.asarray(gen.render(0.4))
+    assert arr[:, :, 1:].max() == 0
+    assert arr[:, :, 0].max() > 0
+
+    gen.update_params({"palette": "rainbow"})
+    arr = np.asarray(gen.render(0.4))
+    assert arr[:, :, 1:].max() > 0
@@ -1,3 +1,6 @@
+import io
+
+import numpy as np
 from PIL import Image
 
 from protogen.display.mock import MockDisplay
@@ -114,8 +117,8 @@ def test_pending_text_applied_on_set_effect():
     pipeline.set_effect_text("HELLO WORLD")
     pipeline.set_effect("scrolling_text", {})
 
-    assert pipeline._effect is not None
-    assert pipeline._effect._text == "HELLO WORLD"
+    assert pipeline.layers
+    assert pipeline.layers[-1].generator._text == "HELLO WORLD"
     assert pipeline._pending_text is None
 
 
@@ -129,7 +132,7 @@ def test_pending_text_cleared_after_apply():
 
     # Create a second effect — should NOT carry over old text
     pipeline.set_effect("scrolling_text", {})
-    assert pipeline._effect._text == "PROTOGEN"  # default
+    assert pipeline.layers[-1].generator._text == "PROTOGEN"  # default
 
 
 def test_update_effect_params():
@@ -138,15 +141,15 @@ def test_update_effect_params():
     pipeline = RenderPipeline(display)
 
     pipeline.set_effect("matrix_rain", {"color": [0, 255, 70], "speed": 1.0, "density": 0.3})
-    original_effect = pipeline._effect
+    original_effect = pipeline.layers[-1].generator
 
     pipeline.update_effect_params({"speed": 2.0})
 
     # Same instance, not recreated
-    assert pipeline._effect is original_effect
-    assert pipeline._effect.params["speed"] == 2.0
+    assert pipeline.layers[-1].generator is original_effect
+    assert pipeline.layers[-1].generator.params["speed"] == 2.0
     # Unchanged params preserved
-    assert pipeline._effect.params["density"] == 0.3
+    assert pipeline.layers[-1].generator.params["density"] == 0.3
 
 
 def test_update_effect_params_updates_cached_values():
@@ -157,44 +160,44 @@ def test_update_effect_params_updates_cached_values():
     # Breathe caches _period and _amplitude
     pipeline.set_effect("breathe", {"period": 3.0, "amplitude": 0.5})
     pipeline.update_effect_params({"period": 6.0})
-    assert pipeline._effect._period == 6.0
-    assert pipeline._effect._amplitude == 0.5  # unchanged
+    assert pipeline.layers[-1].generator._period == 6.0
+    assert pipeline.layers[-1].generator._amplitude == 0.5  # unchanged
 
     # Matrix rain caches _speed and _density
     pipeline.set_effect("matrix_rain", {"speed": 1.0, "density": 0.3})
     pipeline.update_effect_params({"speed": 2.5, "density": 0.6})
-    assert pipeline._effect._speed == 2.5
-    assert pipeline._effect._density == 0.6
+    assert pipeline.layers[-1].generator._speed == 2.5
+    assert pipeline.layers[-1].generator._density == 0.6
 
     # Starfield caches _speed
     pipeline.set_effect("starfield", {"speed": 1.0})
     pipeline.update_effect_params({"speed": 3.0})
-    assert pipeline._effect._speed == 3.0
+    assert pipeline.layers[-1].generator._speed == 3.0
 
     # Scrolling text caches _speed
     pipeline.set_effect("scrolling_text", {"speed": 50.0})
     pipeline.update_effect_params({"speed": 80.0})
-    assert pipeline._effect._speed == 80.0
+    assert pipeline.layers[-1].generator._speed == 80.0
 
     # Plasma caches _speed
     pipeline.set_effect("plasma", {"speed": 1.0})
     pipeline.update_effect_params({"speed": 2.0})
-    assert pipeline._effect._speed == 2.0
+    assert pipeline.layers[-1].generator._speed == 2.0
 
     # Color shift caches _speed
     pipeline.set_effect("color_shift", {"speed": 1.0})
     pipeline.update_effect_params({"speed": 2.0})
-    assert pipeline._effect._speed == 2.0
+    assert pipeline.layers[-1].generator._speed == 2.0
 
     # Rainbow sweep caches _speed
     pipeline.set_effect("rainbow_sweep", {"speed": 1.0})
     pipeline.update_effect_params({"speed": 2.0})
-    assert pipeline._effect._speed == 2.0
+    assert pipeline.layers[-1].generator._speed == 2.0
 
     # Glitch caches _intensity
     pipeline.set_effect("glitch", {"intensity": 0.3})
     pipeline.update_effect_params({"intensity": 0.8})
-    assert pipeline._effect._intensity == 0.8
+    assert pipeline.layers[-1].generator._intensity == 0.8
 
 
 def test_update_effect_params_no_effect():
@@ -229,8 +232,8 @@ def test_last_displayed_frame_tracks_composited():
     pipeline.set_effect("matrix_rain", {})
 
     # Simulate the effect loop producing a frame
-    pipeline._effect_frame = Image.new("RGB", (128, 32), (0, 100, 0))
-    pipeline._push_composited()
+    pipeline.layers[0].frame = Image.new("RGB", (128, 32), (0, 100, 0))
+    pipeline._push()
 
     assert pipeline.last_displayed_frame is not None
     # The composited result should differ from the original base frame
@@ -260,8 +263,8 @@ def test_last_displayed_frame_restored_on_clear_effect():
 
     # Set an effect then clear it
     pipeline.set_effect("matrix_rain", {})
-    pipeline._effect_frame = Image.new("RGB", (128, 32), (0, 100, 0))
-    pipeline._push_composited()
+    pipeline.layers[0].frame = Image.new("RGB", (128, 32), (0, 100, 0))
+    pipeline._push()
     # After compositing, last_displayed_frame is the composited image, not img
     assert pipeline.last_displayed_frame is not img
 
@@ -319,14 +322,770 @@ def test_base_array_cached_across_composites():
     pipeline.set_effect("matrix_rain", {})
 
     # First composite
-    pipeline._effect_frame = Image.new("RGB", (128, 32), (0, 100, 0))
-    pipeline._push_composited()
+    pipeline.layers[0].frame = Image.new("RGB", (128, 32), (0, 100, 0))
+    pipeline._push()
     first_arr = pipeline._base_arr
 
     # Second composite with same base, different effect frame
-    pipeline._effect_frame = Image.new("RGB", (128, 32), (0, 200, 0))
-    pipeline._last_composited_bytes = None  # force push
-    pipeline._push_composited()
+    pipeline.layers[0].frame = Image.new("RGB", (128, 32), (0, 200, 0))
+    pipeline._front = None  # force push
+    pipeline._push()
     second_arr = pipeline._base_arr
 
     assert first_arr is second_arr  # same cached array object
+
+
+def test_show_array_passthrough():
+    """ndarray frames reach the display and the JPEG preview."""
+    display = MockDisplay(width=128, height=32)
+    pipeline = RenderPipeline(display)
+
+    arr = np.zeros((32, 128, 3), dtype=np.uint8)
+    arr[:, :, 1] = 123
+    pipeline.show_array(arr)
+
+    assert display.last_image.getpixel((0, 0)) == (0, 123, 0)
+    assert pipeline.last_frame is arr
+    assert pipeline.get_jpeg()[:2] == b'\xff\xd8'
+
+
+def test_show_indexed_passthrough():
+    """Indexed frames are expanded through their palette at the display."""
+    from protogen.frames import IndexedFrame
+
+    display = MockDisplay(width=128, height=32)
+    pipeline = RenderPipeline(display)
+
+    indices = np.zeros((32, 128), dtype=np.uint8)
+    indices[0, 0] = 1
+    frame = IndexedFrame(indices, np.array([(0, 0, 0), (0, 255, 200)], dtype=np.uint8))
+    pipeline.show_indexed(frame)
+
+    assert display.last_image.getpixel((0, 0)) == (0, 255, 200)
+    assert display.last_image.getpixel((1, 0)) == (0, 0, 0)
+
+
+async def _run_for(pipeline, seconds, during=None):
+    import asyncio
+
+    task = asyncio.create_task(pipeline.run())
+    await asyncio.sleep(0)
+    if during is not None:
+        await during()
+    else:
+        await asyncio.sleep(seconds)
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+
+async def test_run_coalesces_frames_into_one_push_per_tick():
+    """Frames posted between ticks are pushed once, latest wins."""
+    import asyncio
+
+    display = MockDisplay(width=128, height=32)
+    pushes = []
+    display.show_image = pushes.append
+    pipeline = RenderPipeline(display, fps=20)
+
+    async def post_burst():
+        frames = [Image.new("RGB", (128, 32), (i, 0, 0)) for i in range(10)]
+        for frame in frames:
+            pipeline.show_image(frame)
+        await asyncio.sleep(0.08)
+
+    await _run_for(pipeline, 0, post_burst)
+
+    assert len(pushes) == 1
+    assert pushes[0].getpixel((0, 0)) == (9, 0, 0)
+    assert pipeline.last_displayed_frame is pipeline.last_frame
+
+
+async def test_run_bounds_pushes_with_animation_and_effect():
+    """An animation and an effect on different rates share one clock."""
+    import asyncio
+
+    display = MockDisplay(width=128, height=32)
+    pushes = []
+    display.show_image = pushes.append
+    pipeline = RenderPipeline(display, fps=20)
+    pipeline.set_effect("matrix_rain", {}, fps=30)
+
+    async def animate():
+        for i in range(15):
+            pipeline.show_image(Image.new("RGB", (128, 32), (i, 0, 0)))
+            await asyncio.sleep(1 / 30)
+
+    await _run_for(pipeline, 0, animate)
+
+    # 0.5 s at 20 fps: at most ~11 pushes, not 15 + 15
+    assert 0 < len(pushes) <= 12
+
+
+async def test_run_idles_without_effect_or_new_frames():
+    display = MockDisplay(width=128, height=32)
+    pushes = []
+    display.show_image = pushes.append
+    pipeline = RenderPipeline(display, fps=30)
+    pipeline.show_image(Image.new("RGB", (128, 32), (1, 2, 3)))
+
+    await _run_for(pipeline, 0.1)
+
+    assert len(pushes) == 1
+
+
+async def test_threaded_pushes_from_render_thread():
+    """In threaded mode every display call happens off the event loop."""
+    import asyncio
+    import threading
+
+    display = MockDisplay(width=128, height=32)
+    threads = []
+    original_show = display.show_image
+
+    def show_image(image):
+        threads.append(threading.current_thread().name)
+        original_show(image)
+
+    display.show_image = show_image
+    pipeline = RenderPipeline(display, fps=50, threaded=True)
+
+    async def drive():
+        await asyncio.sleep(0.02)
+        pipeline.show_image(Image.new("RGB", (128, 32), (10, 0, 0)))
+        pipeline.set_effect("matrix_rain", {})
+        pipeline.set_brightness(40)
+        await asyncio.sleep(0.15)
+
+    await _run_for(pipeline, 0, drive)
+
+    assert threads
+    assert set(threads) == {"render"}
+    assert display.brightness == 40
+    # Composites are written into pool buffers
+    assert pipeline.frame_pool.owns(pipeline.last_displayed_frame)
+    assert pipeline.get_jpeg()[:2] == b'\xff\xd8'
+
+
+def test_threaded_copies_posted_arrays_it_does_not_own():
+    display = MockDisplay(width=16, height=8)
+    pipeline = RenderPipeline(display, threaded=True)
+    # Decoded in place, like a delta sequence's buffer
+    source = np.full((8, 16, 3), 40, dtype=np.uint8)
+    pipeline.show_array(source.view())
+    posted = pipeline.last_frame
+    assert posted is not source and pipeline.frame_pool.owns(posted)
+    source[:] = 200
+    assert posted[0, 0].tolist() == [40, 40, 40]
+
+    own = pipeline.frame_pool.acquire()
+    pipeline.show_array(own)
+    assert pipeline.last_frame is own
+
+
+async def test_threaded_stops_on_cancel():
+    display = MockDisplay(width=128, height=32)
+    pipeline = RenderPipeline(display, fps=30, threaded=True)
+    await _run_for(pipeline, 0.05)
+    assert pipeline._thread is None
+    # Without the thread, frames go straight to the display again
+    pipeline.show_image(Image.new("RGB", (128, 32), (0, 0, 9)))
+    assert display.last_image.getpixel((0, 0)) == (0, 0, 9)
+
+
+def test_composite_alternates_buffers():
+    display = MockDisplay(width=128, height=32)
+    pipeline = RenderPipeline(display)
+    pipeline.show_image(Image.new("RGB", (128, 32), (50, 50, 50)))
+    pipeline.set_effect("matrix_rain", {})
+
+    pipeline.layers[0].frame = Image.new("RGB", (128, 32), (0, 100, 0))
+    pipeline._push()
+    first = pipeline.last_displayed_frame
+    pipeline.layers[0].frame = Image.new("RGB", (128, 32), (0, 200, 0))
+    pipeline._push()
+    second = pipeline.last_displayed_frame
+
+    assert first is not second
+    assert first[0, 0].tolist() == [50, 100, 50]
+    assert second[0, 0].tolist() == [50, 200, 50]
+    assert display.last_image.getpixel((0, 0)) == (50, 200, 50)
+
+
+def test_set_effect_offload_closes_replaced_worker():
+    from protogen.generators.offload import OffloadedGenerator
+
+    display = MockDisplay(width=128, height=32)
+    pipeline = RenderPipeline(display)
+    pipeline.set_effect("plasma", {}, fps=20, offload=True)
+    effect = pipeline.layers[-1].generator
+    assert isinstance(effect, OffloadedGenerator)
+
+    pipeline.set_effect("matrix_rain", {})
+    assert effect._shm is None
+    effect._reaper.join(timeout=10.0)
+    assert not effect._process.is_alive()
+
+
+def test_baked_effect_replays_cached_cycle():
+    display = MockDisplay(width=128, height=32)
+    pipeline = RenderPipeline(display)
+    pipeline.set_effect("scrolling_text", {"speed": 640.0}, fps=10, bake=True)
+    effect = pipeline.layers[-1].generator
+    calls = []
+    render = effect.render
+    effect.render = lambda t: calls.append(t) or render(t)
+
+    period = effect.period
+    n = round(period * 10)
+    for i in range(2 * n):
+        pipeline._render_layers(i * period / n)
+
+    assert len(calls) == n
+    assert pipeline.layers[0].loop_cache.complete
+
+
+def test_gain_effect_pushes_expression_frame_with_display_gain():
+    from protogen.display.base import GAIN_ONE, gain_steps
+
+    display = MockDisplay(width=128, height=32)
+    pipeline = RenderPipeline(display)
+    base = Image.new("RGB", (128, 32), (200, 100, 0))
+    pipeline.show_image(base)
+    pipeline.set_effect("breathe", {"period": 4.0, "amplitude": 0.5})
+
+    # Trough: gain 0.5
+    pipeline._render_layers(3.0)
+    pipeline._present()
+    assert display.last_image is base
+    assert display.gain == gain_steps(0.5)
+    preview = Image.open(io.BytesIO(pipeline.get_jpeg(quality=95)))
+    assert all(abs(a - b) <= 3 for a, b in zip(preview.getpixel((64, 16)), (100, 50, 0)))
+
+    pipeline.clear_effect()
+    assert display.gain == GAIN_ONE
+
+
+def test_steady_state_reuses_pool_buffers():
+    """Effect output, composites and posted pool frames are recycled."""
+    display = MockDisplay(width=128, height=32)
+    pipeline = RenderPipeline(display)
+    pool = pipeline.frame_pool
+    pipeline.set_effect("plasma", {})
+    for i in range(200):
+        frame = pool.acquire()
+        frame[:] = i % 7
+        pipeline.show_array(frame)
+        pipeline._tick(i / 30, 1 / 30)
+    allocated = pool.allocated
+    for i in range(200, 400):
+        frame = pool.acquire()
+        frame[:] = i % 7
+        pipeline.show_array(frame)
+        pipeline._tick(i / 30, 1 / 30)
+    assert pool.allocated == allocated <= 6
+    assert pool.owns(pipeline.layers[0].frame)
+
+    # Clearing the effect hands its buffers back once nothing shows them
+    pipeline.clear_effect()
+    pipeline.show_image(Image.new("RGB", (128, 32)))
+    assert pool.available == pool.allocated
+
+
+def _count_pushes(display):
+    """Record every frame reaching the mock (its array path ends in show_image)."""
+    pushes = []
+    original = display.show_image
+
+    def show_image(image):
+        pushes.append(image)
+        original(image)
+
+    display.show_image = show_image
+    return pushes
+
+
+def test_unchanged_frame_key_skips_render_and_composite():
+    display = MockDisplay(width=128, height=32)
+    pipeline = RenderPipeline(display)
+    pipeline.show_image(Image.new("RGB", (128, 32), (40, 0, 0)))
+    pipeline.set_effect("scrolling_text", {"speed": 1.0})
+    effect = pipeline.layers[-1].generator
+    renders = []
+    original_render_into = effect.render_into
+    effect.render_into = lambda t, out: (renders.append(t), original_render_into(t, out))
+    pushes = _count_pushes(display)
+
+    for i in range(10):
+        pipeline._tick(i / 30, 1 / 30)
+    # int(t * speed) stays 0 for the first second: one render, one push
+    assert len(renders) == 1
+    assert len(pushes) == 1
+
+    # A new expression frame recomposites without re-rendering the effect
+    pipeline.show_image(Image.new("RGB", (128, 32), (90, 0, 0)))
+    pipeline._tick(0.5, 1 / 30)
+    assert len(renders) == 1
+    assert len(pushes) == 2
+    assert display.last_image.getpixel((127, 0)) == (90, 0, 0)
+
+
+def test_identical_composite_is_not_pushed_again():
+    from protogen.generators import GENERATORS, ProceduralGenerator
+
+    class Constant(ProceduralGenerator):
+        def render(self, t):
+            return Image.new("RGB", (self.width, self.height), (0, 30, 0))
+
+    GENERATORS["__constant__"] = Constant
+    try:
+        display = MockDisplay(width=128, height=32)
+        pipeline = RenderPipeline(display)
+        pipeline.set_effect("__constant__", {})
+        pushes = _count_pushes(display)
+        for i in range(5):
+            pipeline._tick(i / 20, 1 / 20)
+    finally:
+        GENERATORS.pop("__constant__")
+    # Rendered every tick (no frame key), but the crc matched after the first
+    assert pipeline.layers[0].version == 5
+    assert len(pushes) == 1
+
+
+def test_frame_effect_returning_same_frame_is_not_pushed_again():
+    display = MockDisplay(width=128, height=32)
+    pipeline = RenderPipeline(display)
+    pipeline.show_array(np.full((32, 128, 3), 70, dtype=np.uint8))
+    # No bursts: glitch hands its base image straight back
+    pipeline.set_effect("glitch", {"intensity": 0.0})
+    pushes = _count_pushes(display)
+    for i in range(5):
+        pipeline._tick(i / 20, 1 / 20)
+    assert len(pushes) == 1
+
+
+def _partial_framebuffer(display):
+    """Mirror of a driver framebuffer that rewrites only each push's dirty rect."""
+    from protogen.frames import rect_is_empty, rect_slices
+
+    fb = np.zeros((display.height, display.width, 3), dtype=np.uint8)
+    rects = []
+    original = display.show_array
+
+    def show_array(frame, dirty=None, source=None):
+        rects.append(dirty)
+        if dirty is None:
+            fb[:] = frame
+        elif not rect_is_empty(dirty):
+            region = rect_slices(dirty)
+            fb[region] = frame[region]
+        original(frame, dirty, source)
+
+    display.show_array = show_array
+    return fb, rects
+
+
+def test_plain_frames_forward_dirty_rects():
+    display = MockDisplay(width=32, height=8)
+    fb, rects = _partial_framebuffer(display)
+    pipeline = RenderPipeline(display)
+    frame = np.zeros((8, 32, 3), dtype=np.uint8)
+    pipeline.show_array(frame)
+    blink = frame.copy()
+    blink[2:4, 5:9] = 200
+    pipeline.show_array(blink, (5, 2, 9, 4))
+    assert rects == [None, (5, 2, 9, 4)]
+    assert np.array_equal(fb, blink)
+
+
+def test_dirty_composites_match_full_recomposite():
+    """Partial composites and partial display writes stay pixel-exact."""
+    display = MockDisplay(width=64, height=16)
+    fb, rects = _partial_framebuffer(display)
+    pipeline = RenderPipeline(display)
+    pool = pipeline.frame_pool
+    rng = np.random.default_rng(5)
+    current = np.zeros((16, 64, 3), dtype=np.uint8)
+    pipeline.show_array(current.copy())
+    pipeline.set_effect("scrolling_text", {"text": "Hi!", "speed": 37.0})
+
+    for step in range(400):
+        r = rng.random()
+        if r < 0.3:
+            x0, x1 = sorted(int(v) for v in rng.integers(0, 65, 2))
+            y0, y1 = sorted(int(v) for v in rng.integers(0, 17, 2))
+            frame = pool.acquire() if r < 0.15 else np.empty_like(current)
+            frame[:] = current
+            frame[y0:y1, x0:x1] = rng.integers(0, 255, 3)
+            current = frame.copy()
+            pipeline.show_array(frame, (x0, y0, x1, y1))
+        elif r < 0.35:
+            # Someone else borrows a buffer the compositor might reuse
+            borrowed = pool.acquire()
+            borrowed[:] = 7
+            pool.release(borrowed)
+        pipeline._tick(step / 30, 1 / 30)
+        expected = np.maximum(current, pipeline.layers[0].frame)
+        np.testing.assert_array_equal(pipeline.last_displayed_frame, expected)
+        np.testing.assert_array_equal(fb, expected)
+
+    # Text only ever touches its rows
+    top, bottom = pipeline.layers[-1].generator._ink_rows
+    partial = rects[2:]
+    assert partial and all(rect is not None for rect in partial)
+    assert any(rect[1] >= top and rect[3] <= bottom for rect in partial)
+
+
+
+def _hub75(monkeypatch, width, height):
+    """HUB75Display over a stand-in PioMatter; returns it and a log of shown framebuffers."""
+    import sys
+    import types
+
+    from protogen.display.hub75 import HUB75Display
+
+    shown = []
+
+    class PioMatter:
+        def __init__(self, framebuffer, **kwargs):
+            self._framebuffer = framebuffer
+
+        def show(self):
+            shown.append(self._framebuffer.copy())
+
+    anything = types.SimpleNamespace(
+        RGB888Packed=None, AdafruitMatrixBonnet=None, Normal=None
+    )
+    module = types.SimpleNamespace(
+        PioMatter=PioMatter,
+        Colorspace=anything,
+        Pinout=anything,
+        Orientation=anything,
+        Geometry=lambda **kwargs: None,
+    )
+    monkeypatch.setitem(sys.modules, "adafruit_blinka_raspberry_pi5_piomatter", module)
+    return HUB75Display(width=width, height=height), shown
+
+
+async def test_interleaved_engines_match_full_redraw_on_hub75(monkeypatch):
+    """A dirty rect only holds against its own engine's previous frame."""
+    import asyncio
+
+    from protogen.animation import AnimationEngine
+
+    display, shown = _hub75(monkeypatch, 32, 8)
+    pushed = []
+    original = display.show_array
+
+    def show_array(frame, dirty=None, source=None):
+        pushed.append(frame.copy())
+        original(frame, dirty, source)
+
+    display.show_array = show_array
+    pipeline = RenderPipeline(display)
+    # Each engine blinks a box over its own background
+    eyes = np.zeros((4, 8, 32, 3), dtype=np.uint8)
+    eyes[1::2, 2:4, 4:8] = 255
+    mouth = np.full((4, 8, 32, 3), 60, dtype=np.uint8)
+    mouth[1::2, 5:7, 20:28] = (255, 0, 0)
+
+    await asyncio.gather(
+        AnimationEngine(pipeline).play(list(eyes), fps=40),
+        AnimationEngine(pipeline).play(list(mouth), fps=40),
+    )
+
+    assert len(shown) == len(pushed) == 8
+    for framebuffer, frame in zip(shown, pushed):
+        np.testing.assert_array_equal(framebuffer, frame)
+
+class _Solid:
+    """Registers a generator filling ``params["color"]`` under ``name``."""
+
+    def __init__(self, monkeypatch, name):
+        from protogen.generators import GENERATORS, ProceduralGenerator
+
+        class Solid(ProceduralGenerator):
+            def render(self, t):
+                return Image.new("RGB", (self.width, self.height), tuple(self.params["color"]))
+
+        monkeypatch.setitem(GENERATORS, name, Solid)
+
+
+def test_blended_frame_effect_not_reblended_when_unchanged(monkeypatch):
+    from protogen.generators import GENERATORS, FrameEffect
+
+    class Steady(FrameEffect):
+        def apply(self, frame, t):
+            return frame if t < 1.0 else frame.point(lambda v: 255 - v)
+
+    monkeypatch.setitem(GENERATORS, "__steady__", Steady)
+    display = MockDisplay(width=32, height=8)
+    pipeline = RenderPipeline(display)
+    pipeline.show_image(Image.new("RGB", (32, 8), (100, 20, 0)))
+    pipeline.set_effect("__steady__", {}, blend="add")
+    pipeline.add_effect("starfield", {})
+    layer = pipeline.layers[0]
+    blends = []
+    original = pipeline._blend
+    monkeypatch.setattr(pipeline, "_blend", lambda lay, *a: (blends.append(lay), original(lay, *a)))
+
+    pipeline._tick(0.0, 1 / 30)
+    buf, version = layer.buf, layer.version
+    for i in range(1, 10):
+        pipeline._tick(i / 30, 1 / 30)
+    assert layer.buf is buf and layer.version == version
+    assert blends.count(layer) == 1
+    assert layer.frame[0, 0].tolist() == [200, 40, 0]
+
+    pipeline._tick(1.0, 1 / 30)
+    assert layer.version == version + 1
+    assert layer.frame[0, 0].tolist() == [255, 255, 255]
+
+
+def test_layers_named_by_effect_stack_the_same_generator():
+    display = MockDisplay(width=128, height=32)
+    pipeline = RenderPipeline(display)
+    pipeline.set_effect("plasma", {"palette": "fire"}, layer_name="lava")
+    pipeline.add_effect("plasma", {"palette": "ice"}, blend="add", layer_name="frost")
+    assert [layer.name for layer in pipeline.layers] == ["lava", "frost"]
+    assert pipeline.active_effect_name == "frost"
+
+    pipeline.remove_effect("lava")
+    assert [layer.name for layer in pipeline.layers] == ["frost"]
+    assert pipeline.layers[0].generator.params["palette"] == "ice"
+
+
+def test_add_effect_stacks_frame_effects_below_generators():
+    from protogen.layers import BlendMode
+
+    display = MockDisplay(width=128, height=32)
+    pipeline = RenderPipeline(display)
+    pipeline.set_effect("starfield", {})
+    pipeline.add_effect("breathe", {})
+    pipeline.add_effect("color_shift", {}, blend="multiply")
+    assert [layer.name for layer in pipeline.layers] == ["breathe", "color_shift", "starfield"]
+    assert [layer.mode for layer in pipeline.layers] == [
+        BlendMode.ALPHA, BlendMode.MULTIPLY, BlendMode.MAX,
+    ]
+    assert pipeline.active_effect_name == "color_shift"
+
+    # Same name: replaced where it is
+    old = pipeline.layers[0]
+    pipeline.add_effect("breathe", {"period": 1.0})
+    assert pipeline.layers[0] is not old
+    assert pipeline.layers[0].generator._period == 1.0
+    pipeline.update_effect_params({"period": 2.0})
+    assert pipeline.layers[0].generator._period == 2.0
+
+    pipeline.remove_effect("breathe")
+    assert [layer.name for layer in pipeline.layers] == ["color_shift", "starfield"]
+    assert pipeline.active_effect_name == "starfield"
+
+
+def test_stacked_layers_blend_in_order(monkeypatch):
+    """Frame effects transform the expression, generators blend on top."""
+    from protogen.layers import blend
+
+    _Solid(monkeypatch, "__solid__")
+    display = MockDisplay(width=64, height=16)
+    fb, rects = _partial_framebuffer(display)
+    pipeline = RenderPipeline(display)
+    rng = np.random.default_rng(11)
+    current = rng.integers(0, 256, (16, 64, 3), dtype=np.uint8)
+    pipeline.show_array(current.copy())
+    pipeline.set_effect("rainbow_sweep", {})
+    pipeline.add_effect("scrolling_text", {"text": "ok", "speed": 23.0})
+    pipeline.add_effect("__solid__", {"color": [40, 90, 200]}, blend="multiply")
+    pipeline.add_effect("plasma", {}, blend="alpha", opacity=0.25)
+    pipeline.add_effect("matrix_rain", {}, blend="add")
+
+    for step in range(60):
+        if step % 7 == 3:
+            y = int(rng.integers(0, 16))
+            current = current.copy()
+            current[y, 5:20] = rng.integers(0, 256, 3)
+            pipeline.show_array(current.copy(), (5, y, 20, y + 1))
+        pipeline._tick(step / 30, 1 / 30)
+
+        layers = pipeline.layers
+        expected = np.asarray(layers[0].frame).copy()
+        for layer in layers[1:]:
+            blend(layer.mode, expected, np.asarray(layer.frame), expected, layer.opacity)
+        np.testing.assert_array_equal(pipeline.last_displayed_frame, expected)
+        np.testing.assert_array_equal(fb, expected)
+
+
+def test_gain_below_a_generator_is_rendered_not_folded(monkeypatch):
+    from protogen.display.base import GAIN_ONE, gain_steps
+
+    _Solid(monkeypatch, "__solid__")
+    display = MockDisplay(width=128, height=32)
+    pipeline = RenderPipeline(display)
+    base = Image.new("RGB", (128, 32), (200, 100, 0))
+    pipeline.show_image(base)
+    pipeline.set_effect("breathe", {"period": 4.0, "amplitude": 0.5})
+    pipeline.add_effect("__solid__", {"color": [0, 90, 0]})
+
+    # Trough: the expression is halved, the generator is not
+    pipeline._render_layers(3.0)
+    pipeline._present()
+    assert display.gain == GAIN_ONE
+    assert display.last_image.getpixel((0, 0)) == (100, 90, 0)
+
+    pipeline.remove_effect("__solid__")
+    pipeline._render_layers(3.0)
+    pipeline._present()
+    assert display.last_image is base
+    assert display.gain == gain_steps(0.5)
+
+
+def test_layers_render_at_their_own_fps():
+    display = MockDisplay(width=128, height=32)
+    pipeline = RenderPipeline(display, fps=30)
+    pipeline.set_effect("plasma", {}, fps=10)
+    pipeline.add_effect("matrix_rain", {}, fps=30)
+    renders = {}
+    for layer in pipeline.layers:
+        original = layer.generator.render_into
+        renders[layer.name] = []
+
+        def render_into(t, out, calls=renders[layer.name], original=original):
+            calls.append(t)
+            original(t, out)
+
+        layer.generator.render_into = render_into
+
+    for i in range(30):
+        pipeline._tick(i / 30, 1 / 30)
+    assert len(renders["plasma"]) == 10
+    assert len(renders["matrix_rain"]) == 30
+
+
+def test_governor_throttles_layers_and_bakes_periodic_ones():
+    from protogen.governor import FrameGovernor
+
+    display = MockDisplay(width=128, height=32)
+    governor = FrameGovernor(min_fps=5, period=1.0, read_temp=lambda: 90.0)
+    pipeline = RenderPipeline(display, fps=30, governor=governor)
+    pipeline.set_effect("matrix_rain", {}, fps=30)
+    pipeline.add_effect("scrolling_text", {"text": "HOT"}, fps=30)
+    rain = pipeline.layers[0]
+    calls = []
+    original = rain.generator.render_into
+    rain.generator.render_into = lambda t, out: calls.append(t) or original(t, out)
+
+    for i in range(31):
+        pipeline._tick(i / 30, 1 / 30)
+    assert len(calls) == 31
+    assert governor.scale == 0.0
+    assert rain.cost > 0
+    assert rain.loop_cache is None
+    assert pipeline.layers[1].loop_cache is not None
+
+    calls.clear()
+    for i in range(31, 61):
+        pipeline._tick(i / 30, 1 / 30)
+    assert len(calls) == 5
+
+
+def test_governor_bakes_only_generators_and_unbakes_when_cool():
+    from protogen.governor import FrameGovernor
+
+    temps = [90.0]
+    display = MockDisplay(width=128, height=32)
+    governor = FrameGovernor(period=1.0, read_temp=lambda: temps[0])
+    pipeline = RenderPipeline(display, fps=30, governor=governor)
+    pipeline.show_image(Image.new("RGB", (128, 32), (0, 90, 0)))
+    pipeline.set_effect("breathe", {}, fps=30, blend="add")
+    pipeline.add_effect("scrolling_text", {"text": "HOT"}, fps=30)
+    pipeline.add_effect("plasma", {}, fps=30, bake=True, blend="add", layer_name="baked")
+    breathe, text, baked = pipeline.layers
+
+    step = 0
+    while governor.scale > 0.0:
+        pipeline._tick(step / 30, 1 / 30)
+        step += 1
+    assert breathe.loop_cache is None
+    assert text.loop_cache is not None
+
+    temps[0] = 40.0
+    while governor.throttled:
+        pipeline._tick(step / 30, 1 / 30)
+        step += 1
+    assert text.loop_cache is None
+    assert baked.loop_cache is not None
+    pipeline._tick(step / 30, 1 / 30)
+    assert pipeline.frame_pool.owns(text.frame)
+
+
+def test_governor_passes_its_rate_to_offloaded_workers():
+    from protogen.generators.offload import _STRIDE
+    from protogen.governor import FrameGovernor
+
+    display = MockDisplay(width=128, height=32)
+    governor = FrameGovernor(min_fps=5, period=1.0, read_temp=lambda: 90.0)
+    pipeline = RenderPipeline(display, fps=30, governor=governor)
+    pipeline.set_effect("plasma", {}, fps=30, offload=True)
+    effect = pipeline.layers[0].generator
+    try:
+        assert effect._header[_STRIDE] == 1
+        step = 0
+        while governor.scale > 0.0:
+            pipeline._tick(step / 30, 1 / 30)
+            step += 1
+        # Sampled at 5 of its 30 fps
+        assert effect._header[_STRIDE] == 6
+    finally:
+        pipeline.close()
+
+
+def test_metrics_time_each_stage():
+    display = MockDisplay(width=128, height=32)
+    pipeline = RenderPipeline(display, fps=30)
+    pipeline.show_image(Image.new("RGB", (128, 32), (0, 0, 90)))
+    pipeline.set_effect("rainbow_sweep", {}, fps=30)
+    pipeline.add_effect("matrix_rain", {}, fps=30)
+    for i in range(10):
+        pipeline._tick(i / 30, 1 / 30)
+    pipeline.get_jpeg()
+
+    metrics = pipeline.get_metrics()
+    stages = metrics["stages"]
+    for stage in ("render", "effect", "composite", "dedup", "push"):
+        assert stages[stage]["count"] >= 9
+        assert 0 <= stages[stage]["p50"] <= stages[stage]["p99"] <= stages[stage]["max"]
+    assert stages["jpeg"]["count"] == 1
+    assert [layer["name"] for layer in metrics["layers"]] == ["rainbow_sweep", "matrix_rain"]
+    assert metrics["layers"][1]["cost"] > 0
+    assert metrics["governor"] is None
+
+
+def test_frame_being_encoded_is_not_reused(monkeypatch):
+    import protogen.render_pipeline as rp
+
+    display = MockDisplay(width=128, height=32)
+    pipeline = RenderPipeline(display)
+    pipeline.show_image(Image.new("RGB", (128, 32), (0, 0, 60)))
+    pipeline.set_effect("matrix_rain", {})
+    pipeline._tick(0.0, 1 / 30)
+    encoding = pipeline.last_displayed_frame
+    snapshot = encoding.copy()
+    to_image = rp.frame_to_image
+
+    def render_meanwhile(frame):
+        # The render thread pushes on while the preview is encoded
+        for i in range(1, 12):
+            pipeline._tick(i / 20, 1 / 30)
+        assert pipeline.last_displayed_frame is not encoding
+        return to_image(frame)
+
+    monkeypatch.setattr(rp, "frame_to_image", render_meanwhile)
+    pipeline.get_jpeg()
+    np.testing.assert_array_equal(encoding, snapshot)
+    monkeypatch.setattr(rp, "frame_to_image", to_image)
+    # Released once the encode is done
+    pipeline._tick(1.0, 1 / 30)
+    pipeline._tick(1.1, 1 / 30)
+    assert not any(encoding is retired for retired in pipeline._retired)
@@ -52,6 +52,17 @@ def test_cpu_temp_none_when_no_sensors():
     assert status["cpu_temp"] is None
 
 
+def test_get_cpu_temp_reads_only_sensors():
+    monitor = SystemMonitor()
+    with patch.object(monitor, "_psutil") as mock_psutil:
+        mock_psutil.sensors_temperatures.return_value = {
+            "cpu_thermal": [MagicMock(current=61.5)],
+        }
+        assert monitor.get_cpu_temp() == 61.5
+        mock_psutil.virtual_memory.assert_not_called()
+    assert monitor._cached_status is None
+
+
 def test_no_psutil_returns_none_values():
     monitor = SystemMonitor()
     monitor._psutil = None
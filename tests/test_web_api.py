@@ -103,6 +103,17 @@ def test_set_effect_endpoint(web_app):
     assert commands[0].value == "matrix_rain"
 
 
+def test_add_and_remove_effect_endpoints(web_app):
+    app, commands, _ = web_app
+    client = TestClient(app)
+    assert client.post("/api/effect/breathe/add").status_code == 200
+    assert client.post("/api/effect/breathe/remove").status_code == 200
+    assert [(c.event, c.value) for c in commands] == [
+        (InputEvent.ADD_EFFECT, "breathe"),
+        (InputEvent.REMOVE_EFFECT, "breathe"),
+    ]
+
+
 def test_clear_effect_endpoint(web_app):
     app, commands, _ = web_app
     client = TestClient(app)
@@ -183,6 +194,31 @@ def test_system_status_without_monitor():
     assert data["display_fps"] == 0.0
 
 
+def test_metrics_endpoint():
+    async def put(cmd: Command) -> None:
+        pass
+
+    metrics = {"display_fps": 30.0, "stages": {"push": {"count": 3, "p50": 0.4}}}
+    app = _create_app(
+        expression_names=["happy"],
+        put=put,
+        get_blink_state=lambda: False,
+        get_current_expression=lambda: "happy",
+        get_brightness=lambda: 100,
+        get_metrics=lambda: metrics,
+    )
+    client = TestClient(app)
+    response = client.get("/api/metrics")
+    assert response.status_code == 200
+    assert response.json() == metrics
+
+
+def test_metrics_endpoint_without_source(web_app):
+    app, _, _ = web_app
+    client = TestClient(app)
+    assert client.get("/api/metrics").status_code == 204
+
+
 def test_update_effect_params_endpoint(web_app):
     app, commands, _ = web_app
     client = TestClient(app)